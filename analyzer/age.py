@@ -0,0 +1,403 @@
+import os
+import time
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import bitmath
+from rich import box
+from rich.table import Column
+
+from analyzer.analyzer_interface import FileRecord, PathLike
+from analyzer.categorization import CategorizedAnalyzer, CategoryResolver
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+# upper bounds of the age buckets, files older than the last one are in the
+# last bucket
+AGE_LIMITS = (DAY, 7 * DAY, 30 * DAY, 365 * DAY)
+AGE_LABELS = ("< 1 day", "< 7 days", "< 30 days", "< 1 year", "Older")
+BUCKETS = len(AGE_LABELS)
+OLDEST = BUCKETS - 1
+
+
+def age_bucket(age: float) -> int:
+    """
+    Get the bucket of an age in seconds, files from the future are in the
+    first one.
+    """
+    return bisect_right(AGE_LIMITS, age)
+
+
+class AgeBuckets:
+    """
+    Number of files and bytes per age bucket.
+    """
+
+    def __init__(self) -> None:
+        self.counts = array("Q", [0]) * BUCKETS
+        self.sizes = array("Q", [0]) * BUCKETS
+
+    def add(self, bucket: int, count: int, size: int) -> None:
+        self.counts[bucket] += count
+        self.sizes[bucket] += size
+
+
+class AgeView(NamedTuple):
+    """
+    Age buckets of a group of files at a given time.
+    """
+
+    modified: AgeBuckets
+    accessed: AgeBuckets
+
+
+def cutoff_hour(now: float) -> int:
+    """
+    Get the hour before which files are in the oldest bucket at any time from
+    now on.
+    """
+    return int((now - AGE_LIMITS[-1]) // HOUR)
+
+
+class TimeCounts:
+    """
+    Number of files and bytes per slot of a time of the files (their last
+    modification or access), so that their ages are only computed when
+    reporting, within half a slot.
+
+    Slots before a cutoff are kept in a single counter: they stay in the
+    oldest bucket at any later time. Moving the cutoff up as time passes
+    bounds the memory by the slots of about a year.
+    """
+
+    def __init__(self, cutoff: int, resolution: int = HOUR) -> None:
+        """
+        Parameters:
+        - cutoff (int): Hour before which files are only counted as old, see
+          cutoff_hour.
+        - resolution (int): The length of a slot in seconds, a multiple of
+          an hour.
+        """
+        self.resolution = resolution
+        # slot before which files are only counted as old
+        self.cutoff = self._slot_of_hour(cutoff)
+        self.counts: Dict[int, int] = {}
+        self.sizes: Dict[int, int] = {}
+        self.old_count = 0
+        self.old_size = 0
+
+    def _slot_of_hour(self, hour: int) -> int:
+        return hour * HOUR // self.resolution
+
+    def update(self, timestamp: float, size: int, count: int) -> None:
+        self._add(int(timestamp // self.resolution), count, count * size)
+
+    def _add(self, slot: int, count: int, size: int) -> None:
+        if slot < self.cutoff:
+            self.old_count += count
+            self.old_size += size
+            return
+        files = self.counts.get(slot, 0) + count
+        if files:
+            self.counts[slot] = files
+            self.sizes[slot] = self.sizes.get(slot, 0) + size
+        else:
+            self.counts.pop(slot, None)
+            self.sizes.pop(slot, None)
+
+    def fold(self, cutoff: int) -> None:
+        """
+        Count the files of the slots before a later cutoff hour as old.
+        """
+        self._fold(self._slot_of_hour(cutoff))
+
+    def _fold(self, cutoff: int) -> None:
+        if cutoff <= self.cutoff:
+            return
+        self.cutoff = cutoff
+        for slot in [slot for slot in self.counts if slot < cutoff]:
+            self.old_count += self.counts.pop(slot)
+            self.old_size += self.sizes.pop(slot)
+
+    def merge(self, other: "TimeCounts") -> None:
+        # the old files of the other counts may be old for it only
+        self._fold(other.cutoff)
+        self.old_count += other.old_count
+        self.old_size += other.old_size
+        for slot, count in other.counts.items():
+            self._add(slot, count, other.sizes[slot])
+
+    @property
+    def files(self) -> int:
+        return self.old_count + sum(self.counts.values())
+
+    @property
+    def size(self) -> int:
+        return self.old_size + sum(self.sizes.values())
+
+    def buckets(self, now: float) -> AgeBuckets:
+        """
+        Get the number of files and bytes per age bucket.
+
+        Parameters:
+        - now (float): The time ages are computed at, at least the time the
+          cutoff hour was computed for.
+
+        Returns:
+        - AgeBuckets: The files and bytes of each bucket.
+        """
+        buckets = AgeBuckets()
+        buckets.add(OLDEST, self.old_count, self.old_size)
+        for slot, count in self.counts.items():
+            # from the middle of the slot, within half a slot either way
+            age = now - (slot + 0.5) * self.resolution
+            buckets.add(age_bucket(age), count, self.sizes[slot])
+        return buckets
+
+
+class Ages:
+    """
+    Times of a group of files, of last modification and of last access.
+    """
+
+    def __init__(self, cutoff: int, resolution: int = HOUR) -> None:
+        self.modified = TimeCounts(cutoff, resolution)
+        self.accessed = TimeCounts(cutoff, resolution)
+
+    def update(self, record: FileRecord, count: int) -> None:
+        # files whose access time is unknown are counted by their modification
+        accessed = record.mtime if record.atime < 0 else record.atime
+        self.modified.update(record.mtime, record.size, count)
+        self.accessed.update(accessed, record.size, count)
+
+    def fold(self, cutoff: int) -> None:
+        self.modified.fold(cutoff)
+        self.accessed.fold(cutoff)
+
+    def merge(self, other: "Ages") -> None:
+        self.modified.merge(other.modified)
+        self.accessed.merge(other.accessed)
+
+    @property
+    def files(self) -> int:
+        return self.modified.files
+
+    @property
+    def size(self) -> int:
+        return self.modified.size
+
+    def at(self, now: float) -> AgeView:
+        return AgeView(self.modified.buckets(now), self.accessed.buckets(now))
+
+
+class FileAge(CategorizedAnalyzer):
+    """
+    Age of the files since their last modification and their last access, in
+    fixed buckets, overall, per category and per top-level directory, to find
+    the cold data.
+
+    The times of the stat record of each file are counted per hour overall,
+    per day per category and top-level directory (so that a tree of many
+    top-level directories keeps a few hundred counters for each of them), and
+    only turned into ages when reporting: a long-running watch or the merged
+    results of scans started at different times are bucketed against the
+    time of the report. Files whose access time is unknown are counted by
+    their modification time.
+    Access times are only as accurate as the file system keeps them: with
+    relatime they are updated at most once a day, with noatime never.
+    """
+
+    def __init__(
+        self,
+        root: PathLike = ".",
+        now: Optional[float] = None,
+        resolver: Optional[CategoryResolver] = None,
+    ) -> None:
+        """
+        Parameters:
+        - root (PathLike): The root of the tree, whose subdirectories are the
+          top-level directories.
+        - now (Optional[float]): The time ages are computed at, the time of
+          each report if None.
+        - resolver (Optional[CategoryResolver]): The resolver of the category
+          of the files, from their extension only if None.
+        """
+        super().__init__(resolver)
+        self.root = os.fspath(root)
+        self.now = now
+        # hour before which files are only counted as old, see cutoff_hour
+        self.cutoff = cutoff_hour(time.time() if now is None else now)
+        self.total = Ages(self.cutoff)
+        self.categories: Dict[str, Ages] = {}
+        self.directories: Dict[str, Ages] = {}
+        # files of a directory are mostly added in a row
+        self._last: Tuple[Optional[str], str] = (None, self.root)
+
+    def top_directory(self, file_path: str) -> str:
+        """
+        Get the top-level directory of a file.
+
+        Parameters:
+        - file_path (str): Path to the file.
+
+        Returns:
+        - str: Path to the subdirectory of the root the file is in, the root
+          for the files directly in it or outside of it.
+        """
+        directory_path = os.path.dirname(file_path)
+        last_path, last_top = self._last
+        if directory_path == last_path:
+            return last_top
+        name = os.path.relpath(directory_path, self.root).split(os.sep, 1)[0]
+        if name in (os.curdir, os.pardir):
+            top = self.root
+        else:
+            top = os.path.join(self.root, name)
+        self._last = (directory_path, top)
+        return top
+
+    def _update(self, record: FileRecord, category: str, count: int) -> None:
+        directory = self.top_directory(record.path)
+        for ages in (
+            self.total,
+            self._group(self.categories, category),
+            self._group(self.directories, directory),
+        ):
+            ages.update(record, count)
+
+    def _group(self, groups: Dict[str, Ages], name: str) -> Ages:
+        ages = groups.get(name)
+        if ages is None:
+            ages = groups[name] = Ages(self.cutoff, DAY)
+        return ages
+
+    def _groups(self) -> List[Ages]:
+        return [self.total, *self.categories.values(), *self.directories.values()]
+
+    def fold(self, now: float) -> None:
+        """
+        Count the files that are in the oldest bucket from now on as old, to
+        bound the memory of a long-running watch.
+
+        Parameters:
+        - now (float): The current time.
+        """
+        self.cutoff = max(self.cutoff, cutoff_hour(now))
+        for ages in self._groups():
+            ages.fold(self.cutoff)
+
+    def settings(self) -> tuple:
+        return (*super().settings(), self.root)
+
+    def merge(self, other: "FileAge") -> None:
+        self.flush()
+        self.cutoff = max(self.cutoff, other.cutoff)
+        self.total.merge(other.total)
+        for category, other_ages in other.categories.items():
+            self._group(self.categories, category).merge(other_ages)
+        for directory, other_ages in other.directories.items():
+            self._group(self.directories, directory).merge(other_ages)
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Print the age buckets of all the files, then the bytes of each
+        category and top-level directory per age bucket.
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
+        """
+        self.flush()
+        writer = writer or TableWriter()
+        if not self.total.files:
+            writer.write_message("[green]No files to compute the age of.[/green]")
+            return
+        now = time.time() if self.now is None else self.now
+        self.fold(now)
+        bitmath.format_string = "{value:.2f} {unit}"
+        self._report_buckets(writer, now)
+        self._report_groups(
+            writer,
+            "Stale Data per Category",
+            "Category",
+            self.categories,
+            "age_per_category",
+            now,
+        )
+        self._report_groups(
+            writer,
+            "Stale Data per Top-Level Directory",
+            "Directory",
+            self.directories,
+            "age_per_directory",
+            now,
+        )
+
+    def _report_buckets(self, writer: ReportWriter, now: float) -> None:
+        modified, accessed = self.total.at(now)
+        total_size = max(1, self.total.size)
+        writer.write_table(
+            "File Age",
+            [
+                Column("Age", style="bold cyan"),
+                Column("Modified", justify="right", style="magenta"),
+                Column("Modified Bytes", justify="right", style="magenta"),
+                Column("Share", justify="right", style="magenta"),
+                Column("Accessed", justify="right", style="magenta"),
+                Column("Accessed Bytes", justify="right", style="magenta"),
+            ],
+            (
+                (
+                    label,
+                    modified.counts[bucket],
+                    Size(modified.sizes[bucket]),
+                    f"{100 * modified.sizes[bucket] / total_size:.1f}%",
+                    accessed.counts[bucket],
+                    Size(accessed.sizes[bucket]),
+                )
+                for bucket, label in enumerate(AGE_LABELS)
+            ),
+            name="age",
+            box=box.HEAVY_EDGE,
+        )
+
+    def _report_groups(
+        self,
+        writer: ReportWriter,
+        title: str,
+        group_name: str,
+        groups: Dict[str, Ages],
+        name: str,
+        now: float,
+    ) -> None:
+        views = [
+            (group, ages.files, ages.size, ages.at(now))
+            for group, ages in groups.items()
+            if ages.files
+        ]
+        # the groups with the most bytes not accessed for the longest first
+        views.sort(key=lambda item: (-item[3].accessed.sizes[OLDEST], item[0]))
+        writer.write_table(
+            title,
+            [
+                Column(group_name, style="bold cyan", no_wrap=False),
+                Column("Files", justify="right", style="magenta"),
+                Column("Size", justify="right", style="magenta"),
+                *(Column(f"Modified {label}", justify="right") for label in AGE_LABELS),
+                Column("Not Accessed in 1 Year", justify="right", style="bold magenta"),
+            ],
+            (
+                (
+                    group,
+                    files,
+                    Size(size),
+                    *(Size(bucket_size) for bucket_size in view.modified.sizes),
+                    Size(view.accessed.sizes[OLDEST]),
+                )
+                for group, files, size, view in views
+            ),
+            name=name,
+            box=box.HEAVY_EDGE,
+        )
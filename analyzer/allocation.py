@@ -0,0 +1,222 @@
+import errno
+import os
+import stat
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, List, NamedTuple, Optional
+
+import bitmath
+from rich import box
+from rich.table import Column
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import CategorizedAnalyzer, CategoryResolver
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter
+
+
+def next_data(fd: int, offset: int) -> Optional[int]:
+    """
+    Get the offset of the first data at or after an offset, None if only a
+    hole is left.
+    """
+    try:
+        return os.lseek(fd, offset, os.SEEK_DATA)
+    except OSError as e:
+        if e.errno == errno.ENXIO:
+            return None
+        raise
+
+
+def data_size(path: str, size: int) -> int:
+    """
+    Get the number of bytes of a file stored in data extents, skipping its
+    holes with SEEK_DATA and SEEK_HOLE.
+
+    Parameters:
+    - path (str): Path to the file.
+    - size (int): Size of the file.
+
+    Returns:
+    - int: The bytes of the file that are not holes, the size of the file if
+      the file system cannot tell.
+
+    Raises:
+    - OSError: If the file cannot be opened.
+    """
+    # O_NONBLOCK so that opening a FIFO never blocks
+    fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_NOCTTY)
+    try:
+        data, offset = 0, 0
+        while offset < size:
+            start = next_data(fd, offset)
+            if start is None:
+                break
+            offset = os.lseek(fd, start, os.SEEK_HOLE)
+            data += offset - start
+        return data
+    except OSError as e:
+        if e.errno == errno.EINVAL:
+            return size
+        raise
+    finally:
+        os.close(fd)
+
+
+class SparseFile(NamedTuple):
+    path: str
+    size: int
+    allocated: int
+    data: int
+
+    @property
+    def holes(self) -> int:
+        return self.size - self.data
+
+
+@dataclass
+class AllocationTotals:
+    files: int = 0
+    size: int = 0
+    allocated: int = 0
+    slack: int = 0
+
+    def update(self, record: FileRecord, count: int) -> None:
+        self.files += count
+        self.size += count * record.size
+        self.allocated += count * record.allocated
+        self.slack += count * record.slack
+
+    def merge(self, other: "AllocationTotals") -> None:
+        self.files += other.files
+        self.size += other.size
+        self.allocated += other.allocated
+        self.slack += other.slack
+
+
+class SpaceAllocation(CategorizedAnalyzer):
+    """
+    Space allocated on disk rather than the size of the files: the sparse
+    files, and the slack space wasted in the last block of the files of each
+    category.
+
+    Files allocated fewer bytes than their size are sparse candidates, they are
+    probed with SEEK_DATA and SEEK_HOLE when reporting. Files that have no
+    hole, e.g. compressed by the file system, are not reported.
+    """
+
+    def __init__(
+        self, top: int = 10, resolver: Optional[CategoryResolver] = None
+    ) -> None:
+        """
+        Parameters:
+        - top (int): Number of sparse files reported, those with the most
+          bytes in holes.
+        - resolver (Optional[CategoryResolver]): The resolver of the category
+          of the files, from their extension only if None.
+        """
+        super().__init__(resolver)
+        self.top = top
+        self.candidates: Dict[str, FileRecord] = {}
+        self.categories: Dict[str, AllocationTotals] = {}
+
+    def _update(self, record: FileRecord, category: str, count: int) -> None:
+        totals = self.categories.get(category)
+        if totals is None:
+            totals = self.categories[category] = AllocationTotals()
+        totals.update(record, count)
+        if count < 0:
+            self.candidates.pop(record.path, None)
+        elif stat.S_ISREG(record.mode) and record.allocated < record.size:
+            self.candidates[record.path] = record
+
+    def settings(self) -> tuple:
+        return (*super().settings(), self.top)
+
+    def merge(self, other: "SpaceAllocation") -> None:
+        self.flush()
+        self.candidates.update(other.candidates)
+        for category, other_totals in other.categories.items():
+            self.categories.setdefault(category, AllocationTotals()).merge(other_totals)
+
+    def sparse_files(self) -> List[SparseFile]:
+        """
+        Probe the sparse candidates for holes.
+
+        Returns:
+        - List[SparseFile]: The files with holes, those with the most bytes in
+          holes first.
+        """
+        sparse_files = []
+        for record in self.candidates.values():
+            try:
+                data = data_size(record.path, record.size)
+            except OSError:
+                continue
+            if data < record.size:
+                sparse_files.append(
+                    SparseFile(record.path, record.size, record.allocated, data)
+                )
+        return sorted(sparse_files, key=lambda entry: (-entry.holes, entry.path))
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Print the sparse files and the slack space of each category.
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
+        """
+        self.flush()
+        writer = writer or TableWriter()
+        bitmath.format_string = "{value:.2f} {unit}"
+        writer.write_table(
+            f"Sparse Files (top {self.top})",
+            [
+                Column("File Path", style="cyan", no_wrap=False),
+                Column("Size", justify="right", style="magenta"),
+                Column("Allocated", justify="right", style="magenta"),
+                Column("Data", justify="right", style="magenta"),
+                Column("Holes", justify="right", style="bold magenta"),
+            ],
+            (
+                (
+                    entry.path,
+                    Size(entry.size),
+                    Size(entry.allocated),
+                    Size(entry.data),
+                    Size(entry.holes),
+                )
+                for entry in islice(self.sparse_files(), self.top)
+            ),
+            empty_message="[green]No sparse files found.[/green]",
+            name="sparse_files",
+            box=box.HEAVY_EDGE,
+        )
+        self._report_slack(writer)
+
+    def _report_slack(self, writer: ReportWriter) -> None:
+        writer.write_table(
+            "Slack Space per Category",
+            [
+                Column("Category", style="bold cyan"),
+                Column("Files", justify="right", style="magenta"),
+                Column("Size", justify="right", style="magenta"),
+                Column("Allocated", justify="right", style="magenta"),
+                Column("Slack", justify="right", style="bold magenta"),
+            ],
+            (
+                (
+                    category,
+                    totals.files,
+                    Size(totals.size),
+                    Size(totals.allocated),
+                    Size(totals.slack),
+                )
+                for category, totals in sorted(
+                    self.categories.items(), key=lambda item: -item[1].slack
+                )
+                if totals.files
+            ),
+            name="slack_per_category",
+            box=box.HEAVY_EDGE,
+        )
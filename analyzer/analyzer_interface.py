@@ -1,9 +1,98 @@
+import os
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Union
+from typing import NamedTuple, Union
 
 PathLike = Union[Path, str]
 
+# the sizes thresholds are applied to: the size of the content of the files,
+# or the space allocated to them on disk
+APPARENT = "apparent"
+ALLOCATED = "allocated"
+SIZE_BASES = (APPARENT, ALLOCATED)
+BLOCK_SIZE = 512
+
+
+class FileRecord(NamedTuple):
+    """
+    The stat data of a single file, taken once and shared by every analyzer.
+
+    Attributes:
+        path (str): Path to the file.
+        size (int): Size of the file in bytes.
+        mode (int): Raw st_mode of the file.
+        inode (int): Inode number of the file.
+        mtime (float): Last modification time of the file.
+        dev (int): Device the file lives on.
+        nlink (int): Number of hard links to the file.
+        uid (int): User id of the owner of the file, -1 if unknown.
+        gid (int): Group id of the file, -1 if unknown.
+        blocks (int): Number of 512-byte blocks allocated to the file, -1 if
+            unknown.
+        atime (float): Last access time of the file, -1 if unknown.
+    """
+
+    path: str
+    size: int
+    mode: int
+    inode: int
+    mtime: float
+    dev: int = 0
+    nlink: int = 1
+    uid: int = -1
+    gid: int = -1
+    blocks: int = -1
+    atime: float = -1.0
+
+    @property
+    def allocated(self) -> int:
+        """
+        Bytes allocated to the file on disk, its size if unknown.
+        """
+        return self.size if self.blocks < 0 else self.blocks * BLOCK_SIZE
+
+    @property
+    def slack(self) -> int:
+        """
+        Bytes allocated to the file beyond its size, wasted in its last block.
+        """
+        return max(0, self.allocated - self.size)
+
+    def size_by(self, size_basis: str) -> int:
+        """
+        Get the apparent or the allocated size of the file, see SIZE_BASES.
+        """
+        return self.allocated if size_basis == ALLOCATED else self.size
+
+    @classmethod
+    def from_stat(cls, path: PathLike, stat_result: os.stat_result) -> "FileRecord":
+        """
+        Build a record from an already available stat result.
+        """
+        return cls(
+            os.fspath(path),
+            stat_result.st_size,
+            stat_result.st_mode,
+            stat_result.st_ino,
+            stat_result.st_mtime,
+            stat_result.st_dev,
+            stat_result.st_nlink,
+            stat_result.st_uid,
+            stat_result.st_gid,
+            stat_result.st_blocks,
+            stat_result.st_atime,
+        )
+
+    @classmethod
+    def from_path(cls, path: PathLike) -> "FileRecord":
+        """
+        Stat a file and build its record.
+
+        Raises:
+            OSError: If the file cannot be stat'ed.
+        """
+        return cls.from_stat(path, os.stat(path))
+
 
 class AnalyserInterface(ABC):
     @abstractmethod
@@ -13,9 +102,58 @@ class AnalyserInterface(ABC):
         """
         pass
 
+    def add_record(self, record: FileRecord):
+        """
+        Add a file to the analyzer from its precomputed stat record.
+
+        Analyzers should override this to avoid stat'ing the file again, the
+        default falls back to add().
+        """
+        self.add(record.path)
+
+    def remove_record(self, record: FileRecord) -> None:
+        """
+        Remove a file previously added with add_record, e.g. because it was
+        deleted or modified. Analyzers must support this to be kept up to date
+        by the watch mode.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support remove_record"
+        )
+
+    def add_directory(self, record: FileRecord) -> None:
+        """
+        Add a directory of the tree, when the walk reports directories.
+        Directories are not files: the default ignores them.
+        """
+
+    def flush(self) -> None:
+        """
+        Finish the work still in flight for the files added so far. It is
+        called once the files of a walk were all added, analyzers working in
+        the background must override it.
+        """
+
+    def merge(self, other: "AnalyserInterface") -> None:
+        """
+        Merge the partial results of another analyzer of the same type into
+        this one. Analyzers must support this (and be picklable) to be used
+        with sharded, multi-process scans.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support merge")
+
+    def settings(self) -> tuple:
+        """
+        The configuration the results of the analyzer depend on, so that only
+        the results of analyzers configured the same are merged, e.g. when
+        resuming from a checkpoint. The default is for analyzers without one.
+        """
+        return ()
+
     @abstractmethod
-    def report(self):
+    def report(self, writer=None):
         """
-        Abstract method to report the results of the analysis.
+        Abstract method to report the results of the analysis, through a
+        ReportWriter (rich tables if None).
         """
         pass
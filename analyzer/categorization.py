@@ -1,45 +1,51 @@
+import heapq
 import json
+import os
 import sys
-from collections import defaultdict
-from pathlib import Path
-from typing import Dict, List, Union
+from abc import abstractmethod
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
 
 import bitmath
 from pydantic import BaseModel
 from rich import box, print
-from rich.table import Table
+from rich.table import Column
 
-from analyzer.analyzer_interface import AnalyserInterface, PathLike
+from analyzer.analyzer_interface import AnalyserInterface, FileRecord, PathLike
+from analyzer.file_table import FileTable
+from analyzer.sniffing import SNIFFED_CATEGORIES, ContentSniffer
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter
 
 
-class FileInfo(BaseModel):
-    filename: Union[Path, str]
-    extension: str
-    category: str
-    size: int
+class ExtensionInfo(BaseModel):
+    number_of_files: int = 0
+    total_size: int = 0
 
 
 class CategoryInfo(BaseModel):
     name: str
     number_of_files: int
     total_size: int
-    files: List[FileInfo]
+    # bytes allocated on disk, and wasted in the last block of the files
+    allocated_size: int = 0
+    slack_size: int = 0
+    extensions: Dict[str, ExtensionInfo] = {}
+    # min-heap of the (size, path) of the largest files
+    largest_files: List[Tuple[int, str]] = []
 
 
-# this is an example of CategoryInfo
+# this is an example of CategoryInfo, the files themselves are stored in the
+# FileTable of the Categorization
 # [
 #     (
 #         'Text',               <--- key: category
 #         CategoryInfo(         <--- value: CategoryInfo
 #             name='Other',
 #             number_of_files=1,
-#             total_size=0,
-#             files=[FileInfo(
-#                 filename=PosixPath('/tmp.txt'),
-#                 extension='.txt',
-#                 category='Text',
-#                 size=0)       <--- size in Bytes
-#             ]
+#             total_size=10,    <--- size in Bytes
+#             extensions={'.txt': ExtensionInfo(number_of_files=1, total_size=10)},
+#             largest_files=[(10, '/tmp.txt')],   <--- only with top_k
 #         )
 #     ),
 #     (
@@ -48,12 +54,8 @@ class CategoryInfo(BaseModel):
 #             name='Other',
 #             number_of_files=1,
 #             total_size=0,
-#             files=[FileInfo(
-#                 filename=PosixPath('/video.mp4'),
-#                 extension='.mp4',
-#                 category='Video',
-#                 size=0)
-#             ]
+#             extensions={'.mp4': ExtensionInfo(number_of_files=1, total_size=0)},
+#             largest_files=[(0, '/video.mp4')],
 #         )
 #     ),
 # ]
@@ -69,84 +71,390 @@ except Exception as e:
     raise SystemExit(1) from e
 
 
-class Categorization(AnalyserInterface):
+def build_category_index(mapping: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Index the categories by extension.
 
-    def __init__(self) -> None:
-        self.category_data: Dict[str, CategoryInfo] = defaultdict(
-            lambda: CategoryInfo(
-                name="Other", number_of_files=0, total_size=0, files=[]
-            )
-        )
+    Parameters:
+    - mapping (Dict[str, List[str]]): The extensions of each category.
+
+    Returns:
+    - Dict[str, str]: The category of each lowercased extension. An extension
+      listed in several categories belongs to the first one.
+    """
+    index: Dict[str, str] = {}
+    for category, extensions in mapping.items():
+        for extension in extensions:
+            index.setdefault(extension.lower(), category)
+    return index
+
+
+category_index = build_category_index(category_mapping)
+# shown in place of the extension of the files that have none
+NO_EXTENSION = "(none)"
+# number of suffixes of the longest extension, e.g. 2 for ".tar.gz"
+max_suffixes = max((extension.count(".") for extension in category_index), default=1)
+
+
+def get_category(extension: str) -> str:
+    """
+    Get the category of a file extension.
+
+    Parameters:
+    - extension (str): The extension of the file, including the dot.
+
+    Returns:
+    - str: The category of the extension, "Other" if it is unknown.
+    """
+    return category_index.get(extension.lower(), "Other")
+
+
+def split_extension(path: str) -> str:
+    """
+    Get the extension of a file, which is its last suffix unless a known
+    extension spans several suffixes (such as ".tar.gz" or ".d.ts").
+
+    Like os.path.splitext, leading dots of the file name are not suffixes.
+
+    Parameters:
+    - path (str): The path to the file.
+
+    Returns:
+    - str: The extension, including the dot, or "" if there is none.
+    """
+    name = os.path.basename(path)
+    extension = os.path.splitext(name)[1]
+    if not extension or max_suffixes < 2:
+        return extension
+    first = len(name) - len(name.lstrip(".")) + 1
+    end = len(name) - len(extension)
+    for _ in range(max_suffixes - 1):
+        end = name.rfind(".", first, end)
+        if end < 0:
+            break
+        if name[end:].lower() in category_index:
+            extension = name[end:]
+    return extension
+
+
+def _empty_category_info() -> CategoryInfo:
+    # module level (unlike a lambda) so that Categorization can be pickled
+    return CategoryInfo(name="Other", number_of_files=0, total_size=0)
+
+
+class Resolution(NamedTuple):
+    extension: str
+    # the category of the extension, kept if the content tells nothing
+    category: str
+    # the category sniffed from the content, None if it is not sniffed
+    sniffed: Optional["Future[Optional[str]]"]
+
+
+class CategoryResolver:
+    """
+    Resolve the category of files from their extension, or from their content
+    when a sniffer is given and the extension tells nothing.
+
+    A single resolver is shared by the analyzers reporting per category, so
+    that they all put a file in the same category as Categorization.
+    """
 
-    def add(self, filepath: PathLike) -> None:
+    def __init__(self, sniffer: Optional[ContentSniffer] = None) -> None:
         """
-        Add a file to the categorized files.
+        Parameters:
+        - sniffer (Optional[ContentSniffer]): Sniffer categorizing the files
+          whose extension is missing or unknown from their content.
+        """
+        self.sniffer = sniffer
+
+    def resolve(self, record: FileRecord) -> Resolution:
+        """
+        Start resolving the category of a file.
 
         Parameters:
-        - filename (Path): Path to the file.
+        - record (FileRecord): The stat record of the file.
+
+        Returns:
+        - Resolution: The extension and category of the file, and the future
+          category sniffed from its content if it is sniffed.
         """
+        extension = split_extension(record.path)
+        category = get_category(extension)
+        if self.sniffer is None or category not in SNIFFED_CATEGORIES:
+            return Resolution(extension, category, None)
+        return Resolution(extension, category, self.sniffer.submit(record))
 
-        if isinstance(filepath, str):
-            filepath = Path(filepath)
-        extension = filepath.suffix
-        category = next(
-            (
-                category
-                for category, extensions in category_mapping.items()
-                if extension.lower() in extensions
-            ),
-            "Other",
-        )
+    def category_of(self, record: FileRecord) -> str:
+        """
+        Get the category a file was resolved to, from the cache of the sniffer
+        for the sniffed files.
+
+        Parameters:
+        - record (FileRecord): The stat record of the file.
+
+        Returns:
+        - str: The category of the file.
+        """
+        category = get_category(split_extension(record.path))
+        if self.sniffer is None or category not in SNIFFED_CATEGORIES:
+            return category
+        key = (record.dev, record.inode, record.mtime)
+        return self.sniffer.cache.get(key) or category
+
+
+class CategorizedAnalyzer(AnalyserInterface):
+    """
+    Analyzer keeping counters per category, resolved by a CategoryResolver.
+
+    Sniffed files are only added once their category is known, at most
+    MAX_PENDING of them waiting at a time.
+    """
+
+    MAX_PENDING = 256
+
+    def __init__(self, resolver: Optional[CategoryResolver] = None) -> None:
+        """
+        Parameters:
+        - resolver (Optional[CategoryResolver]): The resolver of the category
+          of the files, from their extension only if None.
+        """
+        self.resolver = resolver or CategoryResolver()
+        self._pending: Deque[Tuple[FileRecord, str, Future]] = deque()
+
+    @abstractmethod
+    def _update(self, record: FileRecord, category: str, count: int) -> None:
+        """
+        Add (count 1) or remove (count -1) a file of a category.
+        """
+
+    def add(self, file_path: PathLike) -> None:
         try:
-            size = filepath.stat().st_size
+            record = FileRecord.from_path(file_path)
         except (FileNotFoundError, OSError):
             return
+        self.add_record(record)
 
-        self.category_data[category].number_of_files += 1
-        self.category_data[category].total_size += size
-        self.category_data[category].files.append(
-            FileInfo(
-                filename=filepath, extension=extension, category=category, size=size
+    def add_record(self, record: FileRecord) -> None:
+        _, category, sniffed = self.resolver.resolve(record)
+        if sniffed is None:
+            self._update(record, category, 1)
+            return
+        self._pending.append((record, category, sniffed))
+        if len(self._pending) > self.MAX_PENDING:
+            self._add_sniffed()
+
+    def _add_sniffed(self) -> None:
+        record, category, sniffed = self._pending.popleft()
+        self._update(record, sniffed.result() or category, 1)
+
+    def flush(self) -> None:
+        while self._pending:
+            self._add_sniffed()
+
+    def remove_record(self, record: FileRecord) -> None:
+        self.flush()
+        self._update(record, self.resolver.category_of(record), -1)
+
+    def settings(self) -> tuple:
+        # sniffed categories differ from the categories of the extensions
+        return (self.resolver.sniffer is not None,)
+
+    def __getstate__(self) -> dict:
+        self.flush()
+        return self.__dict__.copy()
+
+
+class Categorization(CategorizedAnalyzer):
+    def __init__(
+        self,
+        sniffer: Optional[ContentSniffer] = None,
+        keep_files: bool = False,
+        top_k: int = 0,
+    ) -> None:
+        """
+        Parameters:
+        - sniffer (Optional[ContentSniffer]): Sniffer categorizing the files
+          whose extension is missing or unknown from their content.
+        - keep_files (bool): Keep every file in the FileTable, so that removed
+          files are found with the category they were added with, e.g. in
+          watch mode. Without it, only the counters of each category and
+          extension and the top_k largest files of each category are kept, so
+          memory does not grow with the number of files.
+        - top_k (int): Number of largest files kept and reported per category.
+        """
+        super().__init__(CategoryResolver(sniffer))
+        self.category_data: Dict[str, CategoryInfo] = defaultdict(_empty_category_info)
+        self.files = FileTable()
+        self.keep_files = keep_files
+        self.top_k = top_k
+        self.sniffer = sniffer
+
+    def _update(self, record: FileRecord, category: str, count: int) -> None:
+        if count > 0:
+            self._add(record, category)
+            return
+        if not self.keep_files:
+            self._remove(record, category)
+            return
+        # removed with the category it was added with
+        index = self.files.find(record.path)
+        if index is None:
+            return
+        category = self.files.categories[self.files.category[index]]
+        self.files.remove(index)
+        self._remove(record, category)
+
+    def _add(self, record: FileRecord, category: str) -> None:
+        extension = split_extension(record.path)
+        category_info = self.category_data[category]
+        category_info.number_of_files += 1
+        category_info.total_size += record.size
+        category_info.allocated_size += record.allocated
+        category_info.slack_size += record.slack
+        extension_info = category_info.extensions.get(extension)
+        if extension_info is None:
+            extension_info = category_info.extensions[extension] = ExtensionInfo()
+        extension_info.number_of_files += 1
+        extension_info.total_size += record.size
+        if self.top_k:
+            self._push_largest(category_info, (record.size, record.path))
+        if self.keep_files:
+            self.files.append(record, category, extension)
+
+    def _push_largest(self, category_info: CategoryInfo, item: Tuple[int, str]) -> None:
+        if len(category_info.largest_files) < self.top_k:
+            heapq.heappush(category_info.largest_files, item)
+        elif item > category_info.largest_files[0]:
+            heapq.heapreplace(category_info.largest_files, item)
+
+    def _remove(self, record: FileRecord, category: str) -> None:
+        # Like the counters, the largest files are not refilled: a removed
+        # file leaves the heap one file short until a larger one is added.
+        category_info = self.category_data.get(category)
+        if category_info is None:
+            return
+        category_info.number_of_files -= 1
+        category_info.total_size -= record.size
+        category_info.allocated_size -= record.allocated
+        category_info.slack_size -= record.slack
+        extension = split_extension(record.path)
+        extension_info = category_info.extensions.get(extension)
+        if extension_info is not None:
+            extension_info.number_of_files -= 1
+            extension_info.total_size -= record.size
+            if not extension_info.number_of_files:
+                del category_info.extensions[extension]
+        if (record.size, record.path) in category_info.largest_files:
+            category_info.largest_files.remove((record.size, record.path))
+            heapq.heapify(category_info.largest_files)
+        if not category_info.number_of_files:
+            del self.category_data[category]
+
+    def settings(self) -> tuple:
+        return (*super().settings(), self.keep_files, self.top_k)
+
+    def merge(self, other: "Categorization") -> None:
+        """
+        Merge the categorized files of another Categorization into this one.
+
+        Parameters:
+        - other (Categorization): The partial categorization to merge.
+        """
+        self.flush()
+        other.flush()
+        if self.sniffer is not None and other.sniffer is not None:
+            self.sniffer.merge(other.sniffer)
+        for category, other_info in other.category_data.items():
+            self._merge_category(self.category_data[category], other_info)
+        self.files.extend(other.files)
+
+    def _merge_category(
+        self, category_info: CategoryInfo, other_info: CategoryInfo
+    ) -> None:
+        category_info.number_of_files += other_info.number_of_files
+        category_info.total_size += other_info.total_size
+        category_info.allocated_size += other_info.allocated_size
+        category_info.slack_size += other_info.slack_size
+        for extension, other_extension in other_info.extensions.items():
+            extension_info = category_info.extensions.setdefault(
+                extension, ExtensionInfo()
             )
-        )
+            extension_info.number_of_files += other_extension.number_of_files
+            extension_info.total_size += other_extension.total_size
+        for item in other_info.largest_files:
+            self._push_largest(category_info, item)
 
-    def report(self) -> None:
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
         """
         Display the categorized file summary
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
         """
-        table: Table = Table(
-            title="File Summary",
+        self.flush()
+        writer = writer or TableWriter()
+        bitmath.format_string = "{value:.2f} {unit}"
+        writer.write_table(
+            "File Summary",
+            [
+                Column(
+                    "Category", justify="center", vertical="middle", style="bold cyan"
+                ),
+                Column(
+                    "File Extension",
+                    justify="center",
+                    vertical="middle",
+                    style="italic",
+                ),
+                Column(
+                    "Number of files",
+                    justify="center",
+                    vertical="middle",
+                    style="bold magenta",
+                ),
+                Column(
+                    "Size", justify="center", vertical="middle", style="bold magenta"
+                ),
+            ],
+            (
+                (
+                    category,
+                    [
+                        extension or NO_EXTENSION
+                        for extension in category_info.extensions
+                    ],
+                    category_info.number_of_files,
+                    Size(category_info.total_size),
+                )
+                for category, category_info in self.category_data.items()
+            ),
+            empty_message="[magneta]No files to categorize.[/magneta]",
+            name="categories",
             box=box.HEAVY_EDGE,
             show_lines=True,
             title_style="bold magenta",
         )
+        if self.category_data and self.top_k:
+            self._report_largest(writer)
 
-        table.add_column(
-            "Category", justify="center", vertical="middle", style="bold cyan"
-        )
-        table.add_column(
-            "File Extension", justify="center", vertical="middle", style="italic"
-        )
-        table.add_column(
-            "Number of files", justify="center", vertical="middle", style="bold magenta"
-        )
-        table.add_column(
-            "Size", justify="center", vertical="middle", style="bold magenta"
+    def _report_largest(self, writer: ReportWriter) -> None:
+        """
+        Display the largest files of each category.
+        """
+        writer.write_table(
+            f"Largest Files per Category (top {self.top_k})",
+            [
+                Column("Category", style="bold cyan"),
+                Column("File Path", style="cyan", no_wrap=False),
+                Column("Size", style="magenta"),
+            ],
+            (
+                (category, path, Size(size))
+                for category, category_info in self.category_data.items()
+                for size, path in sorted(category_info.largest_files, reverse=True)
+            ),
+            name="largest_files_per_category",
+            box=box.HEAVY_EDGE,
+            title_style="bold magenta",
         )
-
-        bitmath.format_string = "{value:.2f} {unit}"
-
-        for category, category_info in self.category_data.items():
-            table.add_row(
-                category,
-                "\n".join(
-                    set(file_info.extension for file_info in category_info.files)
-                ),
-                str(category_info.number_of_files),
-                str(bitmath.Byte(category_info.total_size).best_prefix(bitmath.SI)),
-            )
-        if not table.rows:
-            print("[magneta]No files to categorize.[/magneta]")
-            return
-
-        print(table)
@@ -0,0 +1,207 @@
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Generator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import rich
+
+from analyzer.analyzer_interface import AnalyserInterface
+from analyzer.directory_traversal import (
+    DEFAULT_OPTIONS,
+    TraversalOptions,
+    process_path,
+    start_walk,
+)
+from analyzer.utils.inodes import HardLinks, InodeSet
+
+CHECKPOINT_VERSION = 2
+
+
+def analyzer_settings(
+    analyzers: Sequence[AnalyserInterface],
+) -> List[Tuple[str, tuple]]:
+    """
+    Get the type and the configuration of each analyzer of a scan.
+    """
+    return [
+        (
+            f"{type(analyzer).__module__}.{type(analyzer).__qualname__}",
+            analyzer.settings(),
+        )
+        for analyzer in analyzers
+    ]
+
+
+class CheckpointState(NamedTuple):
+    version: int
+    root_dir: str
+    options: TraversalOptions
+    stack: List[str]
+    visited: InodeSet
+    links: Optional[HardLinks]
+    settings: List[Tuple[str, tuple]]
+    analyzers: List[AnalyserInterface]
+
+
+class Checkpoint:
+    """
+    Periodic checkpoints of a scan, so that an interrupted scan can be resumed.
+
+    A checkpoint is taken between two directories: it holds the directories
+    left to walk, the directories and hard links already seen and the state of
+    the analyzers, which all reflect exactly the directories already walked.
+    It is only resumed by a scan of the same directory, with the same options
+    and the same analyzers, configured the same.
+    It is written to a temporary file first, then renamed, so that a crash
+    while saving never leaves a corrupted checkpoint behind. The file is
+    removed once the scan completes.
+
+    Checkpoints are pickle files: only resume from checkpoints you wrote.
+    """
+
+    def __init__(self, checkpoint_path: Union[str, Path], interval: float = 60.0):
+        """
+        Parameters:
+        - checkpoint_path (Union[str, Path]): Path to the checkpoint file.
+        - interval (float): Minimum number of seconds between two checkpoints.
+        """
+        self.checkpoint_path = os.fspath(checkpoint_path)
+        self.interval = interval
+
+    def save(self, state: CheckpointState) -> None:
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def load(
+        self,
+        root_dir: str,
+        options: TraversalOptions,
+        analyzers: Sequence[AnalyserInterface],
+    ) -> Optional[CheckpointState]:
+        """
+        Load the checkpoint, if there is one for the same scan.
+
+        Returns:
+        - Optional[CheckpointState]: The checkpoint, or None if there is no
+          checkpoint or it was taken for another directory, other options or
+          other analyzers.
+        """
+        try:
+            with open(self.checkpoint_path, "rb") as file:
+                state = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            rich.print(
+                f"[red]Cannot read checkpoint '{self.checkpoint_path}': {e}. "
+                "Starting over...[/red]",
+                file=sys.stderr,
+            )
+            return None
+        if not self._matches(state, root_dir, options, analyzers):
+            rich.print(
+                f"[red]Checkpoint '{self.checkpoint_path}' was taken for another "
+                "scan. Starting over...[/red]",
+                file=sys.stderr,
+            )
+            return None
+        return state
+
+    @staticmethod
+    def _matches(
+        state: object,
+        root_dir: str,
+        options: TraversalOptions,
+        analyzers: Sequence[AnalyserInterface],
+    ) -> bool:
+        return (
+            isinstance(state, CheckpointState)
+            and state.version == CHECKPOINT_VERSION
+            and state.root_dir == root_dir
+            and state.options == options
+            and state.settings == analyzer_settings(analyzers)
+        )
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    def scan_tree(
+        self,
+        root_dir: Union[str, Path],
+        analyzers: Sequence[AnalyserInterface],
+        links: Optional[HardLinks],
+        options: TraversalOptions = DEFAULT_OPTIONS,
+        resume: bool = False,
+    ) -> Generator[os.DirEntry, None, None]:
+        """
+        Walk through the directory tree like directory_traversal.scan_tree,
+        checkpointing the walk and the given analyzers and hard links along the
+        way.
+
+        The yielded files must be fed to the analyzers before the next one is
+        requested, so that a checkpoint never misses a file that was yielded.
+
+        Args:
+            root_dir (Union[str, Path]): The root directory to start the traversal.
+            analyzers (Sequence[AnalyserInterface]): The analyzers fed with the
+            yielded files, restored from the checkpoint when resuming.
+            links (Optional[HardLinks]): The hard links tracker of the scan, if
+            any, restored from the checkpoint when resuming.
+            options (TraversalOptions): Options controlling the walk.
+            resume (bool): Resume from the checkpoint, if there is one.
+
+        Yields:
+            Generator[os.DirEntry, None, None]: Yields a DirEntry for each file
+            in the directory tree that was not walked before the checkpoint.
+        """
+        root_dir = os.fspath(root_dir)
+        options, visited = start_walk(root_dir, options, None)
+        stack = deque([root_dir])
+        state = self.load(root_dir, options, analyzers) if resume else None
+        if state is not None:
+            self._restore(state, analyzers, links)
+            stack, visited = deque(state.stack), state.visited
+        last_checkpoint = time.monotonic()
+
+        while stack:
+            if time.monotonic() - last_checkpoint >= self.interval:
+                self.save(
+                    CheckpointState(
+                        CHECKPOINT_VERSION,
+                        root_dir,
+                        options,
+                        list(stack),
+                        visited,
+                        links,
+                        analyzer_settings(analyzers),
+                        list(analyzers),
+                    )
+                )
+                last_checkpoint = time.monotonic()
+            current_path = stack.pop()
+            yield from process_path(stack, current_path, options, visited)
+        self.clear()
+
+    def _restore(
+        self,
+        state: CheckpointState,
+        analyzers: Sequence[AnalyserInterface],
+        links: Optional[HardLinks],
+    ) -> None:
+        for analyzer, partial in zip(analyzers, state.analyzers):
+            analyzer.merge(partial)
+        if links is not None and state.links is not None:
+            links.update(state.links)
+        rich.print(
+            f"[green]Resuming from checkpoint '{self.checkpoint_path}' "
+            f"({len(state.stack)} directories left to walk)...[/green]",
+            file=sys.stderr,
+        )
@@ -0,0 +1,203 @@
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+import bitmath
+import rich
+
+from analyzer.analyzer_interface import PathLike
+
+# files unlinked per task: the files of a large directory are spread across
+# the workers, each opening the directory once per chunk
+CHUNK_SIZE = 1024
+
+
+class DeletionResult(NamedTuple):
+    path: str
+    # bytes freed, 0 when other hard links keep the data alive
+    size: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class DeletionSummary:
+    dry_run: bool = False
+    deleted: int = 0
+    failed: int = 0
+    bytes_freed: int = 0
+    elapsed: float = 0.0
+
+    def add(self, result: DeletionResult) -> None:
+        if result.error is not None:
+            self.failed += 1
+            return
+        self.deleted += 1
+        self.bytes_freed += result.size
+
+    def message(self) -> str:
+        """
+        Tell how many files were deleted, the bytes freed and the throughput,
+        in rich markup.
+        """
+        freed = bitmath.Byte(self.bytes_freed).best_prefix(bitmath.SI)
+        if self.dry_run:
+            message = (
+                f"[yellow]Dry run: would delete {self.deleted} files, "
+                f"freeing {freed}.[/yellow]"
+            )
+        else:
+            elapsed = max(self.elapsed, 1e-9)
+            throughput = bitmath.Byte(self.bytes_freed / elapsed).best_prefix(
+                bitmath.SI
+            )
+            message = (
+                f"[green]Deleted {self.deleted} files, freed {freed} in "
+                f"{self.elapsed:.2f} seconds ({self.deleted / elapsed:.0f} files/s, "
+                f"{throughput}/s).[/green]"
+            )
+        if self.failed:
+            message += f"\n[red]{self.failed} files could not be deleted.[/red]"
+        return message
+
+
+def group_by_parent(paths: Iterable[PathLike]) -> Dict[str, List[str]]:
+    """
+    Group the names of the files by their parent directory.
+    """
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for path in paths:
+        parent, name = os.path.split(os.fspath(path))
+        groups[parent or os.curdir].append(name)
+    return groups
+
+
+def split_groups(
+    groups: Dict[str, List[str]], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, List[str]]]:
+    for parent, names in groups.items():
+        for start in range(0, len(names), chunk_size):
+            end = start + chunk_size
+            yield parent, names[start:end]
+
+
+def unlink_at(dir_fd: int, parent: str, name: str, dry_run: bool) -> DeletionResult:
+    """
+    Unlink a file relative to the descriptor of its parent directory, so the
+    path is not resolved again for every file.
+    """
+    path = os.path.join(parent, name)
+    try:
+        stat_result = os.lstat(name, dir_fd=dir_fd)
+        if not dry_run:
+            os.unlink(name, dir_fd=dir_fd)
+    except OSError as e:
+        return DeletionResult(path, error=e.strerror or str(e))
+    return DeletionResult(path, stat_result.st_size if stat_result.st_nlink <= 1 else 0)
+
+
+def delete_in_directory(
+    parent: str, names: List[str], dry_run: bool = False
+) -> List[DeletionResult]:
+    """
+    Delete files of a single directory, opened once.
+
+    Parameters:
+    - parent (str): The directory of the files.
+    - names (List[str]): The names of the files in the directory.
+    - dry_run (bool): Only check that the files exist.
+
+    Returns:
+    - List[DeletionResult]: The result of each deletion.
+    """
+    try:
+        dir_fd = os.open(parent, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError as e:
+        error = e.strerror or str(e)
+        return [
+            DeletionResult(os.path.join(parent, name), error=error) for name in names
+        ]
+    try:
+        return [unlink_at(dir_fd, parent, name, dry_run) for name in names]
+    finally:
+        os.close(dir_fd)
+
+
+class BulkDeleter:
+    """
+    Deletes files across a pool of threads, grouped by parent directory.
+
+    Every result is appended to the deletion log as a JSON line, with the
+    path, the bytes freed and the error, if any. Errors are also printed to
+    the standard error as they happen.
+    """
+
+    def __init__(
+        self, jobs: int = 1, dry_run: bool = False, log_path: Optional[str] = None
+    ) -> None:
+        """
+        Parameters:
+        - jobs (int): Number of threads deleting files.
+        - dry_run (bool): Only tell what would be deleted.
+        - log_path (Optional[str]): Path to the deletion log, if any.
+        """
+        self.jobs = jobs
+        self.dry_run = dry_run
+        self.log_path = log_path
+
+    def delete(self, paths: Iterable[PathLike]) -> DeletionSummary:
+        """
+        Delete files.
+
+        Parameters:
+        - paths (Iterable[PathLike]): Paths to the files to delete.
+
+        Returns:
+        - DeletionSummary: The number of files deleted, the bytes freed and
+          the time it took.
+        """
+        summary = DeletionSummary(dry_run=self.dry_run)
+        start_time = time.perf_counter()
+        with ExitStack() as stack:
+            log = (
+                stack.enter_context(open(self.log_path, "a", encoding="utf-8"))
+                if self.log_path
+                else None
+            )
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=self.jobs))
+            futures = [
+                executor.submit(delete_in_directory, parent, names, self.dry_run)
+                for parent, names in split_groups(group_by_parent(paths))
+            ]
+            for future in as_completed(futures):
+                for result in future.result():
+                    summary.add(result)
+                    self._record(result, log)
+        summary.elapsed = time.perf_counter() - start_time
+        return summary
+
+    def _record(self, result: DeletionResult, log: Optional[TextIO]) -> None:
+        if result.error is not None:
+            rich.print(
+                f"[red]Error deleting file {result.path}:[/red] {result.error}",
+                file=sys.stderr,
+            )
+        if log is not None:
+            log.write(
+                json.dumps(
+                    {
+                        "time": time.time(),
+                        "path": result.path,
+                        "size": result.size,
+                        "deleted": result.error is None and not self.dry_run,
+                        "dry_run": self.dry_run,
+                        "error": result.error,
+                    }
+                )
+                + "\n"
+            )
@@ -1,10 +1,53 @@
+import os
+import queue
 import sys
+import threading
 from collections import deque
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Generator, Union
+from typing import Generator, Iterator, List, Optional, Tuple, Union
 
 import rich
 
+from analyzer.utils.exclude import ExcludeMatcher
+from analyzer.utils.inodes import InodeSet
+
+
+@dataclass
+class TraversalOptions:
+    """
+    Options controlling how the directory tree is walked.
+
+    Attributes:
+        follow_symlinks (bool): Descend into symlinked directories. Directories
+        are walked at most once either way, so symlink loops and bind mounts
+        never make the walk run forever or scan a directory twice.
+        one_file_system (bool): Do not descend into directories that live on
+        another device than the root of the walk.
+        exclude (Tuple[str, ...]): Glob patterns of files and directories to
+        skip. Excluded directories are never listed.
+        directories (bool): Also yield the directories of the tree, but its
+        root, when they are walked.
+        root_device (Optional[int]): Device of the root of the walk, set when
+        the walk starts.
+    """
+
+    follow_symlinks: bool = False
+    one_file_system: bool = False
+    exclude: Tuple[str, ...] = ()
+    directories: bool = False
+    root_device: Optional[int] = None
+    excluded: ExcludeMatcher = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.excluded = ExcludeMatcher(self.exclude)
+
+
+DEFAULT_OPTIONS = TraversalOptions()
+
+# batches of files listed by the parallel walker ahead of its consumer
+MAX_BATCHES = 256
+
 
 def walk_through_dir(root_dir: Union[str, Path]) -> Generator[Path, None, None]:
     """
@@ -17,45 +60,354 @@ def walk_through_dir(root_dir: Union[str, Path]) -> Generator[Path, None, None]:
         Generator[Path, None, None]: Yields Path objects for each file
         in the directory tree.
     """
-    root_path = Path(root_dir)
-    stack = deque([root_path])
+    for entry in scan_tree(root_dir):
+        yield Path(entry.path)
+
+
+def scan_tree(
+    root_dir: Union[str, Path],
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    visited: Optional[InodeSet] = None,
+) -> Generator[os.DirEntry, None, None]:
+    """
+    Walk through the directory tree using os.scandir.
+
+    Unlike walk_through_dir, no Path object is built per file: the yielded
+    DirEntry objects carry the file type read from the directory listing and
+    cache their stat result, so callers can stat each file at most once.
+
+    Args:
+        root_dir (Union[str, Path]): The root directory to start the traversal.
+        options (TraversalOptions): Options controlling the walk.
+        visited (Optional[InodeSet]): Directories already walked, shared with
+        other walks of the same tree.
+
+    Yields:
+        Generator[os.DirEntry, None, None]: Yields a DirEntry for each file
+        in the directory tree.
+    """
+    options, visited = start_walk(root_dir, options, visited)
+    stack = deque([os.fspath(root_dir)])
 
     while stack:
         current_path = stack.pop()
-        yield from process_path(stack, current_path)
+        yield from process_path(stack, current_path, options, visited)
+
+
+def start_walk(
+    root_dir: Union[str, Path],
+    options: TraversalOptions,
+    visited: Optional[InodeSet],
+) -> Tuple[TraversalOptions, InodeSet]:
+    """
+    Mark the root directory of a walk as visited and record its device.
+
+    Args:
+        root_dir (Union[str, Path]): The root directory of the walk.
+        options (TraversalOptions): Options controlling the walk.
+        visited (Optional[InodeSet]): Directories already walked, if any.
+
+    Returns:
+        Tuple[TraversalOptions, InodeSet]: The options bound to the root device,
+        and the set of visited directories, including the root.
+    """
+    if visited is None:
+        visited = InodeSet()
+    try:
+        root_stat = os.stat(root_dir)
+    except OSError:
+        return options, visited
+    visited.add(root_stat.st_dev, root_stat.st_ino)
+    if options.root_device is None:
+        options = replace(options, root_device=root_stat.st_dev)
+    return options, visited
+
+
+def split_tree(
+    root_dir: Union[str, Path],
+    min_shards: int,
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    visited: Optional[InodeSet] = None,
+) -> Tuple[List[os.DirEntry], List[str]]:
+    """
+    Split the directory tree into independent subtrees.
+
+    The tree is expanded breadth-first, one level at a time, until there are at
+    least min_shards subtrees or no directories are left.
+
+    Args:
+        root_dir (Union[str, Path]): The root directory to split.
+        min_shards (int): The minimum number of subtrees wanted.
+        options (TraversalOptions): Options controlling the walk.
+        visited (Optional[InodeSet]): Directories already walked, it is
+        updated with the directories of the expanded levels.
+
+    Returns:
+        Tuple[List[os.DirEntry], List[str]]: The files found in the expanded
+        levels, and the root paths of the subtrees left to scan.
+    """
+    options, visited = start_walk(root_dir, options, visited)
+    files: List[os.DirEntry] = []
+    shards = [os.fspath(root_dir)]
+
+    while shards and len(shards) < min_shards:
+        next_level: deque = deque()
+        for shard in shards:
+            files.extend(process_path(next_level, shard, options, visited))
+        shards = list(next_level)
+    return files, shards
+
+
+def parallel_scan_tree(
+    root_dir: Union[str, Path],
+    jobs: int,
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    visited: Optional[InodeSet] = None,
+) -> Iterator[os.DirEntry]:
+    """
+    Walk through the directory tree with a pool of worker threads.
+
+    Args:
+        root_dir (Union[str, Path]): The root directory to start the traversal.
+        jobs (int): Number of worker threads.
+        options (TraversalOptions): Options controlling the walk.
+        visited (Optional[InodeSet]): Directories already walked, shared with
+        other walks of the same tree.
+
+    Returns:
+        Iterator[os.DirEntry]: Yields the same DirEntry objects as scan_tree,
+        in no particular order, with their stat result already cached.
+    """
+    return iter(ParallelWalker(root_dir, jobs, options, visited))
 
 
-def process_path(stack: deque, current_path: Path) -> Generator[Path, None, None]:
+class ParallelWalker:
+    """
+    Directory tree walker backed by a pool of worker threads.
+
+    Workers pull directories from a shared queue, list them and stat the files
+    they find, which keeps several metadata requests in flight on high-latency
+    storage. Files are handed to the consuming thread in per-directory batches,
+    so a single analyzer pipeline sees every file exactly once. At most
+    MAX_BATCHES batches wait for the consumer: workers block when it is
+    slower than the walk. Directories that cannot be listed are skipped, see
+    process_path; any other error of a worker is raised by the consumer.
+    """
+
+    def __init__(
+        self,
+        root_dir: Union[str, Path],
+        jobs: int,
+        options: TraversalOptions = DEFAULT_OPTIONS,
+        visited: Optional[InodeSet] = None,
+    ) -> None:
+        self.jobs = max(1, jobs)
+        self.options, self._visited = start_walk(root_dir, options, visited)
+        self._directories: queue.Queue = queue.Queue()
+        self._batches: queue.Queue = queue.Queue(maxsize=MAX_BATCHES)
+        self._stopped = threading.Event()
+        self._directories.put(os.fspath(root_dir))
+
+    def __iter__(self) -> Generator[os.DirEntry, None, None]:
+        workers = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(self.jobs)
+        ]
+        for worker in workers:
+            worker.start()
+        threading.Thread(target=self._wait_for_completion, daemon=True).start()
+
+        try:
+            while True:
+                batch = self._batches.get()
+                if batch is None:
+                    return
+                if isinstance(batch, BaseException):
+                    raise batch
+                yield from batch
+        finally:
+            self._stopped.set()
+            for _ in workers:
+                self._directories.put(None)
+            for worker in workers:
+                worker.join()
+
+    def _wait_for_completion(self) -> None:
+        self._directories.join()
+        self._put(None)
+
+    def _put(self, batch: Union[List[os.DirEntry], Exception, None]) -> None:
+        # the consumer may stop before draining the batches
+        while not self._stopped.is_set():
+            try:
+                self._batches.put(batch, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _work(self) -> None:
+        while True:
+            current_path = self._directories.get()
+            if current_path is None:
+                self._directories.task_done()
+                return
+            try:
+                if not self._stopped.is_set():
+                    self._put(self._scan(current_path))
+            except Exception as error:
+                self._put(error)
+            finally:
+                self._directories.task_done()
+
+    def _scan(self, current_path: str) -> List[os.DirEntry]:
+        subdirectories: deque = deque()
+        batch = list(
+            process_path(subdirectories, current_path, self.options, self._visited)
+        )
+        for entry in batch:
+            try:
+                entry.stat()
+            except OSError:
+                pass
+        for subdirectory in subdirectories:
+            self._directories.put(subdirectory)
+        return batch
+
+
+def process_path(
+    stack: deque,
+    current_path: Union[str, Path],
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    visited: Optional[InodeSet] = None,
+) -> Generator[os.DirEntry, None, None]:
     """
     Process a given path, yielding files and handling directories.
 
+    A directory that cannot be listed, e.g. removed or replaced by a file
+    during the walk, is skipped with a warning.
+
+    Symlinks to directories are only descended into when following symlinks,
+    they are never reported as files. Subdirectories are only yielded when
+    the options ask for directories, and only the first time they are
+    pushed on the stack. Excluded entries are dropped before a
+    directory is pushed on the stack, so excluded subtrees are never listed.
+
     Args:
         stack (deque): The stack used for directory traversal.
-        current_path (Path): The path to process.
+        current_path (Union[str, Path]): The path to process.
+        options (TraversalOptions): Options controlling the walk.
+        visited (Optional[InodeSet]): Directories already walked, subdirectories
+        found in it are skipped.
 
     Yields:
-        Generator[Path, None, None]: Yields Path objects for each file
+        Generator[os.DirEntry, None, None]: Yields DirEntry objects for each file
         in the processed path.
     """
     try:
-        for child in current_path.iterdir():
-            if child.is_dir():
-                stack.append(child)
-            else:
-                yield child
-    except PermissionError:
-        handle_permission_error(current_path)
+        with os.scandir(current_path) as entries:
+            for entry in filter_excluded(entries, options):
+                if entry.is_dir(follow_symlinks=options.follow_symlinks):
+                    yield from push_subdirectory(stack, entry, options, visited)
+                elif not entry.is_dir():
+                    yield entry
+    except OSError as error:
+        handle_os_error(current_path, error)
+
+
+def filter_excluded(
+    entries: Iterator[os.DirEntry], options: TraversalOptions
+) -> Iterator[os.DirEntry]:
+    """
+    Drop the entries matching the exclude patterns of the walk.
+
+    Args:
+        entries (Iterator[os.DirEntry]): The entries of a directory.
+        options (TraversalOptions): Options controlling the walk.
+
+    Returns:
+        Iterator[os.DirEntry]: The entries that are not excluded.
+    """
+    if not options.excluded:
+        return entries
+    matches = options.excluded.matches
+    return (entry for entry in entries if not matches(entry.name, entry.path))
 
 
-def handle_permission_error(current_path: Path) -> None:
+def push_subdirectory(
+    stack: deque,
+    entry: os.DirEntry,
+    options: TraversalOptions,
+    visited: Optional[InodeSet],
+) -> Iterator[os.DirEntry]:
+    """
+    Push a subdirectory on the traversal stack, see push_directory, and yield
+    it if it was pushed and the options ask for directories.
+    """
+    if push_directory(stack, entry, options, visited) and options.directories:
+        yield entry
+
+
+def push_directory(
+    stack: deque,
+    entry: os.DirEntry,
+    options: TraversalOptions,
+    visited: Optional[InodeSet],
+) -> bool:
+    """
+    Push a directory on the traversal stack unless it was already visited or
+    it lives on another file system than the root of the walk.
+
+    Args:
+        stack (deque): The stack used for directory traversal.
+        entry (os.DirEntry): The directory to push.
+        options (TraversalOptions): Options controlling the walk.
+        visited (Optional[InodeSet]): Directories already walked.
+
+    Returns:
+        bool: True if the directory was pushed.
+    """
+    if visited is None and not options.one_file_system:
+        stack.append(entry.path)
+        return True
+    try:
+        dir_stat = entry.stat()
+    except OSError:
+        return False
+    if options.one_file_system and dir_stat.st_dev != options.root_device:
+        return False
+    if visited is None or visited.add(dir_stat.st_dev, dir_stat.st_ino):
+        stack.append(entry.path)
+        return True
+    return False
+
+
+def handle_permission_error(current_path: Union[str, Path]) -> None:
     """
     Handle PermissionError when accessing a directory.
 
     Args:
-        current_path (Path): The path where the PermissionError occurred.
+        current_path (Union[str, Path]): The path where the PermissionError occurred.
     """
     rich.print(
         f"[red]Permission error accessing directory '{current_path}'"
         ". Skipping...[/red]",
         file=sys.stderr,
     )
+
+
+def handle_os_error(current_path: Union[str, Path], error: OSError) -> None:
+    """
+    Handle an OSError when listing a directory, see handle_permission_error
+    for PermissionError.
+
+    Args:
+        current_path (Union[str, Path]): The path where the error occurred.
+        error (OSError): The error raised.
+    """
+    if isinstance(error, PermissionError):
+        handle_permission_error(current_path)
+        return
+    rich.print(
+        f"[red]Error accessing directory '{current_path}': "
+        f"{error.strerror or error}. Skipping...[/red]",
+        file=sys.stderr,
+    )
@@ -0,0 +1,252 @@
+import heapq
+import os
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import bitmath
+from rich import box
+from rich.table import Column
+
+from analyzer.analyzer_interface import (
+    ALLOCATED,
+    APPARENT,
+    AnalyserInterface,
+    FileRecord,
+    PathLike,
+)
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter
+
+ROOT = 0
+
+
+class DirectoryTotal(NamedTuple):
+    depth: int
+    path: str
+    size: int
+    files: int
+    allocated: int = 0
+    slack: int = 0
+
+    def size_by(self, size_basis: str) -> int:
+        return self.allocated if size_basis == ALLOCATED else self.size
+
+
+class Counters(NamedTuple):
+    """
+    Counters of the files of each directory, by directory id.
+    """
+
+    sizes: "array[int]"
+    allocated: "array[int]"
+    slack: "array[int]"
+    counts: "array[int]"
+
+
+class DirectoryUsage(AnalyserInterface):
+    """
+    Disk usage of every directory of the tree, like du: the size, allocated
+    size, slack space and number of the files below each directory.
+
+    Directories are numbered as they are first seen and stored as parallel
+    arrays of parent ids and names, rather than full paths: a directory costs
+    its name and a few integers. Each file only updates its own directory;
+    the totals are summed from the children up to the root when reporting, in
+    a single pass over the directories, as children are always numbered after
+    their parent. Paths are only rebuilt for the reported directories.
+    """
+
+    def __init__(
+        self,
+        root: PathLike = ".",
+        depths: Sequence[int] = (1,),
+        top: int = 10,
+        size_basis: str = APPARENT,
+    ) -> None:
+        """
+        Parameters:
+        - root (PathLike): The root of the tree, at depth 0.
+        - depths (Sequence[int]): Depths of the directories reported.
+        - top (int): Number of directories reported at each depth.
+        - size_basis (str): The size the directories are ranked by, the
+          apparent or the allocated size (see SIZE_BASES).
+        """
+        self.root = os.fspath(root)
+        self.depths = sorted(set(depths))
+        self.top = top
+        self.size_basis = size_basis
+        self.parents = array("q", [-1])
+        self.levels = array("H", [0])
+        self.names: List[str] = [""]
+        # counters of the files directly in each directory
+        self.counters = Counters(*(array("Q", [0]) for _ in Counters._fields))
+        self._children: Dict[Tuple[int, str], int] = {}
+        # files of a directory are mostly added in a row
+        self._last: Tuple[Optional[str], int] = (None, ROOT)
+
+    def _child(self, parent: int, name: str) -> int:
+        directory = self._children.get((parent, name))
+        if directory is None:
+            directory = self._children[parent, name] = len(self.names)
+            self.parents.append(parent)
+            self.levels.append(self.levels[parent] + 1)
+            self.names.append(name)
+            for counter in self.counters:
+                counter.append(0)
+        return directory
+
+    def _components(self, directory_path: str) -> List[str]:
+        relative = os.path.relpath(directory_path, self.root)
+        # directories outside of the root are counted in the root
+        if relative == os.curdir or relative.split(os.sep, 1)[0] == os.pardir:
+            return []
+        return relative.split(os.sep)
+
+    def directory_id(self, directory_path: str) -> int:
+        """
+        Get the id of a directory, numbering it and its parents if needed.
+
+        Parameters:
+        - directory_path (str): Path to the directory.
+
+        Returns:
+        - int: The id of the directory, 0 for the root.
+        """
+        last_path, last_id = self._last
+        if directory_path == last_path:
+            return last_id
+        directory = ROOT
+        for name in self._components(directory_path):
+            directory = self._child(directory, name)
+        self._last = (directory_path, directory)
+        return directory
+
+    def add(self, file_path: PathLike) -> None:
+        try:
+            record = FileRecord.from_path(file_path)
+        except (FileNotFoundError, OSError):
+            return
+        self.add_record(record)
+
+    def add_record(self, record: FileRecord) -> None:
+        self._update(record, 1)
+
+    def remove_record(self, record: FileRecord) -> None:
+        self._update(record, -1)
+
+    def _update(self, record: FileRecord, count: int) -> None:
+        directory = self.directory_id(os.path.dirname(record.path))
+        self.counters.sizes[directory] += count * record.size
+        self.counters.allocated[directory] += count * record.allocated
+        self.counters.slack[directory] += count * record.slack
+        self.counters.counts[directory] += count
+
+    def add_directory(self, record: FileRecord) -> None:
+        # so that empty directories are reported too
+        self.directory_id(record.path)
+
+    def settings(self) -> tuple:
+        return (self.root, tuple(self.depths), self.top, self.size_basis)
+
+    def merge(self, other: "DirectoryUsage") -> None:
+        ids = array("q", [ROOT]) * len(other.names)
+        for directory in range(1, len(other.names)):
+            ids[directory] = self._child(
+                ids[other.parents[directory]], other.names[directory]
+            )
+        for counter, other_counter in zip(self.counters, other.counters):
+            for directory, own_id in enumerate(ids):
+                counter[own_id] += other_counter[directory]
+
+    def totals(self) -> Counters:
+        """
+        Sum the counters of every directory with those of its subdirectories.
+
+        Returns:
+        - Counters: The totals of each directory, by id.
+        """
+        totals = Counters(*(array("Q", counter) for counter in self.counters))
+        for directory in range(len(self.names) - 1, ROOT, -1):
+            parent = self.parents[directory]
+            for counter in totals:
+                counter[parent] += counter[directory]
+        return totals
+
+    def path(self, directory: int) -> str:
+        names = []
+        while directory != ROOT:
+            names.append(self.names[directory])
+            directory = self.parents[directory]
+        return os.path.join(self.root, *reversed(names))
+
+    def _basis(self, counters: Counters) -> "array[int]":
+        return counters.allocated if self.size_basis == ALLOCATED else counters.sizes
+
+    def heaviest(self) -> List[DirectoryTotal]:
+        """
+        Get the heaviest directories at each reported depth.
+
+        Returns:
+        - List[DirectoryTotal]: The top directories of each depth, by
+          ascending depth and descending size.
+        """
+        totals = self.totals()
+        heaviest = []
+        for depth in self.depths:
+            directories = [
+                directory
+                for directory in range(len(self.names))
+                if self.levels[directory] == depth
+            ]
+            heaviest.extend(
+                DirectoryTotal(
+                    depth,
+                    self.path(directory),
+                    totals.sizes[directory],
+                    totals.counts[directory],
+                    totals.allocated[directory],
+                    totals.slack[directory],
+                )
+                for directory in heapq.nlargest(
+                    self.top, directories, key=self._basis(totals).__getitem__
+                )
+            )
+        return heaviest
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Print the heaviest directories at each reported depth, with the space
+        they waste in the last block of their files.
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
+        """
+        total_size = max(1, sum(self._basis(self.counters)))
+        bitmath.format_string = "{value:.2f} {unit}"
+        (writer or TableWriter()).write_table(
+            "Heaviest Directories",
+            [
+                Column("Depth", justify="right", style="bold cyan"),
+                Column("Directory", style="cyan", no_wrap=False),
+                Column("Size", justify="right", style="magenta"),
+                Column("Allocated", justify="right", style="magenta"),
+                Column("Slack", justify="right", style="magenta"),
+                Column("Files", justify="right", style="magenta"),
+                Column("Share", justify="right", style="magenta"),
+            ],
+            (
+                (
+                    entry.depth,
+                    entry.path,
+                    Size(entry.size),
+                    Size(entry.allocated),
+                    Size(entry.slack),
+                    entry.files,
+                    f"{100 * entry.size_by(self.size_basis) / total_size:.1f}%",
+                )
+                for entry in self.heaviest()
+            ),
+            empty_message="[green]No directories found at the reported depths.[/green]",
+            name="directories",
+            box=box.HEAVY_EDGE,
+        )
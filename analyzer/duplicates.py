@@ -0,0 +1,230 @@
+import hashlib
+import stat
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import bitmath
+from rich import box
+from rich.table import Column
+
+from analyzer.analyzer_interface import AnalyserInterface, FileRecord, PathLike
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter
+
+# bytes hashed at the start and at the end of the files by the partial hash,
+# files up to twice as large are entirely read by it
+PARTIAL_SIZE = 4096
+BUFFER_SIZE = 1024 * 1024
+
+# (size, paths) of files that may be duplicates of each other
+Candidates = Tuple[int, List[str]]
+
+_buffers = threading.local()
+
+
+class DuplicateGroup(NamedTuple):
+    size: int
+    paths: List[str]
+
+    @property
+    def reclaimable(self) -> int:
+        """
+        Bytes freed by keeping a single copy.
+        """
+        return self.size * (len(self.paths) - 1)
+
+
+def _digest() -> "hashlib._Hash":
+    return hashlib.blake2b(digest_size=16)
+
+
+def partial_hash(path: str, size: int) -> bytes:
+    """
+    Hash the first and the last PARTIAL_SIZE bytes of a file.
+    """
+    digest = _digest()
+    with open(path, "rb", buffering=0) as file:
+        digest.update(file.read(PARTIAL_SIZE))
+        if size > PARTIAL_SIZE:
+            file.seek(max(PARTIAL_SIZE, size - PARTIAL_SIZE))
+            digest.update(file.read(PARTIAL_SIZE))
+    return digest.digest()
+
+
+def full_hash(path: str, size: int) -> bytes:
+    """
+    Hash the content of a file, read into a buffer reused by each thread.
+    """
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _buffers.buffer = memoryview(bytearray(BUFFER_SIZE))
+    digest = _digest()
+    with open(path, "rb", buffering=0) as file:
+        while True:
+            count = file.readinto(buffer)
+            if not count:
+                break
+            digest.update(buffer[:count])
+    return digest.digest()
+
+
+def split_candidates(
+    groups: List[Candidates],
+    hash_file: Callable[[str, int], bytes],
+    executor: ThreadPoolExecutor,
+) -> List[Candidates]:
+    """
+    Split groups of candidates by the hash of their files, computed across the
+    pool of threads. Files that cannot be read are dropped.
+
+    Parameters:
+    - groups (List[Candidates]): The groups of candidates, of distinct sizes.
+    - hash_file (Callable[[str, int], bytes]): Hashes a file from its path and
+      size.
+    - executor (ThreadPoolExecutor): The pool of threads reading the files.
+
+    Returns:
+    - List[Candidates]: The groups of at least two files with the same hash.
+    """
+
+    def safe_hash(candidate: Tuple[int, str]) -> Optional[bytes]:
+        size, path = candidate
+        try:
+            return hash_file(path, size)
+        except OSError:
+            return None
+
+    candidates = [(size, path) for size, paths in groups for path in paths]
+    buckets: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+    for (size, path), digest in zip(candidates, executor.map(safe_hash, candidates)):
+        if digest is not None:
+            buckets[size, digest].append(path)
+    return [(size, paths) for (size, _), paths in buckets.items() if len(paths) > 1]
+
+
+class DuplicateFinder(AnalyserInterface):
+    """
+    Find the regular files with the same content.
+
+    Files are grouped by size as they are added. At report time, files of the
+    same size are split by a hash of their first and last PARTIAL_SIZE bytes,
+    then, when larger than that, by a hash of their full content, so that most
+    files are never read, or only partly. Files are read by a pool of threads.
+    Hard links to a single inode are kept once: they are not copies.
+    """
+
+    def __init__(self, threads: int = 8, min_size: int = 1) -> None:
+        """
+        Parameters:
+        - threads (int): Number of threads reading the files.
+        - min_size (int): Size under which files are ignored, empty files by
+          default.
+        """
+        self.threads = threads
+        self.min_size = min_size
+        # path of each inode, by size
+        self.files_by_size: Dict[int, Dict[Tuple[int, int], str]] = {}
+        self._groups: Optional[List[DuplicateGroup]] = None
+
+    def add(self, file_path: PathLike) -> None:
+        try:
+            record = FileRecord.from_path(file_path)
+        except (FileNotFoundError, OSError):
+            return
+        self.add_record(record)
+
+    def add_record(self, record: FileRecord) -> None:
+        if record.size < self.min_size or not stat.S_ISREG(record.mode):
+            return
+        files = self.files_by_size.setdefault(record.size, {})
+        files.setdefault((record.dev, record.inode), record.path)
+        self._groups = None
+
+    def remove_record(self, record: FileRecord) -> None:
+        files = self.files_by_size.get(record.size, {})
+        if files.get((record.dev, record.inode)) == record.path:
+            del files[record.dev, record.inode]
+            self._groups = None
+
+    def settings(self) -> tuple:
+        return (self.min_size,)
+
+    def merge(self, other: "DuplicateFinder") -> None:
+        for size, other_files in other.files_by_size.items():
+            files = self.files_by_size.setdefault(size, {})
+            for key, path in other_files.items():
+                files.setdefault(key, path)
+        self._groups = None
+
+    def duplicates(self) -> List[DuplicateGroup]:
+        """
+        Find the groups of duplicates, computed once until files are added or
+        removed.
+
+        Returns:
+        - List[DuplicateGroup]: The groups of files with the same content,
+          those reclaiming the most bytes first.
+        """
+        if self._groups is None:
+            self._groups = self._find()
+        return self._groups
+
+    def _find(self) -> List[DuplicateGroup]:
+        groups = [
+            (size, list(files.values()))
+            for size, files in self.files_by_size.items()
+            if len(files) > 1
+        ]
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            groups = split_candidates(groups, partial_hash, executor)
+            fully_read = [group for group in groups if group[0] <= 2 * PARTIAL_SIZE]
+            groups = fully_read + split_candidates(
+                [group for group in groups if group[0] > 2 * PARTIAL_SIZE],
+                full_hash,
+                executor,
+            )
+        return sorted(
+            (DuplicateGroup(size, sorted(paths)) for size, paths in groups),
+            key=lambda group: (-group.reclaimable, group.paths),
+        )
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Print the groups of duplicates and the bytes they would free.
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
+        """
+        writer = writer or TableWriter()
+        groups = self.duplicates()
+        bitmath.format_string = "{value:.2f} {unit}"
+        writer.write_table(
+            "Duplicate Files",
+            [
+                Column("Files", style="cyan", no_wrap=False),
+                Column("Copies", justify="right", style="magenta"),
+                Column("Size", justify="right", style="magenta"),
+                Column("Reclaimable", justify="right", style="bold magenta"),
+            ],
+            (
+                (
+                    group.paths,
+                    len(group.paths),
+                    Size(group.size),
+                    Size(group.reclaimable),
+                )
+                for group in groups
+            ),
+            empty_message="[green]No duplicate files found.[/green]",
+            name="duplicates",
+            box=box.HEAVY_EDGE,
+            show_lines=True,
+        )
+        if groups:
+            reclaimable = Size(sum(group.reclaimable for group in groups))
+            writer.write_message(
+                f"[bold]{reclaimable} reclaimable from {len(groups)} groups of "
+                "duplicates.[/bold]"
+            )
@@ -1,49 +1,293 @@
+import os
+import pickle
+import stat
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 
+import rich
 from rich.prompt import Confirm
 
-from analyzer.categorization import Categorization
-from analyzer.directory_traversal import walk_through_dir
+from analyzer.age import FileAge
+from analyzer.allocation import SpaceAllocation
+from analyzer.analyzer_interface import APPARENT, AnalyserInterface, FileRecord
+from analyzer.categorization import Categorization, CategoryResolver
+from analyzer.checkpoint import Checkpoint
+from analyzer.deletion import BulkDeleter
+from analyzer.directory_traversal import (
+    DEFAULT_OPTIONS,
+    TraversalOptions,
+    parallel_scan_tree,
+    scan_tree,
+    split_tree,
+)
+from analyzer.directory_usage import DirectoryUsage
+from analyzer.duplicates import DuplicateFinder
+from analyzer.histogram import SizeHistogram
 from analyzer.large_files import LargeFileIdentifier
 from analyzer.permissions import FilePermissionsChecker
+from analyzer.snapshot_index import SnapshotIndex
+from analyzer.sniffing import ContentSniffer
+from analyzer.stream import STDOUT, NdjsonStream
 from analyzer.summary import Summary
+from analyzer.utils.inodes import HardLinks, InodeSet
+from analyzer.utils.permission_policy import PermissionPolicy
+from analyzer.utils.report_writer import ReportWriter, make_writer
+from analyzer.watch import watch_directory
+
+SHARDS_PER_PROCESS = 4
 
 
 def process_files(
     dir_path: Path,
-    file_categorization: Categorization,
-    permissions_checker: FilePermissionsChecker,
-    large_file_identifier: LargeFileIdentifier,
-    file_statistics_collector: Summary,
+    *analyzers: AnalyserInterface,
+    jobs: int = 1,
+    processes: int = 1,
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    count_hardlinks: bool = False,
+    index: Optional[SnapshotIndex] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    resume: bool = False,
+) -> None:
+    """
+    Walk the directory tree and feed every file to the analyzers.
+
+    Each file is stat'ed once and the resulting record is shared by all the
+    analyzers. With more than one job the tree is walked by a pool of threads,
+    the analyzers themselves are always fed from the calling thread. With more
+    than one process the tree is split into subtrees that are scanned by a pool
+    of processes, each with its own copy of the analyzers, and the partial
+    results are merged back into the given analyzers.
+
+    Unless count_hardlinks is set, a file with several hard links is only
+    given to the analyzers for the first of its links.
+
+    With a snapshot index, the directories that did not change since the
+    previous scan are not walked again: their stored records are reused. The
+    index is walked from the calling thread, jobs and processes are ignored.
+
+    With a checkpoint, the walk and the analyzers are checkpointed periodically
+    and, if resume is set, the walk starts from the last checkpoint. The tree
+    is then walked from the calling thread, jobs, processes and the index are
+    ignored.
+    """
+    if checkpoint is not None:
+        links = None if count_hardlinks else HardLinks()
+        entries = checkpoint.scan_tree(dir_path, analyzers, links, options, resume)
+        feed_analyzers(entries, analyzers, links)
+        return
+    if index is not None:
+        links = None if count_hardlinks else HardLinks()
+        feed_records(index.scan_tree(dir_path), analyzers, links)
+        return
+    if processes > 1:
+        process_shards(dir_path, analyzers, jobs, processes, options, count_hardlinks)
+        return
+    links = None if count_hardlinks else HardLinks()
+    feed_analyzers(walk_entries(dir_path, jobs, options), analyzers, links)
+
+
+def walk_entries(
+    dir_path: Union[Path, str],
+    jobs: int,
+    options: TraversalOptions,
+    visited: Optional[InodeSet] = None,
+) -> Iterable[os.DirEntry]:
+    if jobs <= 1:
+        return scan_tree(dir_path, options, visited)
+    return parallel_scan_tree(dir_path, jobs, options, visited)
+
+
+def feed_analyzers(
+    entries: Iterable[os.DirEntry],
+    analyzers: Sequence[AnalyserInterface],
+    links: Optional[HardLinks] = None,
+) -> None:
+    feed_records(stat_entries(entries), analyzers, links)
+
+
+def stat_entries(entries: Iterable[os.DirEntry]) -> Iterator[FileRecord]:
+    for entry in entries:
+        try:
+            yield FileRecord.from_stat(entry.path, entry.stat())
+        except (FileNotFoundError, OSError):
+            continue
+
+
+def process_shards(
+    dir_path: Path,
+    analyzers: Sequence[AnalyserInterface],
+    jobs: int,
+    processes: int,
+    options: TraversalOptions,
+    count_hardlinks: bool,
+) -> None:
+    # Workers start from a snapshot of the analyzers taken before any file is
+    # added, so that merging their results back never counts a file twice.
+    blank_analyzers = pickle.dumps(list(analyzers))
+    links = None if count_hardlinks else HardLinks()
+    visited = InodeSet()
+    files, shards = split_tree(
+        dir_path, processes * SHARDS_PER_PROCESS, options, visited
+    )
+    feed_analyzers(files, analyzers, links)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                scan_shard,
+                shard,
+                blank_analyzers,
+                jobs,
+                options,
+                visited,
+                count_hardlinks,
+            )
+            for shard in shards
+        ]
+        for future in as_completed(futures):
+            partials, deferred = future.result()
+            for analyzer, partial in zip(analyzers, partials):
+                analyzer.merge(partial)
+            # Multiply-linked files are only counted here, against the links
+            # seen in the whole tree rather than in a single subtree.
+            feed_records(deferred, analyzers, links)
+
+
+def feed_records(
+    records: Iterable[FileRecord],
+    analyzers: Sequence[AnalyserInterface],
+    links: Optional[HardLinks] = None,
 ) -> None:
-    for file_path in walk_through_dir(dir_path):
-        file_categorization.add(file_path)
-        permissions_checker.add(file_path)
-        large_file_identifier.add(file_path)
-        file_statistics_collector.add(file_path)
+    for record in records:
+        if stat.S_ISDIR(record.mode):
+            feed_directory(record, analyzers)
+            continue
+        if links is not None and not links.first_link(record):
+            continue
+        for analyzer in analyzers:
+            analyzer.add_record(record)
+    for analyzer in analyzers:
+        analyzer.flush()
+
+
+def feed_directory(record: FileRecord, analyzers: Sequence[AnalyserInterface]) -> None:
+    for analyzer in analyzers:
+        analyzer.add_directory(record)
+
+
+def scan_shard(
+    shard: str,
+    blank_analyzers: bytes,
+    jobs: int,
+    options: TraversalOptions,
+    visited: InodeSet,
+    count_hardlinks: bool,
+) -> Tuple[List[AnalyserInterface], List[FileRecord]]:
+    """
+    Scan one subtree in a worker process.
+
+    Returns:
+        Tuple[List[AnalyserInterface], List[FileRecord]]: The partial analyzers,
+        and the records of the multiply-linked files that were left out of them.
+    """
+    analyzers: List[AnalyserInterface] = pickle.loads(blank_analyzers)
+    deferred_links = None if count_hardlinks else HardLinks(defer=True)
+    entries = walk_entries(shard, jobs, options, visited)
+    feed_analyzers(entries, analyzers, deferred_links)
+    return analyzers, [] if deferred_links is None else deferred_links.deferred
+
+
+def confirm_deletion(
+    question: str, deleter: Optional[BulkDeleter], log_file: Optional[str]
+) -> bool:
+    """
+    Ask whether the reported files are deleted. A dry run is never asked for,
+    nor is a real deletion when logging to a file, as the prompt is not seen.
+    """
+    if deleter is None:
+        return False
+    if deleter.dry_run:
+        return True
+    return not log_file and Confirm.ask(question)
 
 
 def handle_permissions(
-    delete_files: bool,
+    deleter: Optional[BulkDeleter],
     permissions_checker: FilePermissionsChecker,
     log_file: Optional[str],
+    writer: ReportWriter,
 ) -> None:
-    if delete_files and not permissions_checker.is_report_empty() and not log_file:
-        confirm = Confirm.ask("Do you want to delete the files with bad permissions?")
-        if confirm:
-            permissions_checker.delete_reported_files()
+    if permissions_checker.has_deletable_files() and confirm_deletion(
+        "Do you want to delete the files with bad permissions?", deleter, log_file
+    ):
+        writer.write_message(
+            permissions_checker.delete_reported_files(deleter).message()
+        )
 
 
 def handle_large_files(
-    delete_files: bool,
+    deleter: Optional[BulkDeleter],
     large_file_identifier: LargeFileIdentifier,
     log_file: Optional[str],
+    writer: ReportWriter,
 ) -> None:
-    if delete_files and large_file_identifier.large_files and not log_file:
-        confirm = Confirm.ask("Do you want to delete the large files?")
-        if confirm:
-            large_file_identifier.delete_reported_files()
+    if not large_file_identifier.is_report_empty() and confirm_deletion(
+        "Do you want to delete the large files?", deleter, log_file
+    ):
+        writer.write_message(
+            large_file_identifier.delete_reported_files(deleter).message()
+        )
+
+
+def optional_analyzers(
+    dir_path: Path,
+    histogram_thresholds: Optional[Sequence[str]],
+    duplicates: bool,
+    depths: Sequence[int] = (),
+    top_directories: int = 10,
+    allocation: bool = False,
+    size_basis: str = APPARENT,
+    ages: bool = False,
+    resolver: Optional[CategoryResolver] = None,
+) -> List[AnalyserInterface]:
+    """
+    Create the analyzers only reported on request.
+
+    Args:
+        dir_path (Path): The target directory.
+        histogram_thresholds (Optional[Sequence[str]]): The thresholds of the
+            size histogram, None for no histogram.
+        duplicates (bool): Whether the duplicate files are reported.
+        depths (Sequence[int]): Depths of the heaviest directories reported,
+            the disk usage is not reported if empty.
+        top_directories (int): Number of heaviest directories reported at each
+            depth.
+        allocation (bool): Whether the sparse files and slack space are
+            reported.
+        size_basis (str): The size the thresholds are applied to.
+        ages (bool): Whether the ages of the files are reported.
+        resolver (Optional[CategoryResolver]): The resolver of the category of
+            the files shared with the categorization, so that every report
+            puts a file in the same category.
+
+    Returns:
+        List[AnalyserInterface]: The analyzers, in the order they are reported.
+    """
+    analyzers: List[AnalyserInterface] = []
+    if depths:
+        analyzers.append(DirectoryUsage(dir_path, depths, top_directories, size_basis))
+    if histogram_thresholds is not None:
+        analyzers.append(SizeHistogram(histogram_thresholds, size_basis, resolver))
+    if allocation:
+        analyzers.append(SpaceAllocation(resolver=resolver))
+    if ages:
+        analyzers.append(FileAge(dir_path, resolver=resolver))
+    if duplicates:
+        analyzers.append(DuplicateFinder())
+    return analyzers
 
 
 def process_directory(
@@ -51,23 +295,214 @@ def process_directory(
     size_threshold: Optional[str],
     delete_files: bool,
     log_file: Optional[str],
+    jobs: int = 1,
+    processes: int = 1,
+    follow_symlinks: bool = False,
+    count_hardlinks: bool = False,
+    one_file_system: bool = False,
+    exclude: Sequence[str] = (),
+    index_path: Optional[str] = None,
+    watch_interval: Optional[float] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_interval: float = 60.0,
+    resume: bool = False,
+    stream_format: Optional[str] = None,
+    stream_output: str = STDOUT,
+    stream_gzip: bool = False,
+    sniff: bool = False,
+    sniff_cache: Optional[str] = None,
+    aggregate_only: bool = False,
+    top_per_category: int = 0,
+    top: Optional[int] = None,
+    histogram: bool = False,
+    histogram_thresholds: Sequence[str] = (),
+    permission_rules: Optional[Mapping[str, str]] = None,
+    output_format: Optional[str] = None,
+    max_rows: Optional[int] = None,
+    dry_run: bool = False,
+    deletion_log: Optional[str] = None,
+    duplicates: bool = False,
+    depths: Sequence[int] = (),
+    top_directories: int = 10,
+    allocation: bool = False,
+    size_basis: str = APPARENT,
+    ages: bool = False,
 ) -> None:
-    file_categorization = Categorization()
-    permissions_checker = FilePermissionsChecker()
-    large_file_identifier = LargeFileIdentifier(size_threshold)
-    file_statistics_collector = Summary()
+    options = TraversalOptions(
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+        exclude=tuple(exclude),
+        directories=True,
+    )
+    policy = PermissionPolicy.from_config(permission_rules or {})
+    writer = make_writer(output_format, max_rows, log_file)
+    sniffer = ContentSniffer(cache_path=sniff_cache) if sniff or sniff_cache else None
+    if stream_format is not None:
+        stream_directory(
+            dir_path,
+            NdjsonStream(
+                stream_output,
+                size_threshold,
+                stream_gzip,
+                policy,
+                size_basis,
+                CategoryResolver(sniffer),
+            ),
+            jobs=jobs,
+            options=options,
+            count_hardlinks=count_hardlinks,
+            index_path=index_path,
+            watch_interval=watch_interval,
+            writer=writer,
+        )
+        return
 
-    process_files(
-        dir_path,
+    # files are only looked up again when the watch mode removes them
+    file_categorization = Categorization(
+        sniffer,
+        keep_files=watch_interval is not None and not aggregate_only,
+        top_k=top_per_category,
+    )
+    permissions_checker = FilePermissionsChecker(policy)
+    large_file_identifier = LargeFileIdentifier(
+        size_threshold, top=top, size_basis=size_basis
+    )
+    file_statistics_collector = Summary()
+    analyzers: List[AnalyserInterface] = [
         file_categorization,
         permissions_checker,
         large_file_identifier,
         file_statistics_collector,
+    ]
+    # analyzers reported between the large files and the statistics
+    extra_analyzers = optional_analyzers(
+        dir_path,
+        (histogram_thresholds or [size_threshold or "1 MiB"]) if histogram else None,
+        duplicates,
+        depths,
+        top_directories,
+        allocation,
+        size_basis,
+        ages,
+        file_categorization.resolver,
     )
+    analyzers.extend(extra_analyzers)
 
-    file_categorization.report()
-    permissions_checker.report()
-    handle_permissions(delete_files, permissions_checker, log_file)
-    large_file_identifier.report()
-    handle_large_files(delete_files, large_file_identifier, log_file)
-    file_statistics_collector.report()
+    with ExitStack() as stack:
+        if sniffer is not None:
+            stack.callback(sniffer.close)
+        if watch_interval is not None:
+            watch_directory(
+                dir_path, analyzers, watch_interval, options, writer, count_hardlinks
+            )
+            return
+        completed = scan_directory(
+            dir_path,
+            analyzers,
+            index_path=index_path,
+            jobs=jobs,
+            processes=processes,
+            options=options,
+            count_hardlinks=count_hardlinks,
+            checkpoint=(
+                Checkpoint(checkpoint_path, checkpoint_interval)
+                if checkpoint_path
+                else None
+            ),
+            resume=resume,
+        )
+    deleter = (
+        BulkDeleter(jobs, dry_run, deletion_log)
+        if (delete_files or dry_run) and completed
+        else None
+    )
+
+    file_categorization.report(writer)
+    permissions_checker.report(writer)
+    handle_permissions(deleter, permissions_checker, log_file, writer)
+    large_file_identifier.report(writer)
+    handle_large_files(deleter, large_file_identifier, log_file, writer)
+    for analyzer in extra_analyzers:
+        analyzer.report(writer)
+    file_statistics_collector.report(writer)
+
+
+def scan_directory(
+    dir_path: Path,
+    analyzers: Sequence[AnalyserInterface],
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    index_path: Optional[str] = None,
+    **kwargs,
+) -> bool:
+    """
+    Feed the analyzers with the files of the directory tree, through the
+    snapshot index if one is given, see process_files for the other arguments.
+
+    Returns:
+        bool: False if the scan was interrupted, in which case the analyzers
+        only hold part of the files.
+    """
+    try:
+        with ExitStack() as stack:
+            index = (
+                stack.enter_context(SnapshotIndex(index_path, options))
+                if index_path
+                else None
+            )
+            process_files(dir_path, *analyzers, options=options, index=index, **kwargs)
+    except KeyboardInterrupt:
+        report_interruption()
+        return False
+    return True
+
+
+def stream_directory(
+    dir_path: Path,
+    stream: NdjsonStream,
+    jobs: int = 1,
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    count_hardlinks: bool = False,
+    index_path: Optional[str] = None,
+    watch_interval: Optional[float] = None,
+    writer: Optional[ReportWriter] = None,
+) -> None:
+    """
+    Stream a line per file instead of building the reports, so that memory use
+    does not grow with the number of files. Only the statistics are reported,
+    unless the lines are written to the standard output.
+
+    The tree is walked from the calling process: the stream cannot be shared
+    with worker processes, nor saved in a checkpoint.
+    """
+    analyzers: List[AnalyserInterface] = [stream]
+    if stream.output != STDOUT:
+        analyzers.append(Summary())
+
+    with ExitStack() as stack:
+        # closed last: the stream waits for the sniffed categories when closed
+        if stream.resolver.sniffer is not None:
+            stack.callback(stream.resolver.sniffer.close)
+        stack.callback(stream.close)
+        if watch_interval is not None:
+            watch_directory(
+                dir_path, analyzers, watch_interval, options, writer, count_hardlinks
+            )
+            return
+        scan_directory(
+            dir_path,
+            analyzers,
+            index_path=index_path,
+            jobs=jobs,
+            options=options,
+            count_hardlinks=count_hardlinks,
+        )
+        for analyzer in analyzers:
+            analyzer.report(writer)
+
+
+def report_interruption() -> None:
+    rich.print(
+        "[yellow]Scan interrupted, the reports below are partial and no "
+        "file will be deleted.[/yellow]",
+        file=sys.stderr,
+    )
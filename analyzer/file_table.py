@@ -0,0 +1,159 @@
+import os
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from analyzer.analyzer_interface import FileRecord
+
+# category id of the rows that were removed, until the table is compacted
+REMOVED = 0xFFFF
+
+
+class StringTable:
+    """
+    Interned strings, each stored once and referred to by its index.
+    """
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, string: str) -> int:
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = self._ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def id_of(self, string: str) -> Optional[int]:
+        return self._ids.get(string)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class FileRow(NamedTuple):
+    path: str
+    size: int
+    mode: int
+    mtime: float
+    category: str
+    extension: str
+
+
+class FileTable:
+    """
+    Columnar store of files.
+
+    Every column is an array of machine values: a row costs a few tens of
+    bytes instead of one Python object per field. Directories, categories and
+    extensions are interned, and file names are packed in a single buffer.
+
+    Removed rows are only marked as such, the table is compacted once they
+    make up half of it. Rows are indexed by directory and name, so that a
+    file is found in O(1).
+    """
+
+    def __init__(self) -> None:
+        self.directories = StringTable()
+        self.categories = StringTable()
+        self.extensions = StringTable()
+        self.directory = array("I")
+        self.size = array("q")
+        self.mode = array("I")
+        self.mtime = array("d")
+        self.category = array("H")
+        self.extension = array("I")
+        self._names = bytearray()
+        self._name_offsets = array("Q", [0])
+        self._removed = 0
+        # last row of each (directory id, file name)
+        self._rows: Dict[Tuple[int, str], int] = {}
+
+    def append(self, record: FileRecord, category: str, extension: str) -> None:
+        """
+        Add a file to the table.
+
+        Parameters:
+        - record (FileRecord): The stat record of the file.
+        - category (str): The category of the file.
+        - extension (str): The extension of the file.
+        """
+        directory, name = os.path.split(record.path)
+        directory_id = self.directories.intern(directory)
+        self._rows[directory_id, name] = len(self.directory)
+        self.directory.append(directory_id)
+        self._names += os.fsencode(name)
+        self._name_offsets.append(len(self._names))
+        self.size.append(record.size)
+        self.mode.append(record.mode)
+        self.mtime.append(record.mtime)
+        self.category.append(self.categories.intern(category))
+        self.extension.append(self.extensions.intern(extension))
+
+    def extend(self, other: "FileTable") -> None:
+        """
+        Add all the files of another table to this one.
+        """
+        for row in other:
+            self.append(
+                FileRecord(row.path, row.size, row.mode, 0, row.mtime),
+                row.category,
+                row.extension,
+            )
+
+    def path(self, index: int) -> str:
+        directory = self.directories[self.directory[index]]
+        return os.path.join(directory, os.fsdecode(self._name(index)))
+
+    def find(self, path: str) -> Optional[int]:
+        """
+        Find the last row of a file.
+
+        Returns:
+        - Optional[int]: The index of the row, or None if the file is unknown.
+        """
+        directory, name = os.path.split(path)
+        directory_id = self.directories.id_of(directory)
+        if directory_id is None:
+            return None
+        return self._rows.get((directory_id, name))
+
+    def _name(self, index: int) -> bytes:
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        return bytes(self._names[start:end])
+
+    def remove(self, index: int) -> None:
+        """
+        Remove a row from the table.
+        """
+        key = (self.directory[index], os.fsdecode(self._name(index)))
+        if self._rows.get(key) == index:
+            del self._rows[key]
+        self.category[index] = REMOVED
+        self._removed += 1
+        if self._removed * 2 > len(self.directory):
+            self._compact()
+
+    def _compact(self) -> None:
+        compacted = FileTable()
+        compacted.extend(self)
+        self.__dict__.update(compacted.__dict__)
+
+    def __len__(self) -> int:
+        return len(self.directory) - self._removed
+
+    def __iter__(self) -> Iterator[FileRow]:
+        for index, category_id in enumerate(self.category):
+            if category_id == REMOVED:
+                continue
+            yield FileRow(
+                self.path(index),
+                self.size[index],
+                self.mode[index],
+                self.mtime[index],
+                self.categories[category_id],
+                self.extensions[self.extension[index]],
+            )
@@ -0,0 +1,228 @@
+from array import array
+from bisect import bisect_right
+from typing import Dict, Optional, Sequence, Tuple
+
+import bitmath
+from rich import box
+from rich.table import Column
+
+from analyzer.analyzer_interface import APPARENT, FileRecord
+from analyzer.categorization import CategorizedAnalyzer, CategoryResolver
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter
+
+# bucket 0 holds the empty files, bucket i the sizes in [2 ** (i - 1), 2 ** i)
+BUCKETS = 65
+
+
+def bucket_of(size: int) -> int:
+    return size.bit_length()
+
+
+def bucket_label(bucket: int) -> str:
+    if bucket == 0:
+        return "0 B"
+    low = bitmath.Byte(2 ** (bucket - 1)).best_prefix(bitmath.NIST)
+    high = bitmath.Byte(2**bucket).best_prefix(bitmath.NIST)
+    return f"{low} - {high}"
+
+
+class Buckets:
+    """
+    Number of files and bytes per power-of-two size bucket.
+    """
+
+    def __init__(self) -> None:
+        self.counts = array("Q", [0]) * BUCKETS
+        self.sizes = array("Q", [0]) * BUCKETS
+
+    def add(self, size: int) -> None:
+        bucket = bucket_of(size)
+        self.counts[bucket] += 1
+        self.sizes[bucket] += size
+
+    def remove(self, size: int) -> None:
+        bucket = bucket_of(size)
+        self.counts[bucket] -= 1
+        self.sizes[bucket] -= size
+
+    def merge(self, other: "Buckets") -> None:
+        for bucket in range(BUCKETS):
+            self.counts[bucket] += other.counts[bucket]
+            self.sizes[bucket] += other.sizes[bucket]
+
+
+class SizeHistogram(CategorizedAnalyzer):
+    """
+    Distribution of the file sizes, overall and per category, in power-of-two
+    buckets, with the number of files and bytes above each threshold.
+
+    Every update is O(1) (O(log thresholds) for the thresholds) and memory
+    does not depend on the number of files.
+    """
+
+    def __init__(
+        self,
+        thresholds: Sequence[str] = (),
+        size_basis: str = APPARENT,
+        resolver: Optional[CategoryResolver] = None,
+    ) -> None:
+        """
+        Parameters:
+        - thresholds (Sequence[str]): Size thresholds, in a human-readable string
+          format (e.g., "100MB", "2 GiB").
+        - size_basis (str): The size of the files bucketed and compared to the
+          thresholds, the apparent or the allocated size (see SIZE_BASES).
+        - resolver (Optional[CategoryResolver]): The resolver of the category
+          of the files, from their extension only if None.
+        """
+        super().__init__(resolver)
+        self.thresholds = sorted(
+            int(bitmath.parse_string(threshold).to_Byte().value)
+            for threshold in thresholds
+        )
+        self.size_basis = size_basis
+        self.buckets = Buckets()
+        self.category_buckets: Dict[str, Buckets] = {}
+        # files whose size is in [thresholds[i - 1], thresholds[i]), summed
+        # from the end at report time
+        self._threshold_counts = array("Q", [0]) * (len(self.thresholds) + 1)
+        self._threshold_sizes = array("Q", [0]) * (len(self.thresholds) + 1)
+
+    def _update(self, record: FileRecord, category: str, count: int) -> None:
+        size = record.size_by(self.size_basis)
+        category_buckets = self.category_buckets.get(category)
+        if category_buckets is None:
+            category_buckets = self.category_buckets[category] = Buckets()
+        if count > 0:
+            self.buckets.add(size)
+            category_buckets.add(size)
+        else:
+            self.buckets.remove(size)
+            category_buckets.remove(size)
+        interval = bisect_right(self.thresholds, size)
+        self._threshold_counts[interval] += count
+        self._threshold_sizes[interval] += count * size
+
+    def settings(self) -> tuple:
+        return (*super().settings(), tuple(self.thresholds), self.size_basis)
+
+    def merge(self, other: "SizeHistogram") -> None:
+        self.flush()
+        self.buckets.merge(other.buckets)
+        for category, other_buckets in other.category_buckets.items():
+            self.category_buckets.setdefault(category, Buckets()).merge(other_buckets)
+        for interval, count in enumerate(other._threshold_counts):
+            self._threshold_counts[interval] += count
+            self._threshold_sizes[interval] += other._threshold_sizes[interval]
+
+    def above(self, threshold_index: int) -> Tuple[int, int]:
+        """
+        Get the number of files and bytes at or above a threshold.
+
+        Parameters:
+        - threshold_index (int): Index of the threshold, in ascending order.
+
+        Returns:
+        - Tuple[int, int]: The number of files and their total size.
+        """
+        start = threshold_index + 1
+        return sum(self._threshold_counts[start:]), sum(self._threshold_sizes[start:])
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Print the histogram and the files above each threshold.
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
+        """
+        self.flush()
+        writer = writer or TableWriter()
+        if not any(self.buckets.counts):
+            writer.write_message(
+                "[green]No files to build a size histogram from.[/green]"
+            )
+            return
+        bitmath.format_string = "{value:.2f} {unit}"
+        self._report_buckets(writer)
+        self._report_category_sizes(writer)
+        if self.thresholds:
+            self._report_thresholds(writer)
+
+    def _report_buckets(self, writer: ReportWriter) -> None:
+        categories = sorted(self.category_buckets)
+        total = max(1, sum(self.buckets.counts))
+        writer.write_table(
+            "File Size Histogram",
+            [
+                Column("Size", style="bold cyan"),
+                Column("Files", justify="right", style="magenta"),
+                Column("Share", justify="right", style="magenta"),
+                Column("Bytes", justify="right", style="magenta"),
+                *(Column(category, justify="right") for category in categories),
+            ],
+            (
+                (
+                    bucket_label(bucket),
+                    self.buckets.counts[bucket],
+                    f"{100 * self.buckets.counts[bucket] / total:.1f}%",
+                    Size(self.buckets.sizes[bucket]),
+                    *(
+                        self.category_buckets[category].counts[bucket]
+                        for category in categories
+                    ),
+                )
+                for bucket in range(BUCKETS)
+                if self.buckets.counts[bucket]
+            ),
+            name="histogram",
+            box=box.HEAVY_EDGE,
+        )
+
+    def _report_category_sizes(self, writer: ReportWriter) -> None:
+        categories = sorted(self.category_buckets)
+        writer.write_table(
+            "Bytes per Size and Category",
+            [
+                Column("Size", style="bold cyan"),
+                Column("Bytes", justify="right", style="magenta"),
+                *(Column(category, justify="right") for category in categories),
+            ],
+            (
+                (
+                    bucket_label(bucket),
+                    Size(self.buckets.sizes[bucket]),
+                    *(
+                        Size(self.category_buckets[category].sizes[bucket])
+                        for category in categories
+                    ),
+                )
+                for bucket in range(BUCKETS)
+                if self.buckets.counts[bucket]
+            ),
+            name="histogram_bytes",
+            box=box.HEAVY_EDGE,
+        )
+
+    def _report_thresholds(self, writer: ReportWriter) -> None:
+        writer.write_table(
+            "Files Above Size Thresholds",
+            [
+                Column("Threshold", style="bold cyan"),
+                Column("Files", justify="right", style="magenta"),
+                Column("Bytes", justify="right", style="magenta"),
+            ],
+            (
+                (
+                    str(bitmath.Byte(threshold).best_prefix(bitmath.NIST)),
+                    *self._above_row(index),
+                )
+                for index, threshold in enumerate(self.thresholds)
+            ),
+            name="thresholds",
+            box=box.HEAVY_EDGE,
+        )
+
+    def _above_row(self, threshold_index: int) -> Tuple[int, Size]:
+        count, size = self.above(threshold_index)
+        return count, Size(size)
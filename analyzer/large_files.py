@@ -1,14 +1,21 @@
-from bisect import insort_left
+import heapq
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import bitmath
 from rich import box, print
 from rich.prompt import Prompt
-from rich.table import Table
+from rich.table import Column
 
-from analyzer.analyzer_interface import AnalyserInterface
+from analyzer.analyzer_interface import (
+    ALLOCATED,
+    APPARENT,
+    AnalyserInterface,
+    FileRecord,
+)
+from analyzer.deletion import BulkDeleter, DeletionSummary
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter
 
 PathLike = Union[Path, str]
 
@@ -16,25 +23,61 @@ PathLike = Union[Path, str]
 @dataclass
 class FileEntry:
     file_path: PathLike
-    size: bitmath.Byte
+    size: int
 
 
 class LargeFileIdentifier(AnalyserInterface):
     DEFAULT_THRESHOLD = bitmath.MiB(1)
 
-    def __init__(self, size_threshold: Optional[str] = None):
+    def __init__(
+        self,
+        size_threshold: Optional[str] = None,
+        top: Optional[int] = None,
+        size_basis: str = APPARENT,
+    ):
         """
         Initialize the LargeFileIdentifier.
 
         Parameters: - size_threshold (Optional[str]): Threshold for identifying large
         files, in a human-readable string format (e.g., "100MB", "2 GiB").
+        - top (Optional[int]): Only keep the top largest files, all the files above
+        the threshold are kept by default.
+        - size_basis (str): The size compared to the threshold, the apparent or the
+        allocated size (see SIZE_BASES).
         """
         self.size_threshold = (
             bitmath.parse_string(size_threshold)
             if size_threshold
             else self.DEFAULT_THRESHOLD
         )
-        self.large_files: List[FileEntry] = []
+        # parsed once, files are compared as raw byte counts
+        self.threshold_bytes = int(self.size_threshold.to_Byte().value)
+        self.top = top
+        self.size_basis = size_basis
+        # size of the large files per path
+        self._sizes: Dict[str, int] = {}
+        # (size, path) min-heap of the large files when top is set, the
+        # entries of removed files are only dropped when reaching its top
+        self._heap: List[Tuple[int, str]] = []
+
+    @property
+    def large_files(self) -> List[FileEntry]:
+        """
+        The large files, sorted by size.
+        """
+        return [FileEntry(file_path=path, size=size) for size, path in self._sorted()]
+
+    def _sorted(self) -> List[Tuple[int, str]]:
+        return sorted((size, path) for path, size in self._sizes.items())
+
+    def is_report_empty(self) -> bool:
+        """
+        Check if no large file was found, without sorting them.
+
+        Returns:
+        - bool: True if the report is empty, False otherwise.
+        """
+        return not self._sizes
 
     def _parse_size_threshold(self, size_threshold: Optional[str] = None):
         """
@@ -61,47 +104,111 @@ class LargeFileIdentifier(AnalyserInterface):
             - file_path (Path): Path to the file.
         """
         try:
-            size_in_bytes = Path(file_path).stat().st_size
-            size = bitmath.Byte(size_in_bytes).best_prefix(bitmath.SI)
-            if size >= self.size_threshold:
-                file_entry = FileEntry(file_path=file_path, size=size)
-                insort_left(self.large_files, file_entry, key=lambda x: x.size)
+            record = FileRecord.from_path(file_path)
         except (FileNotFoundError, OSError):
-            pass
+            return
+        self.add_record(record)
 
-    def report(self) -> None:
+    def add_record(self, record: FileRecord) -> None:
         """
-        Scan for large files and print a report.
+        Add a file to the list of large files from its stat record.
 
         Parameters:
-        - size_unit (str): Target unit for file sizes (default is "bytes").
+            - record (FileRecord): The stat record of the file.
         """
-        if not self.large_files:
-            print("[green]No large files found.[/green]")
+        size = record.size_by(self.size_basis)
+        if size >= self.threshold_bytes:
+            self._push((size, record.path))
+
+    def _push(self, entry: Tuple[int, str]) -> None:
+        size, path = entry
+        if self.top is None:
+            self._sizes[path] = size
             return
+        # a file added again is only kept if still among the largest
+        self._sizes.pop(path, None)
+        self._drop_removed()
+        if len(self._sizes) >= self.top:
+            if entry <= self._heap[0]:
+                return
+            del self._sizes[heapq.heappop(self._heap)[1]]
+        self._sizes[path] = size
+        heapq.heappush(self._heap, entry)
+
+    def _drop_removed(self) -> None:
+        """
+        Drop the entries of removed files from the top of the heap, or rebuild
+        it once they are the majority.
+        """
+        if len(self._heap) > 2 * len(self._sizes) + 1:
+            self._heap = [(size, path) for path, size in self._sizes.items()]
+            heapq.heapify(self._heap)
+        while self._heap and self._sizes.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
 
-        table = Table(title="Large Files", box=box.HEAVY_EDGE)
-        table.add_column("File Path", style="cyan", no_wrap=False)
-        table.add_column("Size", style="magenta")
-        bitmath.format_string = "{value:.2f} {unit}"
+    def remove_record(self, record: FileRecord) -> None:
+        """
+        Remove a file from the list of large files.
 
-        for entry in self.large_files:
-            table.add_row(str(entry.file_path), f"[magenta]{entry.size}[/magenta]")
+        Parameters:
+            - record (FileRecord): The stat record the file was added with.
+        """
+        self._sizes.pop(record.path, None)
+
+    def settings(self) -> tuple:
+        return (self.threshold_bytes, self.top, self.size_basis)
+
+    def merge(self, other: "LargeFileIdentifier") -> None:
+        """
+        Merge the large files found by another LargeFileIdentifier.
 
-        print(table)
+        Parameters:
+            - other (LargeFileIdentifier): The partial results to merge.
+        """
+        for path, size in other._sizes.items():
+            self._push((size, path))
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Print the report of the large files.
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
+        """
+        title = "Large Files" if self.top is None else f"Large Files (top {self.top})"
+        bitmath.format_string = "{value:.2f} {unit}"
+        (writer or TableWriter()).write_table(
+            title,
+            [
+                Column("File Path", style="cyan", no_wrap=False),
+                Column(
+                    "Allocated Size" if self.size_basis == ALLOCATED else "Size",
+                    style="magenta",
+                ),
+            ],
+            ((path, Size(size)) for size, path in self._sorted()),
+            empty_message="[green]No large files found.[/green]",
+            name="large_files",
+            box=box.HEAVY_EDGE,
+        )
 
-    def delete_reported_files(self) -> None:
+    def delete_reported_files(
+        self, deleter: Optional[BulkDeleter] = None
+    ) -> DeletionSummary:
         """
         Delete the files reported as large.
 
-        Prints success or error messages for each deletion.
+        Parameters:
+        - deleter (Optional[BulkDeleter]): The deletion engine, deleting from a
+          single thread if None.
+
+        Returns:
+        - DeletionSummary: The number of files deleted and the bytes freed.
         """
-        for entry in self.large_files:
-            try:
-                Path(entry.file_path).unlink()
-                print(f"[green]Deleted:[/green] [cyan]{entry.file_path}[/cyan]")
-            except Exception as e:
-                print(f"[red]Error deleting file {entry.file_path}:[/red] {e}")
+        return (deleter or BulkDeleter()).delete(
+            entry.file_path for entry in self.large_files
+        )
 
     def delete_one_file_at_a_time(self) -> None:
         """
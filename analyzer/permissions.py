@@ -1,17 +1,16 @@
-import os
+import stat
 from pathlib import Path
-from typing import List, Set, Union
+from typing import Dict, List, NamedTuple, Optional, Set, Union
 
-import rich
 from pydantic import BaseModel
-from rich.table import Table
+from rich.table import Column
 
-from analyzer.analyzer_interface import AnalyserInterface, PathLike
-from analyzer.utils.permissions import (
-    PermissionType,
-    generate_full_write_combination,
-    get_file_permissions,
-)
+from analyzer.analyzer_interface import AnalyserInterface, FileRecord, PathLike
+from analyzer.deletion import BulkDeleter, DeletionSummary
+from analyzer.utils.owners import owner_label
+from analyzer.utils.permission_policy import PermissionPolicy, PermissionRule
+from analyzer.utils.permissions import PermissionType
+from analyzer.utils.report_writer import ReportWriter, TableWriter
 
 
 class FilePermission(BaseModel):
@@ -19,46 +18,74 @@ class FilePermission(BaseModel):
     permissions: PermissionType
 
 
+class PermissionRow(NamedTuple):
+    path: str
+    mode: int
+    rule: str
+    uid: int
+    gid: int
+
+
 class FilePermissionsChecker(AnalyserInterface):
     COLOR_HEADER = "bold magenta"
     COLOR_FILE = "blue"
     COLOR_PERMISSION = "green"
+    COLOR_RULE = "yellow"
+    COLOR_OWNER = "cyan"
 
-    def __init__(self) -> None:
+    def __init__(self, policy: Optional[PermissionPolicy] = None) -> None:
         """
         Initialize the FilePermissionsChecker.
+
+        Parameters:
+        - policy (Optional[PermissionPolicy]): The rules files are reported by,
+          the default rules if None.
         """
-        self.bad_permissions: Set[PermissionType] = generate_full_write_combination()
-        _other_bad_permissions: List[PermissionType] = [
-            PermissionType(permission="---------"),  # No permissions
-            PermissionType(permission="rwxrwxrwx"),  # Full permissions
-            PermissionType(permission="--x--x--x"),  # Execute only
-            PermissionType(permission="r-xr-xr-x"),  # Read and execute
+        self.policy = policy or PermissionPolicy()
+        # reported directories are never deleted
+        self.directories: Set[str] = set()
+        # raw values by path, only formatted for the rows that are written
+        self._rows: Dict[str, PermissionRow] = {}
+
+    @property
+    def rows(self) -> List[PermissionRow]:
+        """
+        The reported files, in the order they were found.
+        """
+        return list(self._rows.values())
+
+    def _columns(self) -> List[Column]:
+        return [
+            Column(
+                header="File",
+                style=self.COLOR_FILE,
+                justify="left",
+                vertical="middle",
+                overflow="fold",
+                no_wrap=False,
+            ),
+            Column(
+                header="Permissions",
+                style=self.COLOR_PERMISSION,
+                justify="center",
+                vertical="middle",
+                no_wrap=False,
+            ),
+            Column(
+                header="Rule",
+                style=self.COLOR_RULE,
+                justify="left",
+                vertical="middle",
+                no_wrap=False,
+            ),
+            Column(
+                header="Owner",
+                style=self.COLOR_OWNER,
+                justify="left",
+                vertical="middle",
+                no_wrap=False,
+            ),
         ]
-        for permission in _other_bad_permissions:
-            self.bad_permissions.add(permission)
-
-        self._table = Table(
-            title="Permission Report",
-            show_header=True,
-            header_style=self.COLOR_HEADER,
-            show_edge=True,
-        )
-        self._table.add_column(
-            header="File",
-            style=self.COLOR_FILE,
-            justify="left",
-            vertical="middle",
-            overflow="fold",
-            no_wrap=False,
-        )
-        self._table.add_column(
-            header="Permissions",
-            style=self.COLOR_PERMISSION,
-            justify="center",
-            vertical="middle",
-            no_wrap=False,
-        )
 
     def add(self, filepath: PathLike) -> None:
         """
@@ -69,21 +96,88 @@ class FilePermissionsChecker(AnalyserInterface):
         - file_path (Path): Path to the file.
         """
         try:
-            file_permission: PermissionType = get_file_permissions(filepath)
-            if file_permission not in self.bad_permissions:
-                return
-            self._table.add_row(str(filepath), file_permission.permission)
+            record = FileRecord.from_path(filepath)
         except (FileNotFoundError, OSError):
-            pass
+            return
+        self.add_record(record)
+
+    def add_record(self, record: FileRecord) -> None:
+        """
+        Check the permissions of a file from its stat record.
+
+        Parameters:
+        - record (FileRecord): The stat record of the file.
+        """
+        rule = self.policy.match(record)
+        if rule is not None:
+            self._append(record, rule)
 
-    def report(self) -> None:
+    def add_directory(self, record: FileRecord) -> None:
         """
-        Print the report of files with bad permissions using the rich library.
+        Check the permissions of a directory from its stat record.
+
+        Parameters:
+        - record (FileRecord): The stat record of the directory.
         """
-        if self._table.rows:
-            rich.print(self._table)
+        rule = self.policy.match(record)
+        if rule is None:
             return
-        rich.print("No files with bad permissions found.")
+        self.directories.add(record.path)
+        self._append(record, rule)
+
+    def _append(self, record: FileRecord, rule: PermissionRule) -> None:
+        self._rows[record.path] = PermissionRow(
+            record.path, record.mode, rule.name, record.uid, record.gid
+        )
+
+    def remove_record(self, record: FileRecord) -> None:
+        """
+        Remove a file from the reported files.
+
+        Parameters:
+        - record (FileRecord): The stat record the file was added with.
+        """
+        self._rows.pop(record.path, None)
+
+    def settings(self) -> tuple:
+        return (self.policy.rules,)
+
+    def merge(self, other: "FilePermissionsChecker") -> None:
+        """
+        Merge the files reported by another FilePermissionsChecker.
+
+        Parameters:
+        - other (FilePermissionsChecker): The partial results to merge.
+        """
+        self._rows.update(other._rows)
+        self.directories.update(other.directories)
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Print the report of files with bad permissions.
+
+        Parameters:
+        - writer (Optional[ReportWriter]): The writer of the report, rich
+          tables if None.
+        """
+        (writer or TableWriter()).write_table(
+            "Permission Report",
+            self._columns(),
+            (
+                (
+                    row.path,
+                    stat.filemode(row.mode)[1:],
+                    row.rule,
+                    owner_label(row.uid, row.gid),
+                )
+                for row in self._rows.values()
+            ),
+            empty_message="No files with bad permissions found.",
+            name="permissions",
+            show_header=True,
+            header_style=self.COLOR_HEADER,
+            show_edge=True,
+        )
 
     def is_report_empty(self) -> bool:
         """
@@ -92,23 +186,33 @@ class FilePermissionsChecker(AnalyserInterface):
         Returns:
         - bool: True if the report is empty, False otherwise.
         """
-        return not self._table.rows
+        return not self._rows
 
-    def delete_reported_files(self) -> None:
+    def has_deletable_files(self) -> bool:
         """
-        Delete the files reported as having bad permissions.
+        Check if files other than directories are reported, i.e. if
+        delete_reported_files has anything to delete.
 
-        Prints success or error messages for each deletion.
+        Returns:
+        - bool: True if some reported files are not directories, False
+          otherwise.
         """
-        for file_path in self._table.columns[0]._cells:
-            self._delete_file(file_path)
+        return any(path not in self.directories for path in self._rows)
 
-    def _delete_file(self, file_path: Union[Path, str]) -> None:
+    def delete_reported_files(
+        self, deleter: Optional[BulkDeleter] = None
+    ) -> DeletionSummary:
         """
-        Delete a file.
+        Delete the files reported as having bad permissions, but the
+        directories.
+
+        Parameters:
+        - deleter (Optional[BulkDeleter]): The deletion engine, deleting from a
+          single thread if None.
+
+        Returns:
+        - DeletionSummary: The number of files deleted and the bytes freed.
         """
-        try:
-            os.remove(file_path)
-            rich.print(f"[green]Deleted:[/green] {file_path}")
-        except Exception as e:
-            rich.print(f"[red]Error deleting file {file_path}:[/red] {e}")
+        return (deleter or BulkDeleter()).delete(
+            path for path in self._rows if path not in self.directories
+        )
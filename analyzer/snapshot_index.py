@@ -0,0 +1,266 @@
+import json
+import os
+import sqlite3
+from collections import deque
+from dataclasses import replace
+from pathlib import Path
+from typing import Generator, List, Optional, Tuple, Union
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.directory_traversal import (
+    DEFAULT_OPTIONS,
+    TraversalOptions,
+    process_path,
+    start_walk,
+)
+from analyzer.utils.inodes import InodeSet
+
+CachedDirectory = Tuple[List[FileRecord], List[str]]
+
+# version of the layout of the stored directories
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS directories (
+    path BLOB PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    ctime_ns INTEGER NOT NULL,
+    file_count INTEGER NOT NULL,
+    total_size INTEGER NOT NULL,
+    files TEXT NOT NULL,
+    subdirectories TEXT NOT NULL,
+    generation INTEGER NOT NULL
+);
+"""
+
+
+class SnapshotIndex:
+    """
+    Persistent index of a previous scan, stored in a SQLite database.
+
+    Every directory is stored with its mtime and ctime, the records of the
+    files it contains, the subdirectories the walk descended into and the
+    number and total size of its files. On a rescan, a directory whose mtime
+    and ctime did not change is neither listed nor are its files stat'ed: the
+    stored records are reused.
+
+    A file modified in place does not change the metadata of its directory, so
+    its stored record is only refreshed once an entry of that directory is
+    added, removed or renamed.
+
+    Paths are stored as raw bytes, so that names that are not valid UTF-8 are
+    kept as they are. The names inside the JSON columns are escaped by json.
+    """
+
+    def __init__(
+        self, index_path: Union[str, Path], options: TraversalOptions = DEFAULT_OPTIONS
+    ) -> None:
+        """
+        Open (or create) the index.
+
+        The index is reset when it was built with other traversal options or
+        another FileRecord layout, since its content would not match a full
+        scan anymore.
+
+        Parameters:
+        - index_path (Union[str, Path]): Path to the SQLite database.
+        - options (TraversalOptions): Options the tree is walked with.
+        """
+        self.options = options
+        self._connection = sqlite3.connect(os.fspath(index_path))
+        self._connection.executescript(SCHEMA)
+        self._check_fingerprint()
+        self.generation = int(self._get_meta("generation", "0")) + 1
+        self._set_meta("generation", str(self.generation))
+        self.reused_directories = 0
+        self.scanned_directories = 0
+
+    def _fingerprint(self) -> str:
+        return json.dumps(
+            {
+                "schema": SCHEMA_VERSION,
+                "fields": FileRecord._fields,
+                "follow_symlinks": self.options.follow_symlinks,
+                "one_file_system": self.options.one_file_system,
+                "exclude": list(self.options.exclude),
+            }
+        )
+
+    def _check_fingerprint(self) -> None:
+        fingerprint = self._fingerprint()
+        if self._get_meta("fingerprint", fingerprint) != fingerprint:
+            self._connection.execute("DELETE FROM directories")
+        self._set_meta("fingerprint", fingerprint)
+
+    def _get_meta(self, key: str, default: str) -> str:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def lookup(
+        self, dir_path: str, dir_stat: os.stat_result
+    ) -> Optional[CachedDirectory]:
+        """
+        Get the stored content of a directory if it did not change.
+
+        Parameters:
+        - dir_path (str): Path to the directory.
+        - dir_stat (os.stat_result): Current stat result of the directory.
+
+        Returns:
+        - Optional[CachedDirectory]: The stored file records and subdirectories,
+          or None if the directory is unknown or changed.
+        """
+        row = self._connection.execute(
+            "SELECT mtime_ns, ctime_ns, files, subdirectories FROM directories "
+            "WHERE path = ?",
+            (os.fsencode(dir_path),),
+        ).fetchone()
+        if row is None or (row[0], row[1]) != (
+            dir_stat.st_mtime_ns,
+            dir_stat.st_ctime_ns,
+        ):
+            return None
+        self._connection.execute(
+            "UPDATE directories SET generation = ? WHERE path = ?",
+            (self.generation, os.fsencode(dir_path)),
+        )
+        records = [
+            FileRecord(os.path.join(dir_path, name), *fields)
+            for name, *fields in json.loads(row[2])
+        ]
+        return records, json.loads(row[3])
+
+    def store(
+        self,
+        dir_path: str,
+        dir_stat: os.stat_result,
+        records: List[FileRecord],
+        subdirectories: List[str],
+    ) -> None:
+        """
+        Store the content of a directory.
+
+        Parameters:
+        - dir_path (str): Path to the directory.
+        - dir_stat (os.stat_result): Stat result of the directory, taken before
+          it was listed.
+        - records (List[FileRecord]): Records of the files of the directory.
+        - subdirectories (List[str]): Paths of the subdirectories to walk.
+        """
+        files = [[os.path.basename(record.path), *record[1:]] for record in records]
+        self._connection.execute(
+            "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                os.fsencode(dir_path),
+                dir_stat.st_mtime_ns,
+                dir_stat.st_ctime_ns,
+                len(records),
+                sum(record.size for record in records),
+                json.dumps(files),
+                json.dumps(subdirectories),
+                self.generation,
+            ),
+        )
+
+    def scan_tree(
+        self, root_dir: Union[str, Path]
+    ) -> Generator[FileRecord, None, None]:
+        """
+        Walk through the directory tree, reusing the stored content of the
+        directories that did not change and storing the others.
+
+        Args:
+            root_dir (Union[str, Path]): The root directory to start the traversal.
+
+        Yields:
+            Generator[FileRecord, None, None]: Yields a record for each file in
+            the directory tree, and for each directory but the root if the
+            options ask for directories.
+        """
+        options, _ = start_walk(root_dir, self.options, None)
+        visited = InodeSet()
+        stack = deque([os.fspath(root_dir)])
+
+        while stack:
+            current_path = stack.pop()
+            try:
+                dir_stat = os.stat(current_path)
+            except OSError:
+                continue
+            if options.one_file_system and dir_stat.st_dev != options.root_device:
+                continue
+            if visited.add(dir_stat.st_dev, dir_stat.st_ino):
+                yield from self._directory_record(current_path, dir_stat, root_dir)
+                yield from self._scan_directory(stack, current_path, dir_stat, options)
+
+    def _directory_record(
+        self, dir_path: str, dir_stat: os.stat_result, root_dir: Union[str, Path]
+    ) -> List[FileRecord]:
+        if not self.options.directories or dir_path == os.fspath(root_dir):
+            return []
+        return [FileRecord.from_stat(dir_path, dir_stat)]
+
+    def _scan_directory(
+        self,
+        stack: deque,
+        current_path: str,
+        dir_stat: os.stat_result,
+        options: TraversalOptions,
+    ) -> List[FileRecord]:
+        cached = self.lookup(current_path, dir_stat)
+        if cached is not None:
+            self.reused_directories += 1
+            records, subdirectories = cached
+            stack.extend(subdirectories)
+            return records
+
+        self.scanned_directories += 1
+        subdirectories_found: deque = deque()
+        records = []
+        # directories are yielded from their own stat by scan_tree, so that
+        # the stored records never hold a stale directory
+        files_only = replace(options, directories=False)
+        for entry in process_path(subdirectories_found, current_path, files_only):
+            try:
+                records.append(FileRecord.from_stat(entry.path, entry.stat()))
+            except (FileNotFoundError, OSError):
+                continue
+        self.store(current_path, dir_stat, records, list(subdirectories_found))
+        stack.extend(subdirectories_found)
+        return records
+
+    def close(self, prune: bool = True) -> None:
+        """
+        Save the index and close it.
+
+        Parameters:
+        - prune (bool): Drop the directories that were not seen by the last
+          walk. It should only be set once a walk went through the whole tree.
+        """
+        if prune:
+            self._connection.execute(
+                "DELETE FROM directories WHERE generation < ?", (self.generation,)
+            )
+        self._connection.commit()
+        self._connection.close()
+
+    def __len__(self) -> int:
+        row = self._connection.execute("SELECT COUNT(*) FROM directories").fetchone()
+        return row[0]
+
+    def __enter__(self) -> "SnapshotIndex":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        self.close(prune=exc_type is None)
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import sqlite3
+import stat
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from analyzer.analyzer_interface import FileRecord
+
+# categories whose files are sniffed, their extension telling nothing
+SNIFFED_CATEGORIES = frozenset({"NoExtension", "Other"})
+HEADER_SIZE = 264
+
+
+class Signature(NamedTuple):
+    offset: int
+    magic: bytes
+    category: str
+
+
+SIGNATURES = (
+    Signature(0, b"\x7fELF", "Executable"),
+    Signature(0, b"MZ", "Executable"),
+    Signature(0, b"#!", "Executable"),
+    Signature(0, b"\x1f\x8b", "Archive"),
+    Signature(0, b"PK\x03\x04", "Archive"),
+    Signature(0, b"PK\x05\x06", "Archive"),
+    Signature(0, b"BZh", "Archive"),
+    Signature(0, b"\xfd7zXZ\x00", "Archive"),
+    Signature(0, b"\x28\xb5\x2f\xfd", "Archive"),
+    Signature(0, b"7z\xbc\xaf\x27\x1c", "Archive"),
+    Signature(0, b"Rar!\x1a\x07", "Archive"),
+    Signature(257, b"ustar", "Archive"),
+    Signature(0, b"\x89PNG\r\n\x1a\n", "Image"),
+    Signature(0, b"\xff\xd8\xff", "Image"),
+    Signature(0, b"GIF87a", "Image"),
+    Signature(0, b"GIF89a", "Image"),
+    Signature(0, b"%PDF-", "Text"),
+    Signature(0, b"SQLite format 3\x00", "Database"),
+    Signature(0, b"ID3", "Audio"),
+    Signature(0, b"fLaC", "Audio"),
+    Signature(0, b"OggS", "Audio"),
+    Signature(4, b"ftyp", "Video"),
+    Signature(0, b"\x1a\x45\xdf\xa3", "Video"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sniffed (
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    category TEXT,
+    PRIMARY KEY (dev, inode, mtime)
+);
+"""
+
+CacheKey = Tuple[int, int, float]
+
+
+def sniff(header: bytes) -> Optional[str]:
+    """
+    Get the category of a file from its first bytes.
+
+    Parameters:
+    - header (bytes): The first HEADER_SIZE bytes of the file, or all of them
+      for smaller files.
+
+    Returns:
+    - Optional[str]: The category, or None if no known signature matches.
+    """
+    for signature in SIGNATURES:
+        if header.startswith(signature.magic, signature.offset):
+            return signature.category
+    return None
+
+
+def read_header(path: str) -> bytes:
+    # O_NONBLOCK so that opening a FIFO never blocks the reading thread
+    fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_NOCTTY)
+    try:
+        return os.read(fd, HEADER_SIZE)
+    finally:
+        os.close(fd)
+
+
+class ContentSniffer:
+    """
+    Categorize files from their content when their extension is unknown.
+
+    The headers are read by a pool of threads, so that several reads are in
+    flight at once. Results are cached by (device, inode, mtime): a file is
+    only read again once it was modified, and only once by the analyzers
+    asking for it while it is being read. With a cache path the cache is kept
+    across scans; only the entries of the files seen by the last scan are
+    kept.
+    """
+
+    def __init__(
+        self, threads: int = 8, cache_path: Optional[Union[str, Path]] = None
+    ) -> None:
+        """
+        Parameters:
+        - threads (int): Number of threads reading the headers.
+        - cache_path (Optional[Union[str, Path]]): Path to the SQLite database
+          the cache is kept in.
+        """
+        self.threads = threads
+        self.cache_path = None if cache_path is None else os.fspath(cache_path)
+        self.cache: Dict[CacheKey, Optional[str]] = self._load()
+        self.used: Dict[CacheKey, Optional[str]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # files being read, until their category is cached
+        self._in_flight: Dict[CacheKey, "Future[Optional[str]]"] = {}
+
+    @staticmethod
+    def _fingerprint() -> str:
+        return hashlib.sha1(repr((HEADER_SIZE, SIGNATURES)).encode()).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.cache_path)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _load(self) -> Dict[CacheKey, Optional[str]]:
+        if self.cache_path is None:
+            return {}
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'fingerprint'"
+            ).fetchone()
+            if row is None or row[0] != self._fingerprint():
+                return {}
+            rows = connection.execute("SELECT dev, inode, mtime, category FROM sniffed")
+            return {
+                (dev, inode, mtime): category for dev, inode, mtime, category in rows
+            }
+        finally:
+            connection.close()
+
+    def submit(self, record: FileRecord) -> "Future[Optional[str]]":
+        """
+        Sniff the category of a file, unless it is cached.
+
+        Parameters:
+        - record (FileRecord): The stat record of the file.
+
+        Returns:
+        - Future[Optional[str]]: The category of the file, None if it is not
+          a regular file, it cannot be read or no signature matches.
+        """
+        key = (record.dev, record.inode, record.mtime)
+        # looked up before the cache, where the result is stored before the
+        # file leaves the files in flight
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return in_flight
+        if key in self.cache or not stat.S_ISREG(record.mode):
+            future: "Future[Optional[str]]" = Future()
+            future.set_result(self.cache.get(key))
+            self.used[key] = future.result()
+            return future
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        future = self._in_flight[key] = self._executor.submit(
+            self._sniff, key, record.path
+        )
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return future
+
+    def _sniff(self, key: CacheKey, path: str) -> Optional[str]:
+        try:
+            category = sniff(read_header(path))
+        except OSError:
+            return None
+        self.cache[key] = self.used[key] = category
+        return category
+
+    def merge(self, other: "ContentSniffer") -> None:
+        """
+        Merge the cache entries used by another ContentSniffer.
+        """
+        self.cache.update(other.used)
+        self.used.update(other.used)
+
+    def close(self) -> None:
+        """
+        Stop the reading threads and save the cache.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.cache_path is None:
+            return
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM sniffed")
+            connection.executemany(
+                "INSERT INTO sniffed VALUES (?, ?, ?, ?)",
+                [(*key, category) for key, category in self.used.items()],
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)",
+                (self._fingerprint(),),
+            )
+        connection.close()
+
+    def __getstate__(self) -> dict:
+        # the reading threads are not shared with other processes
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["_in_flight"] = {}
+        return state
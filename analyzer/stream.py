@@ -0,0 +1,129 @@
+import gzip
+import json
+import stat
+import sys
+from typing import BinaryIO, List, Optional
+
+import bitmath
+import rich
+
+from analyzer.analyzer_interface import APPARENT, FileRecord
+from analyzer.categorization import CategorizedAnalyzer, CategoryResolver
+from analyzer.large_files import LargeFileIdentifier
+from analyzer.utils.permission_policy import PermissionPolicy
+from analyzer.utils.report_writer import ReportWriter
+
+STDOUT = "-"
+
+
+class NdjsonStream(CategorizedAnalyzer):
+    """
+    Write one JSON line per file as soon as it is analyzed, or once its
+    category is known for the sniffed files.
+
+    Lines are written in batches of BATCH_SIZE through a buffered (and
+    optionally gzip compressed) writer, so memory use does not grow with the
+    number of files. A file removed while watching is written as a line with
+    "removed" set.
+    """
+
+    BATCH_SIZE = 4096
+
+    def __init__(
+        self,
+        output: str = STDOUT,
+        size_threshold: Optional[str] = None,
+        compress: bool = False,
+        policy: Optional[PermissionPolicy] = None,
+        size_basis: str = APPARENT,
+        resolver: Optional[CategoryResolver] = None,
+    ) -> None:
+        """
+        Open the output of the stream.
+
+        Parameters:
+        - output (str): Path to the output file, "-" for the standard output.
+        - size_threshold (Optional[str]): Threshold for flagging large files, in
+          a human-readable string format (e.g., "100MB", "2 GiB").
+        - compress (bool): Compress the output with gzip.
+        - policy (Optional[PermissionPolicy]): The rules for flagging files with
+          bad permissions, the default rules if None.
+        - size_basis (str): The size compared to the threshold, the apparent or
+          the allocated size (see SIZE_BASES).
+        - resolver (Optional[CategoryResolver]): The resolver of the category
+          of the files, from their extension only if None.
+        """
+        super().__init__(resolver)
+        self.output = output
+        self.size_threshold = int(
+            bitmath.parse_string(size_threshold).bytes
+            if size_threshold
+            else LargeFileIdentifier.DEFAULT_THRESHOLD.bytes
+        )
+        self.policy = policy or PermissionPolicy()
+        self.size_basis = size_basis
+        # the added files, the lines of removed files are not counted
+        self.records_written = 0
+        self._lines: List[bytes] = []
+        self._file = self._open(output, compress)
+
+    @staticmethod
+    def _open(output: str, compress: bool) -> BinaryIO:
+        if output == STDOUT:
+            stream = sys.stdout.buffer
+            return gzip.GzipFile(fileobj=stream, mode="wb") if compress else stream
+        if compress:
+            return gzip.open(output, "wb")
+        return open(output, "wb")
+
+    def _update(self, record: FileRecord, category: str, count: int) -> None:
+        if count < 0:
+            self._write({"path": record.path, "removed": True})
+            return
+        self._write(
+            {
+                "path": record.path,
+                "size": record.size,
+                "allocated": record.allocated,
+                "mode": stat.filemode(record.mode),
+                "category": category,
+                "large": record.size_by(self.size_basis) >= self.size_threshold,
+                "bad_permissions": self.policy.match(record) is not None,
+            }
+        )
+        self.records_written += 1
+
+    def _write(self, line: dict) -> None:
+        self._lines.append(json.dumps(line).encode() + b"\n")
+        if len(self._lines) >= self.BATCH_SIZE:
+            self._write_lines()
+
+    def _write_lines(self) -> None:
+        self._file.writelines(self._lines)
+        self._lines.clear()
+        self._file.flush()
+
+    def flush(self) -> None:
+        super().flush()
+        self._write_lines()
+
+    def close(self) -> None:
+        """
+        Write the pending lines and close the output.
+        """
+        self.flush()
+        if self._file is not sys.stdout.buffer:
+            self._file.close()
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        """
+        Write the pending lines and tell how many were written, always to the
+        standard error: the stream may be written to the standard output.
+        """
+        self.flush()
+        rich.print(
+            f"[green]Streamed {self.records_written} records to "
+            f"{'the standard output' if self.output == STDOUT else self.output}"
+            ".[/green]",
+            file=sys.stderr,
+        )
@@ -1,39 +1,89 @@
 import time
-from os import stat
-from typing import Union
+from typing import Any, List, Optional, Tuple, Union
 
 import bitmath
-import rich
 
-from analyzer.analyzer_interface import AnalyserInterface, PathLike
+from analyzer.analyzer_interface import AnalyserInterface, FileRecord, PathLike
+from analyzer.utils.quantiles import TDigest
+from analyzer.utils.report_writer import ReportWriter, Size, TableWriter, field_name
+
+# quantiles of the file sizes in the report
+REPORTED_QUANTILES = (("Median", 0.5), ("P90", 0.9), ("P99", 0.99), ("P99.9", 0.999))
 
 
 class Summary(AnalyserInterface):
     total_files: int = 0
     total_size: int = 0
+    total_allocated: int = 0
+    total_slack: int = 0
     average_size: float = 0.0
     smallest_file_size: float = float("inf")
     largest_file_size: float = 0.0
     start_time: float = time.time()
     report_key_len: int = len("Smallest File Size:   ")
 
+    def __init__(self) -> None:
+        # per instance, unlike the counters above
+        self.size_quantiles = TDigest()
+
     def add(self, file_path: PathLike) -> None:
         try:
-            file_size = stat(file_path).st_size
+            record = FileRecord.from_path(file_path)
         except (FileNotFoundError, OSError):
             return
+        self.add_record(record)
 
+    def add_record(self, record: FileRecord) -> None:
+        file_size = record.size
         self.total_files += 1
         self.total_size += file_size
+        self.total_allocated += record.allocated
+        self.total_slack += record.slack
 
         self.smallest_file_size = min(self.smallest_file_size, file_size)
         self.largest_file_size = max(self.largest_file_size, file_size)
+        self.size_quantiles.add(file_size)
+
+    def remove_record(self, record: FileRecord) -> None:
+        # The smallest and largest sizes and the quantiles are not recomputed:
+        # they cover every size seen since the analysis started.
+        self.total_files -= 1
+        self.total_size -= record.size
+        self.total_allocated -= record.allocated
+        self.total_slack -= record.slack
+
+    def merge(self, other: "Summary") -> None:
+        self.total_files += other.total_files
+        self.total_size += other.total_size
+        self.total_allocated += other.total_allocated
+        self.total_slack += other.total_slack
+        self.smallest_file_size = min(self.smallest_file_size, other.smallest_file_size)
+        self.largest_file_size = max(self.largest_file_size, other.largest_file_size)
+        self.start_time = min(self.start_time, other.start_time)
+        self.size_quantiles.merge(other.size_quantiles)
 
     def _format_size_line(self, key: str, value: Union[int, float]) -> str:
         formatted_value = bitmath.Byte(value).best_prefix(bitmath.SI)
         return f"{key.ljust(self.report_key_len)} {formatted_value}"
 
-    def report(self) -> None:
+    def _statistics(self, elapsed_time: float) -> List[Tuple[str, Any]]:
+        return [
+            ("Total Files", self.total_files),
+            ("Total Size", Size(self.total_size)),
+            ("Total Allocated Size", Size(self.total_allocated)),
+            ("Slack Space", Size(self.total_slack)),
+            ("Average File Size", Size(self.average_size)),
+            ("Smallest File Size", Size(self.smallest_file_size)),
+            ("Largest File Size", Size(self.largest_file_size)),
+            *(
+                (f"{name} File Size", Size(self.size_quantiles.quantile(quantile)))
+                for name, quantile in REPORTED_QUANTILES
+            ),
+            ("Time Elapsed", round(elapsed_time, 2)),
+        ]
+
+    def report(self, writer: Optional[ReportWriter] = None) -> None:
+        writer = writer or TableWriter()
         end_time = time.time()
         elapsed_time = end_time - self.start_time
         if self.total_files == 0:
@@ -41,14 +91,23 @@ class Summary(AnalyserInterface):
         self.average_size = self.total_size / self.total_files
         bitmath.format_string = "{value:.2f} {unit}"
 
-        rich.print("\n[bold][underline]Statistics[/underline][/bold]")
-        rich.print(f"{'Total Files:':<{self.report_key_len}} {self.total_files} file")
-        rich.print(self._format_size_line("Total Size:", self.total_size))
-        rich.print(self._format_size_line("Average File Size:", self.average_size))
-        rich.print(
-            self._format_size_line("Smallest File Size:", self.smallest_file_size)
+        if writer.machine_readable:
+            writer.write_table(
+                "Statistics",
+                ["Statistic", "Value"],
+                (
+                    (field_name(key), value)
+                    for key, value in self._statistics(elapsed_time)
+                ),
+                name="statistics",
+            )
+            return
+        writer.write_message("\n[bold][underline]Statistics[/underline][/bold]")
+        writer.write_message(
+            f"{'Total Files:':<{self.report_key_len}} {self.total_files} file"
         )
-        rich.print(self._format_size_line("Largest File Size:", self.largest_file_size))
-        rich.print(
+        for key, value in self._statistics(elapsed_time)[1:-1]:
+            writer.write_message(self._format_size_line(f"{key}:", value))
+        writer.write_message(
             f"{'Time Elapsed:':<{self.report_key_len}} {elapsed_time:.2f} seconds"
         )
@@ -0,0 +1,48 @@
+import fnmatch
+import re
+from typing import Iterable, List, Optional, Pattern
+
+
+def _compile(translated: List[str]) -> Optional[Pattern[str]]:
+    if not translated:
+        return None
+    return re.compile("|".join(translated))
+
+
+class ExcludeMatcher:
+    """
+    Glob patterns compiled once into a single matcher.
+
+    Patterns without a slash (e.g. "*.log", "node_modules") are matched against
+    the name of an entry, patterns with a slash (e.g. "/proc", "*/.git/objects")
+    against its full path.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()) -> None:
+        self.patterns = tuple(patterns)
+        names: List[str] = []
+        paths: List[str] = []
+        for pattern in self.patterns:
+            pattern = pattern.rstrip("/") or "/"
+            target = paths if "/" in pattern else names
+            target.append(fnmatch.translate(pattern))
+        self._names = _compile(names)
+        self._paths = _compile(paths)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def matches(self, name: str, path: str) -> bool:
+        """
+        Check if an entry matches any of the patterns.
+
+        Args:
+            name (str): The name of the entry.
+            path (str): The full path of the entry.
+
+        Returns:
+            bool: True if the entry is excluded, False otherwise.
+        """
+        if self._names is not None and self._names.match(name):
+            return True
+        return self._paths is not None and self._paths.match(path) is not None
@@ -0,0 +1,141 @@
+import threading
+from typing import Dict, List, Optional, Set
+
+from analyzer.analyzer_interface import FileRecord
+
+
+def inode_key(st_dev: int, st_ino: int) -> int:
+    """
+    Pack a (st_dev, st_ino) pair into a single integer.
+    """
+    return st_dev << 64 | st_ino
+
+
+class InodeSet:
+    """
+    Thread-safe set of (st_dev, st_ino) pairs, stored as packed integers.
+    """
+
+    def __init__(self) -> None:
+        self._keys: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def add(self, st_dev: int, st_ino: int) -> bool:
+        """
+        Add an inode to the set.
+
+        Returns:
+            bool: True if the inode was not in the set yet, False otherwise.
+        """
+        key = inode_key(st_dev, st_ino)
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def update(self, other: "InodeSet") -> None:
+        """
+        Add all the inodes of another set to this one.
+        """
+        with self._lock:
+            self._keys.update(other._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getstate__(self) -> Set[int]:
+        return self._keys
+
+    def __setstate__(self, keys: Set[int]) -> None:
+        self._keys = keys
+        self._lock = threading.Lock()
+
+
+class HardLinks:
+    """
+    Keep track of multiply-linked files so that they are only counted once.
+
+    In deferred mode no decision is taken: the records of multiply-linked files
+    are put aside, to be checked later against a HardLinks instance that has
+    seen the whole tree (e.g. the parent of a sharded scan).
+    """
+
+    def __init__(self, defer: bool = False) -> None:
+        self.defer = defer
+        self.deferred: List[FileRecord] = []
+        self._seen = InodeSet()
+
+    def first_link(self, record: FileRecord) -> bool:
+        """
+        Check if a record should be counted.
+
+        Returns:
+            bool: True for files with a single link and for the first link seen
+            of a multiply-linked file, False otherwise.
+        """
+        if record.nlink < 2:
+            return True
+        if self.defer:
+            self.deferred.append(record)
+            return False
+        return self._seen.add(record.dev, record.inode)
+
+    def update(self, other: "HardLinks") -> None:
+        """
+        Mark the links seen by another instance as seen.
+        """
+        self._seen.update(other._seen)
+
+
+class LinkPaths:
+    """
+    Paths of the files of a changing tree per inode, so that a file with
+    several hard links is only counted once, under the first of its paths
+    still in the tree.
+
+    Every file is tracked, whatever its link count: links can be added to a
+    file after it was counted.
+    """
+
+    def __init__(self) -> None:
+        self._paths: Dict[int, List[str]] = {}
+
+    def add(self, record: FileRecord) -> bool:
+        """
+        Add the path of a file.
+
+        Returns:
+            bool: True if the file should be counted under this path, i.e. it
+            has no other path in the tree, False otherwise.
+        """
+        paths = self._paths.setdefault(inode_key(record.dev, record.inode), [])
+        paths.append(record.path)
+        return len(paths) == 1
+
+    def is_counted(self, record: FileRecord) -> bool:
+        """
+        Check if a file is counted under the path of a record.
+        """
+        paths = self._paths.get(inode_key(record.dev, record.inode))
+        return bool(paths) and paths[0] == record.path
+
+    def remove(self, record: FileRecord) -> Optional[str]:
+        """
+        Remove the path of a file.
+
+        Returns:
+            Optional[str]: The path the file should be counted under instead,
+            if it was counted under the removed path and has other paths in
+            the tree, None otherwise.
+        """
+        key = inode_key(record.dev, record.inode)
+        paths = self._paths.get(key, [])
+        if record.path not in paths:
+            return None
+        counted = paths[0] == record.path
+        paths.remove(record.path)
+        if not paths:
+            del self._paths[key]
+            return None
+        return paths[0] if counted else None
@@ -0,0 +1,55 @@
+import grp
+import pwd
+from functools import lru_cache
+from typing import Optional
+
+# Lookups go through the name service (NSS, possibly LDAP or NIS), they are
+# cached so that the files of a single owner cost a single lookup.
+
+
+@lru_cache(maxsize=None)
+def user_name(uid: int) -> Optional[str]:
+    """
+    Get the name of a user.
+
+    Args:
+        uid (int): The user id.
+
+    Returns:
+        Optional[str]: The name of the user, None if it has no passwd entry.
+    """
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def group_name(gid: int) -> Optional[str]:
+    """
+    Get the name of a group.
+
+    Args:
+        gid (int): The group id.
+
+    Returns:
+        Optional[str]: The name of the group, None if it has no group entry.
+    """
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return None
+
+
+def is_orphan_uid(uid: int) -> bool:
+    return uid >= 0 and user_name(uid) is None
+
+
+def owner_label(uid: int, gid: int) -> str:
+    """
+    Format the owner and group of a file as "user:group", falling back to the
+    ids when they have no name.
+    """
+    if uid < 0:
+        return ""
+    return f"{user_name(uid) or uid}:{group_name(gid) or gid}"
@@ -1,11 +1,15 @@
 import argparse
 from configparser import ConfigParser
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
 
 import bitmath
 from pydantic import BaseModel
 
+from analyzer.analyzer_interface import APPARENT, SIZE_BASES
+from analyzer.utils.permission_policy import PermissionPolicy
+from analyzer.utils.report_writer import FORMATS, TERMINAL_MAX_ROWS
+
 RED = "\033[91m"
 RESET = "\033[0m"
 
@@ -19,12 +23,104 @@ class ParsedArgs(BaseModel):
         size_threshold (int): Size threshold for identifying large files.
         delete_files (bool): Flag indicating whether file deletion prompt is enabled.
         log_file (Optional[str]): Path to the log file (optional).
+        jobs (int): Number of threads used to walk the directory tree.
+        processes (int): Number of processes the directory tree is split across.
+        follow_symlinks (bool): Flag indicating whether symlinked directories
+            are walked.
+        count_hardlinks (bool): Flag indicating whether every hard link to a
+            file is counted.
+        one_file_system (bool): Flag indicating whether the walk stays on the
+            file system of the target directory.
+        exclude (List[str]): Glob patterns of files and directories to skip.
+        index_file (Optional[str]): Path to the snapshot index used for
+            incremental rescans (optional).
+        watch_interval (Optional[float]): Interval in seconds between the
+            reports of the watch mode (optional, disabled by default).
+        checkpoint_file (Optional[str]): Path to the checkpoint file of the
+            scan (optional).
+        checkpoint_interval (float): Interval in seconds between two
+            checkpoints.
+        resume (bool): Flag indicating whether the scan resumes from the
+            checkpoint file.
+        stream_format (Optional[str]): Format of the per-file stream, instead
+            of the reports (optional).
+        stream_output (str): Path to the output of the stream, "-" for the
+            standard output.
+        stream_gzip (bool): Flag indicating whether the stream is compressed
+            with gzip.
+        sniff (bool): Flag indicating whether files without a known extension
+            are categorized from their content.
+        aggregate_only (bool): Flag indicating whether the categorization only
+            keeps counters instead of every file in watch mode.
+        top_per_category (int): Number of largest files reported per category.
+        top (Optional[int]): Number of largest files reported among the files
+            above the size threshold (optional, all of them by default).
+        histogram (bool): Flag indicating whether the size histogram is
+            reported.
+        histogram_thresholds (List[str]): Size thresholds reported by the
+            histogram, the size threshold if empty.
+        sniff_cache (Optional[str]): Path to the cache of the categories
+            sniffed from the content of the files (optional).
+        permission_rules (Dict[str, str]): Rules files with bad permissions
+            are reported by, the default rules if empty.
+        output_format (Optional[str]): Format of the reports (optional, rich
+            tables on a terminal and plain text otherwise by default).
+        max_rows (Optional[int]): Maximum number of rows per report table
+            (optional).
+        dry_run (bool): Flag indicating whether the files that would be
+            deleted are only reported.
+        deletion_log (Optional[str]): Path to the JSON lines log of the
+            deleted files (optional).
+        duplicates (bool): Flag indicating whether the files with the same
+            content are reported.
+        depths (List[int]): Depths at which the heaviest directories are
+            reported, none if empty.
+        top_directories (int): Number of heaviest directories reported at each
+            depth.
+        allocation (bool): Flag indicating whether the sparse files and the
+            slack space of each category are reported.
+        size_basis (str): The size thresholds are applied to, the apparent or
+            the allocated size of the files.
+        ages (bool): Flag indicating whether the ages of the files since their
+            last modification and access are reported.
     """
 
     target_dir: Path
     size_threshold: str
     delete_files: bool
     log_file: Optional[str]
+    jobs: int = 1
+    processes: int = 1
+    follow_symlinks: bool = False
+    count_hardlinks: bool = False
+    one_file_system: bool = False
+    exclude: List[str] = []
+    index_file: Optional[str] = None
+    watch_interval: Optional[float] = None
+    checkpoint_file: Optional[str] = None
+    checkpoint_interval: float = 60.0
+    resume: bool = False
+    stream_format: Optional[str] = None
+    stream_output: str = "-"
+    stream_gzip: bool = False
+    sniff: bool = False
+    sniff_cache: Optional[str] = None
+    aggregate_only: bool = False
+    top_per_category: int = 0
+    top: Optional[int] = None
+    histogram: bool = False
+    histogram_thresholds: List[str] = []
+    permission_rules: Dict[str, str] = {}
+    output_format: Optional[str] = None
+    max_rows: Optional[int] = None
+    dry_run: bool = False
+    deletion_log: Optional[str] = None
+    duplicates: bool = False
+    depths: List[int] = []
+    top_directories: int = 10
+    allocation: bool = False
+    size_basis: str = APPARENT
+    ages: bool = False
 
 
 def valid_path(path: str) -> Path:
@@ -43,6 +139,143 @@ def valid_path(path: str) -> Path:
     return vpath
 
 
+def positive_int(value: str) -> int:
+    """
+    Validate a strictly positive integer command-line argument.
+
+    Args:
+        value (str): The value to be validated.
+
+    Returns:
+        int: The validated integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"{RED}Invalid positive number: {value}{RESET}"
+        )
+    return number
+
+
+def positive_float(value: str) -> float:
+    """
+    Validate a strictly positive number command-line argument.
+
+    Args:
+        value (str): The value to be validated.
+
+    Returns:
+        float: The validated number.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(
+            f"{RED}Invalid positive number: {value}{RESET}"
+        )
+    return number
+
+
+def split_patterns(patterns: str) -> List[str]:
+    """
+    Split a comma or newline separated list of patterns from the configuration
+    file.
+
+    Args:
+        patterns (str): The patterns to split.
+
+    Returns:
+        List[str]: The non-empty patterns.
+    """
+    return [
+        pattern.strip()
+        for line in patterns.splitlines()
+        for pattern in line.split(",")
+        if pattern.strip()
+    ]
+
+
+def read_permission_rules(
+    config: ConfigParser, parser: argparse.ArgumentParser
+) -> Dict[str, str]:
+    """
+    Read and validate the permission rules of the configuration file.
+
+    Args:
+        config (ConfigParser): The configuration file.
+        parser (argparse.ArgumentParser): The parser reporting invalid rules.
+
+    Returns:
+        Dict[str, str]: The expression of each rule, by name.
+    """
+    if not config.has_section("permission_rules"):
+        return {}
+    rules = dict(config.items("permission_rules"))
+    try:
+        PermissionPolicy.from_config(rules)
+    except ValueError as e:
+        parser.error(str(e))
+    return rules
+
+
+def read_choice(
+    config: ConfigParser,
+    parser: argparse.ArgumentParser,
+    key: str,
+    choices: Sequence[str],
+    fallback: Optional[str],
+) -> Optional[str]:
+    """
+    Read and validate a setting with a fixed set of values from the
+    configuration file.
+
+    Args:
+        config (ConfigParser): The configuration file.
+        parser (argparse.ArgumentParser): The parser reporting invalid values.
+        key (str): The name of the setting.
+        choices (Sequence[str]): The valid values.
+        fallback (Optional[str]): The value given on the command line.
+
+    Returns:
+        Optional[str]: The value of the setting, if any.
+    """
+    value = config.get("settings", key, fallback=fallback)
+    if value is not None and value not in choices:
+        parser.error(f"invalid {key}: {value}")
+    return value
+
+
+def read_depths(
+    config: ConfigParser, parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> List[int]:
+    """
+    Read the depths of the reported directories from the command line and the
+    configuration file.
+
+    Args:
+        config (ConfigParser): The configuration file.
+        parser (argparse.ArgumentParser): The parser reporting invalid depths.
+        args (argparse.Namespace): The command-line arguments.
+
+    Returns:
+        List[int]: The depths, none if the disk usage is not reported.
+    """
+    depths = list(args.depth)
+    for depth in split_patterns(config.get("settings", "depths", fallback="")):
+        if not depth.isdigit() or int(depth) < 1:
+            parser.error(f"invalid depth: {depth}")
+        depths.append(int(depth))
+    disk_usage = config.getboolean("settings", "disk_usage", fallback=args.disk_usage)
+    if disk_usage and not depths:
+        return [1]
+    return depths
+
+
 def parse_args() -> Optional[ParsedArgs]:
     """
     Parse command-line arguments.
@@ -86,6 +319,274 @@ def parse_args() -> Optional[ParsedArgs]:
         "-c", "--config", type=valid_path, help="Path to the configuration file"
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help="Number of threads used to walk the directory tree (default: 1)",
+    )
+
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=positive_int,
+        default=1,
+        help="Number of processes the directory tree is split across (default: 1)",
+    )
+
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Walk into symlinked directories (each directory is walked once)",
+    )
+
+    parser.add_argument(
+        "--count-hardlinks",
+        action="store_true",
+        help="Count every hard link to a file instead of only the first one",
+    )
+
+    parser.add_argument(
+        "-x",
+        "--one-file-system",
+        action="store_true",
+        help="Skip directories on different file systems",
+    )
+
+    parser.add_argument(
+        "-e",
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Skip files and directories matching the glob pattern, matched "
+        "against the name, or the full path if the pattern contains a slash "
+        "(can be repeated)",
+    )
+
+    parser.add_argument(
+        "-i",
+        "--index",
+        type=str,
+        default=None,
+        help="Path to a snapshot index file. Directories that did not change "
+        "since the previous scan with the same index are not walked again "
+        "(--jobs and --processes are ignored)",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--watch",
+        type=positive_float,
+        nargs="?",
+        const=10.0,
+        default=None,
+        metavar="SECONDS",
+        help="Keep watching the directory for changes with inotify after the "
+        "initial scan, and print the reports every SECONDS (default: 10)",
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Periodically save the progress of the scan to a checkpoint file, "
+        "removed once the scan completes "
+        "(--jobs, --processes and --index are ignored)",
+    )
+
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=positive_float,
+        default=60.0,
+        metavar="SECONDS",
+        help="Minimum interval between two checkpoints (default: 60)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the scan from the checkpoint file, if it exists",
+    )
+
+    parser.add_argument(
+        "--stream",
+        choices=["ndjson"],
+        default=None,
+        help="Write one line per file as the scan goes instead of the reports, "
+        "only the statistics are reported "
+        "(--processes and --checkpoint are ignored)",
+    )
+
+    parser.add_argument(
+        "--stream-output",
+        type=str,
+        default="-",
+        metavar="PATH",
+        help="Path to the output of the stream (default: standard output)",
+    )
+
+    parser.add_argument(
+        "--stream-gzip",
+        action="store_true",
+        help="Compress the stream with gzip",
+    )
+
+    parser.add_argument(
+        "--sniff",
+        action="store_true",
+        help="Categorize the files without a known extension from their first "
+        "bytes (ELF, gzip, zip, PNG, PDF, SQLite...)",
+    )
+
+    parser.add_argument(
+        "--sniff-cache",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Keep the categories sniffed from the content of the files in a "
+        "cache file, so that unmodified files are not read again (implies "
+        "--sniff)",
+    )
+
+    parser.add_argument(
+        "--aggregate-only",
+        action="store_true",
+        help="In watch mode, only keep the counters of each category and "
+        "extension (and the largest files with --top-per-category) instead of "
+        "every file, so memory does not grow with the number of files. Other "
+        "scans always do",
+    )
+
+    parser.add_argument(
+        "--top-per-category",
+        type=positive_int,
+        default=0,
+        metavar="K",
+        help="Report the K largest files of each category",
+    )
+
+    parser.add_argument(
+        "-t",
+        "--top",
+        type=positive_int,
+        default=None,
+        metavar="N",
+        help="Only report the N largest files above the size threshold",
+    )
+
+    parser.add_argument(
+        "--histogram",
+        action="store_true",
+        help="Report the distribution of the file sizes in power-of-two buckets, "
+        "overall and per category",
+    )
+
+    parser.add_argument(
+        "--threshold",
+        type=str,
+        action="append",
+        default=[],
+        metavar="SIZE",
+        help="Report the number of files and bytes above SIZE with the "
+        "histogram (can be repeated, default: the size threshold, implies "
+        "--histogram)",
+    )
+
+    parser.add_argument(
+        "--duplicates",
+        action="store_true",
+        help="Report the files with the same content and the bytes a single "
+        "copy of each would free (files of the same size are compared by a "
+        "partial, then a full hash)",
+    )
+
+    parser.add_argument(
+        "--disk-usage",
+        action="store_true",
+        help="Report the heaviest directories, with the size and number of the "
+        "files below them (at depth 1 unless --depth is given)",
+    )
+
+    parser.add_argument(
+        "--depth",
+        type=positive_int,
+        action="append",
+        default=[],
+        metavar="D",
+        help="Report the heaviest directories D levels below the target "
+        "directory (can be repeated, implies --disk-usage)",
+    )
+
+    parser.add_argument(
+        "--top-directories",
+        type=positive_int,
+        default=10,
+        metavar="N",
+        help="Number of heaviest directories reported at each depth (default: 10)",
+    )
+
+    parser.add_argument(
+        "--allocation",
+        action="store_true",
+        help="Report the sparse files (probed with SEEK_DATA and SEEK_HOLE) and "
+        "the slack space wasted in the last block of the files of each category",
+    )
+
+    parser.add_argument(
+        "--size-basis",
+        choices=SIZE_BASES,
+        default=APPARENT,
+        help="Size the thresholds, the large files and the histogram are based "
+        "on: the apparent size of the files, or the space allocated to them on "
+        "disk (default: apparent)",
+    )
+
+    parser.add_argument(
+        "--age",
+        dest="ages",
+        action="store_true",
+        help="Report the files and bytes per age bucket since their last "
+        "modification and access, per category and per top-level directory",
+    )
+
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        default=None,
+        help="Format of the reports: rich tables, plain tab separated text, CSV "
+        "or JSON lines (default: table on a terminal, plain otherwise and "
+        "with --log)",
+    )
+
+    parser.add_argument(
+        "--max-rows",
+        type=positive_int,
+        default=None,
+        metavar="N",
+        help="Only write the first N rows of each report table (default: all "
+        f"of them, {TERMINAL_MAX_ROWS} for tables printed to a terminal)",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Tell which reported files would be deleted and the bytes it would "
+        "free, without deleting them nor asking (implies --delete)",
+    )
+
+    parser.add_argument(
+        "--deletion-log",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Append a JSON line per deleted file (path, bytes freed, error) to "
+        "PATH",
+    )
+
     args = parser.parse_args()
 
     # Read configuration from file
@@ -98,10 +599,103 @@ def parse_args() -> Optional[ParsedArgs]:
     size_threshold = config.get("settings", "size", fallback=args.size)
     delete_files = config.getboolean("settings", "delete", fallback=args.delete)
     log_file = config.get("settings", "log", fallback=args.log)
+    jobs = config.getint("settings", "jobs", fallback=args.jobs)
+    processes = config.getint("settings", "processes", fallback=args.processes)
+    follow_symlinks = config.getboolean(
+        "settings", "follow_symlinks", fallback=args.follow_symlinks
+    )
+    count_hardlinks = config.getboolean(
+        "settings", "count_hardlinks", fallback=args.count_hardlinks
+    )
+    one_file_system = config.getboolean(
+        "settings", "one_file_system", fallback=args.one_file_system
+    )
+    index_file = config.get("settings", "index", fallback=args.index)
+    watch_interval = config.getfloat("settings", "watch", fallback=args.watch)
+    checkpoint_file = config.get("settings", "checkpoint", fallback=args.checkpoint)
+    checkpoint_interval = config.getfloat(
+        "settings", "checkpoint_interval", fallback=args.checkpoint_interval
+    )
+    resume = config.getboolean("settings", "resume", fallback=args.resume)
+    stream_format = config.get("settings", "stream", fallback=args.stream)
+    stream_output = config.get("settings", "stream_output", fallback=args.stream_output)
+    stream_gzip = config.getboolean(
+        "settings", "stream_gzip", fallback=args.stream_gzip
+    )
+    sniff = config.getboolean("settings", "sniff", fallback=args.sniff)
+    sniff_cache = config.get("settings", "sniff_cache", fallback=args.sniff_cache)
+    aggregate_only = config.getboolean(
+        "settings", "aggregate_only", fallback=args.aggregate_only
+    )
+    top_per_category = config.getint(
+        "settings", "top_per_category", fallback=args.top_per_category
+    )
+    top = config.getint("settings", "top", fallback=args.top)
+    histogram_thresholds = args.threshold + split_patterns(
+        config.get("settings", "thresholds", fallback="")
+    )
+    for threshold in histogram_thresholds:
+        try:
+            bitmath.parse_string(threshold)
+        except ValueError:
+            parser.error(f"invalid threshold: {threshold}")
+    histogram = config.getboolean(
+        "settings", "histogram", fallback=args.histogram
+    ) or bool(histogram_thresholds)
+    duplicates = config.getboolean("settings", "duplicates", fallback=args.duplicates)
+    depths = read_depths(config, parser, args)
+    top_directories = config.getint(
+        "settings", "top_directories", fallback=args.top_directories
+    )
+    allocation = config.getboolean("settings", "allocation", fallback=args.allocation)
+    size_basis = read_choice(config, parser, "size_basis", SIZE_BASES, args.size_basis)
+    ages = config.getboolean("settings", "age", fallback=args.ages)
+    permission_rules = read_permission_rules(config, parser)
+    output_format = read_choice(config, parser, "format", FORMATS, args.format)
+    max_rows = config.getint("settings", "max_rows", fallback=args.max_rows)
+    dry_run = config.getboolean("settings", "dry_run", fallback=args.dry_run)
+    deletion_log = config.get("settings", "deletion_log", fallback=args.deletion_log)
+    if resume and not checkpoint_file:
+        parser.error("--resume requires --checkpoint")
+    exclude = args.exclude + split_patterns(
+        config.get("settings", "exclude", fallback="")
+    )
 
     return ParsedArgs(
         target_dir=target_dir,
         size_threshold=str(size_threshold),
         delete_files=delete_files,
         log_file=log_file,
+        jobs=jobs,
+        processes=processes,
+        follow_symlinks=follow_symlinks,
+        count_hardlinks=count_hardlinks,
+        one_file_system=one_file_system,
+        exclude=exclude,
+        index_file=index_file,
+        watch_interval=watch_interval,
+        checkpoint_file=checkpoint_file,
+        checkpoint_interval=checkpoint_interval,
+        resume=resume,
+        stream_format=stream_format,
+        stream_output=stream_output,
+        stream_gzip=stream_gzip,
+        sniff=sniff,
+        sniff_cache=sniff_cache,
+        aggregate_only=aggregate_only,
+        top_per_category=top_per_category,
+        top=top,
+        histogram=histogram,
+        histogram_thresholds=histogram_thresholds,
+        permission_rules=permission_rules,
+        output_format=output_format,
+        max_rows=max_rows,
+        dry_run=dry_run,
+        deletion_log=deletion_log,
+        duplicates=duplicates,
+        depths=depths,
+        top_directories=top_directories,
+        allocation=allocation,
+        size_basis=size_basis,
+        ages=ages,
     )
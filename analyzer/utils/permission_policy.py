@@ -0,0 +1,211 @@
+import os
+import stat
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.utils.owners import is_orphan_uid
+
+NAMED_BITS = {
+    "setuid": stat.S_ISUID,
+    "setgid": stat.S_ISGID,
+    "sticky": stat.S_ISVTX,
+    "u+r": stat.S_IRUSR,
+    "u+w": stat.S_IWUSR,
+    "u+x": stat.S_IXUSR,
+    "g+r": stat.S_IRGRP,
+    "g+w": stat.S_IWGRP,
+    "g+x": stat.S_IXGRP,
+    "o+r": stat.S_IROTH,
+    "o+w": stat.S_IWOTH,
+    "o+x": stat.S_IXOTH,
+}
+
+# the file type bits of st_mode, stat.S_IFMT only extracts them
+TYPE_MASK = 0o170000
+
+FILE_TYPES = {
+    "file": stat.S_IFREG,
+    "dir": stat.S_IFDIR,
+}
+
+OWNERS: Dict[str, Callable[[int], bool]] = {
+    "root": lambda uid: uid == 0,
+    "orphan": is_orphan_uid,
+}
+
+
+def is_under(path: str, directories: Tuple[str, ...]) -> bool:
+    return any(
+        path == directory or path.startswith(directory.rstrip("/") + "/")
+        for directory in directories
+    )
+
+
+@dataclass(frozen=True)
+class PermissionRule:
+    """
+    A rule matching the files whose mode has the bits of mask set to value,
+    the file type bits included. It may be restricted to the files of some
+    owner (one of OWNERS), and to the files inside (or outside) some
+    directories.
+    """
+
+    name: str
+    mask: int
+    value: int
+    inside: Tuple[str, ...] = ()
+    outside: Tuple[str, ...] = ()
+    owner: Optional[str] = None
+
+    def matches(self, record: FileRecord) -> bool:
+        if record.mode & self.mask != self.value:
+            return False
+        if self.owner is not None and not OWNERS[self.owner](record.uid):
+            return False
+        if not (self.inside or self.outside):
+            return True
+        path = os.path.abspath(record.path)
+        if self.inside and not is_under(path, self.inside):
+            return False
+        return not is_under(path, self.outside)
+
+
+DEFAULT_RULES = (
+    PermissionRule("writable by everyone", TYPE_MASK | 0o222, stat.S_IFREG | 0o222),
+    PermissionRule("no permissions", TYPE_MASK | 0o7777, stat.S_IFREG | 0o000),
+    PermissionRule("execute only", TYPE_MASK | 0o7777, stat.S_IFREG | 0o111),
+    PermissionRule("read and execute only", TYPE_MASK | 0o7777, stat.S_IFREG | 0o555),
+    PermissionRule(
+        "directory writable by everyone without sticky bit",
+        TYPE_MASK | stat.S_IWOTH | stat.S_ISVTX,
+        stat.S_IFDIR | stat.S_IWOTH,
+    ),
+    PermissionRule(
+        "group-writable and owned by root",
+        TYPE_MASK | stat.S_IWGRP,
+        stat.S_IFREG | stat.S_IWGRP,
+        owner="root",
+    ),
+    PermissionRule("owned by an unknown user", 0, 0, owner="orphan"),
+)
+
+
+def parse_bits(bits: str) -> int:
+    """
+    Parse mode bits, either an octal number or names joined by "|".
+
+    Args:
+        bits (str): The bits, e.g. "4000", "0o4000" or "setuid|o+w".
+
+    Returns:
+        int: The mode bits.
+    """
+    if bits[:1].isdigit():
+        return int(bits, 8)
+    value = 0
+    for name in bits.split("|"):
+        if name.strip() not in NAMED_BITS:
+            raise ValueError(f"unknown mode bit '{name.strip()}'")
+        value |= NAMED_BITS[name.strip()]
+    return value
+
+
+def parse_rule(name: str, expression: str) -> PermissionRule:
+    """
+    Parse a rule from the configuration file.
+
+    The expression is made of space separated clauses: "set=BITS" and
+    "clear=BITS" for the bits that must be set and clear, "type=file|dir" for
+    the type of the files, "owner=root|orphan" for files owned by root or by
+    a user without a passwd entry, "inside=DIRS" and "outside=DIRS" for comma
+    separated directories the files must be inside or outside of. For example
+    "type=file set=setuid outside=/usr".
+
+    Args:
+        name (str): The name of the rule.
+        expression (str): The clauses of the rule.
+
+    Returns:
+        PermissionRule: The compiled rule.
+
+    Raises:
+        ValueError: If the expression is invalid.
+    """
+    clauses = parse_clauses(name, expression)
+    try:
+        set_bits = parse_bits(clauses["set"]) if clauses["set"] else 0
+        clear_bits = parse_bits(clauses["clear"]) if clauses["clear"] else 0
+    except ValueError as e:
+        raise ValueError(f"Invalid permission rule '{name}': {e}") from e
+    mask, value = set_bits | clear_bits, set_bits
+    if clauses["type"]:
+        mask, value = mask | TYPE_MASK, value | FILE_TYPES[clauses["type"]]
+    if not mask and not clauses["owner"]:
+        raise ValueError(f"Invalid permission rule '{name}': it matches every file")
+    return PermissionRule(
+        name,
+        mask,
+        value,
+        tuple(filter(None, clauses["inside"].split(","))),
+        tuple(filter(None, clauses["outside"].split(","))),
+        clauses["owner"] or None,
+    )
+
+
+def parse_clauses(name: str, expression: str) -> Dict[str, str]:
+    clauses = dict.fromkeys(("set", "clear", "type", "owner", "inside", "outside"), "")
+    choices = {"type": FILE_TYPES, "owner": OWNERS}
+    for clause in expression.split():
+        key, separator, value = clause.partition("=")
+        if (
+            not separator
+            or key not in clauses
+            or value not in choices.get(key, [value])
+        ):
+            raise ValueError(f"Invalid permission rule '{name}': '{clause}'")
+        clauses[key] = value
+    return clauses
+
+
+class PermissionPolicy:
+    """
+    Ordered permission rules checked against raw st_mode values: checking a
+    file is a mask and a comparison per rule, its mode is never formatted and
+    its owner is only looked up (once per user) when its mode matches.
+    """
+
+    def __init__(self, rules: Sequence[PermissionRule] = DEFAULT_RULES) -> None:
+        self.rules = tuple(rules)
+
+    @classmethod
+    def from_config(cls, rules: Mapping[str, str]) -> "PermissionPolicy":
+        """
+        Build a policy from the rules of the configuration file, or the
+        default rules if there are none.
+
+        Args:
+            rules (Mapping[str, str]): The expression of each rule, by name.
+
+        Returns:
+            PermissionPolicy: The policy.
+        """
+        if not rules:
+            return cls()
+        return cls([parse_rule(name, expression) for name, expression in rules.items()])
+
+    def match(self, record: FileRecord) -> Optional[PermissionRule]:
+        """
+        Get the first rule a file matches.
+
+        Args:
+            record (FileRecord): The stat record of the file.
+
+        Returns:
+            Optional[PermissionRule]: The rule, or None if the file matches no
+            rule.
+        """
+        for rule in self.rules:
+            if rule.matches(record):
+                return rule
+        return None
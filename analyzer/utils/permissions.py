@@ -43,5 +43,9 @@ def generate_full_write_combination() -> Set[PermissionType]:
     return full_write_combination
 
 
+def permissions_from_mode(mode: int) -> PermissionType:
+    return PermissionType(permission=stat.filemode(mode)[1:])
+
+
 def get_file_permissions(file_path: Union[Path, str]) -> PermissionType:
-    return PermissionType(permission=stat.filemode(os.stat(file_path).st_mode)[1:])
+    return permissions_from_mode(os.stat(file_path).st_mode)
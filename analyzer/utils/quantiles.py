@@ -0,0 +1,122 @@
+import math
+from array import array
+from typing import List, Tuple
+
+
+class TDigest:
+    """
+    Mergeable sketch of a distribution, to estimate its quantiles without
+    keeping every value (merging t-digest, Dunning & Ertl).
+
+    Values are summarized by a bounded number of centroids (a mean and a
+    weight). Centroids are kept small near both ends of the distribution, so
+    extreme quantiles such as p99.9 stay accurate. Values are buffered and
+    merged into the centroids in batches.
+    """
+
+    def __init__(self, compression: int = 200) -> None:
+        """
+        Parameters:
+        - compression (int): Accuracy of the sketch, it holds at most about
+          compression centroids.
+        """
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = array("d")
+        self._weights = array("d")
+        self._buffer: List[Tuple[float, float]] = []
+        self._buffer_size = 5 * compression
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        """
+        Add the values summarized by another sketch.
+        """
+        self._buffer.extend(zip(other._means, other._weights))
+        self._buffer.extend(other._buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _q_limit(self, q: float) -> float:
+        # k1 scale function: k(q) = compression / 2pi * asin(2q - 1), the
+        # centroid starting at q may grow until k increases by one
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        items = sorted([*zip(self._means, self._weights), *self._buffer])
+        self._buffer = []
+        means, weights = array("d"), array("d")
+        mean, weight = items[0]
+        merged = 0.0
+        q_limit = self._q_limit(0.0)
+        for item_mean, item_weight in items[1:]:
+            if (merged + weight + item_weight) / self.count <= q_limit:
+                weight += item_weight
+                mean += (item_mean - mean) * item_weight / weight
+                continue
+            means.append(mean)
+            weights.append(weight)
+            merged += weight
+            q_limit = self._q_limit(merged / self.count)
+            mean, weight = item_mean, item_weight
+        means.append(mean)
+        weights.append(weight)
+        self._means, self._weights = means, weights
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of the values.
+
+        Parameters:
+        - q (float): The quantile, between 0 and 1.
+
+        Returns:
+        - float: The estimated value, NaN if the sketch is empty.
+        """
+        self._compress()
+        if not self._means:
+            return math.nan
+        index = q * self.count
+        # values are interpolated between the centers of the centroids, and
+        # between the extremes and the first and last centroids
+        previous_center, previous_value = 0.0, self.min
+        center = 0.0
+        for mean, weight in zip(self._means, self._weights):
+            center += weight / 2
+            if index < center:
+                return self._interpolate(
+                    index, previous_center, previous_value, center, mean
+                )
+            previous_center, previous_value = center, mean
+            center += weight / 2
+        return self._interpolate(
+            index, previous_center, previous_value, self.count, self.max
+        )
+
+    @staticmethod
+    def _interpolate(
+        index: float, low: float, low_value: float, high: float, high_value: float
+    ) -> float:
+        if high <= low:
+            return high_value
+        return low_value + (high_value - low_value) * (index - low) / (high - low)
+
+    def __len__(self) -> int:
+        self._compress()
+        return len(self._means)
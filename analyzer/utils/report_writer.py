@@ -0,0 +1,286 @@
+import csv
+import json
+import re
+import sys
+from abc import ABC, abstractmethod
+from itertools import chain, islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Union,
+)
+
+import bitmath
+import rich
+from rich.table import Column, Table
+from rich.text import Text
+
+FORMATS = ("table", "plain", "csv", "json")
+
+# rows of a table printed to a terminal when no limit is given, rendering more
+# takes longer than the scan and is unreadable anyway
+TERMINAL_MAX_ROWS = 1000
+
+Columns = Sequence[Union[str, Column]]
+Row = Sequence[Any]
+
+
+class Size(float):
+    """
+    A size in bytes: human-readable in tables and plain text, a number of
+    bytes in the CSV and JSON exports.
+    """
+
+    def __str__(self) -> str:
+        return str(bitmath.Byte(float(self)).best_prefix(bitmath.SI))
+
+    def export(self) -> Union[int, float]:
+        return int(self) if self.is_integer() else float(self)
+
+
+def header(column: Union[str, Column]) -> str:
+    return str(column.header) if isinstance(column, Column) else column
+
+
+def field_name(column: Union[str, Column]) -> str:
+    return re.sub(r"\W+", "_", header(column).lower()).strip("_")
+
+
+class TableSpec(NamedTuple):
+    title: str
+    name: str
+    columns: Columns
+    options: Dict[str, Any]
+
+
+def count_rows(rows: Iterator[Row]) -> int:
+    return sum(1 for _ in rows)
+
+
+class ReportWriter(ABC):
+    """
+    Writes the tables of the reports.
+
+    Rows are given as iterables and written as they are consumed, except by
+    the terminal tables, so a report never holds a formatted copy of its rows.
+    Tables are cut after max_rows rows, the number of rows left out is told.
+    """
+
+    # whether the output is meant for other programs rather than people
+    machine_readable = False
+
+    def __init__(
+        self, file: Optional[TextIO] = None, max_rows: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            file (Optional[TextIO]): The output, the standard output if None.
+            max_rows (Optional[int]): Maximum number of rows written per table,
+                all of them if None.
+        """
+        self._file = file
+        self.max_rows = max_rows
+
+    @property
+    def file(self) -> TextIO:
+        # looked up when writing: the standard output may be redirected to
+        # the log file after the writer is created
+        return self._file or sys.stdout
+
+    def write_table(
+        self,
+        title: str,
+        columns: Columns,
+        rows: Iterable[Row],
+        empty_message: str = "",
+        name: Optional[str] = None,
+        **table_options: Any,
+    ) -> None:
+        """
+        Write a table.
+
+        Args:
+            title (str): The title of the table.
+            columns (Columns): The headers of the columns, or rich columns
+                carrying their style as well.
+            rows (Iterable[Row]): The rows, a list value is a multi-line cell.
+            empty_message (str): Message written instead of an empty table.
+            name (Optional[str]): Name of the report in the exports, derived
+                from the title if None.
+            table_options: Options of the rich table, only used by terminal
+                tables.
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            if empty_message:
+                self.write_message(empty_message)
+            return
+        table = TableSpec(title, name or field_name(title), columns, table_options)
+        self._write_table(table, chain([first], rows))
+
+    @abstractmethod
+    def _write_table(self, table: "TableSpec", rows: Iterator[Row]) -> None:
+        pass
+
+    def write_message(self, message: str) -> None:
+        """
+        Write a message, in rich markup.
+        """
+        rich.print(message, file=self._file)
+
+    def _write_hidden(self, title: str, hidden: int) -> None:
+        if hidden:
+            self.write_message(f"[yellow]{hidden} more rows of {title} not shown.")
+
+
+class TableWriter(ReportWriter):
+    """
+    Writes rich tables, cut after TERMINAL_MAX_ROWS rows on a terminal.
+    """
+
+    def _write_table(self, table: "TableSpec", rows: Iterator[Row]) -> None:
+        max_rows = self.max_rows
+        if max_rows is None and self.file.isatty():
+            max_rows = TERMINAL_MAX_ROWS
+        rich_table = Table(*table.columns, title=table.title, **table.options)
+        for row in islice(rows, max_rows):
+            rich_table.add_row(*(self._cell(value) for value in row))
+        hidden = count_rows(rows)
+        if hidden:
+            rich_table.caption = f"{hidden} more rows not shown"
+        rich.print(rich_table, file=self._file)
+
+    @staticmethod
+    def _cell(value: Any) -> Text:
+        # Text rather than str, so that paths are never parsed as markup
+        if isinstance(value, list):
+            return Text("\n".join(map(str, value)))
+        return Text(str(value))
+
+
+class PlainWriter(ReportWriter):
+    """
+    Writes tab separated lines, headed by the title and the headers of the
+    table, without any rich layout or markup.
+    """
+
+    def _write_table(self, table: "TableSpec", rows: Iterator[Row]) -> None:
+        file = self.file
+        file.write(f"{table.title}\n")
+        file.write("\t".join(map(header, table.columns)) + "\n")
+        file.writelines(
+            "\t".join(map(self._cell, row)) + "\n"
+            for row in islice(rows, self.max_rows)
+        )
+        self._write_hidden(table.title, count_rows(rows))
+        file.write("\n")
+
+    @staticmethod
+    def _cell(value: Any) -> str:
+        if isinstance(value, list):
+            return ", ".join(map(str, value))
+        return str(value)
+
+    def write_message(self, message: str) -> None:
+        print(Text.from_markup(message).plain, file=self.file)
+
+
+class ExportWriter(ReportWriter):
+    """
+    Base of the writers meant for other programs: messages go to the standard
+    error, so that the output only holds rows.
+    """
+
+    machine_readable = True
+
+    def write_message(self, message: str) -> None:
+        print(Text.from_markup(message).plain, file=sys.stderr)
+
+    @staticmethod
+    def _value(value: Any) -> Any:
+        return value.export() if isinstance(value, Size) else value
+
+
+class CsvWriter(ExportWriter):
+    """
+    Writes CSV rows whose first field is the name of their report, so that
+    the tables of every report can share a single file.
+    """
+
+    def _write_table(self, table: "TableSpec", rows: Iterator[Row]) -> None:
+        writer = csv.writer(self.file)
+        writer.writerow(["report", *map(field_name, table.columns)])
+        writer.writerows(
+            [table.name, *map(self._cell, row)] for row in islice(rows, self.max_rows)
+        )
+        self._write_hidden(table.title, count_rows(rows))
+
+    def _cell(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return " ".join(map(str, value))
+        return self._value(value)
+
+
+class JsonWriter(ExportWriter):
+    """
+    Writes one JSON object per row (JSON lines), with the name of its report
+    and one field per column.
+    """
+
+    def _write_table(self, table: "TableSpec", rows: Iterator[Row]) -> None:
+        names: List[str] = [field_name(column) for column in table.columns]
+        self.file.writelines(
+            json.dumps(
+                {"report": table.name, **dict(zip(names, map(self._value, row)))},
+                default=str,
+            )
+            + "\n"
+            for row in islice(rows, self.max_rows)
+        )
+        self._write_hidden(table.title, count_rows(rows))
+
+
+WRITERS = {
+    "table": TableWriter,
+    "plain": PlainWriter,
+    "csv": CsvWriter,
+    "json": JsonWriter,
+}
+
+
+def default_format(log_file: Optional[str] = None) -> str:
+    """
+    Get the format of the reports when none is given: rich tables on a
+    terminal, plain text otherwise and when logging to a file.
+    """
+    if log_file or not sys.stdout.isatty():
+        return "plain"
+    return "table"
+
+
+def make_writer(
+    output_format: Optional[str] = None,
+    max_rows: Optional[int] = None,
+    log_file: Optional[str] = None,
+) -> ReportWriter:
+    """
+    Create the writer of the reports.
+
+    Args:
+        output_format (Optional[str]): One of FORMATS, see default_format if
+            None.
+        max_rows (Optional[int]): Maximum number of rows written per table.
+        log_file (Optional[str]): Path to the log file, if any.
+
+    Returns:
+        ReportWriter: The writer, writing to the standard output.
+    """
+    return WRITERS[output_format or default_format(log_file)](max_rows=max_rows)
@@ -0,0 +1,351 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Union
+
+import rich
+
+from analyzer.analyzer_interface import AnalyserInterface, FileRecord
+from analyzer.directory_traversal import (
+    DEFAULT_OPTIONS,
+    TraversalOptions,
+    process_path,
+    start_walk,
+)
+from analyzer.utils.inodes import InodeSet, LinkPaths
+from analyzer.utils.report_writer import ReportWriter, TableWriter
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+class InotifyEvent(NamedTuple):
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """
+    Minimal inotify binding, using ctypes to call the C library directly.
+    """
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise self._error("inotify_init1")
+
+    def _error(self, function: str) -> OSError:
+        errno = ctypes.get_errno()
+        return OSError(errno, f"{function}: {os.strerror(errno)}")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """
+        Watch a directory.
+
+        Returns:
+            int: The watch descriptor. Watching the same directory twice returns
+            the same descriptor.
+
+        Raises:
+            OSError: If the directory cannot be watched, e.g. when the
+            fs.inotify.max_user_watches limit is reached.
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise self._error("inotify_add_watch")
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float) -> List[InotifyEvent]:
+        """
+        Wait up to timeout seconds for events and return all the pending ones.
+        """
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+            start = offset + EVENT_HEADER.size
+            offset = start + length
+            name = buffer[start:offset].rstrip(b"\0")
+            events.append(InotifyEvent(wd, mask, cookie, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """
+    Keep the analyzers up to date with the changes made to a directory tree.
+
+    After an initial walk, every directory of the tree is watched with inotify.
+    Created, deleted, modified, moved and chmod'ed files are re-stat'ed and
+    their previous record is replaced in every analyzer, so the statistics stay
+    current without rescanning the tree. Events are coalesced per path: a file
+    written many times between two polls is only stat'ed once.
+
+    Unless count_hardlinks is set, a file with several hard links is only
+    given to the analyzers for one of its links. When that link goes away,
+    the file is given to them again for another of its remaining links.
+    """
+
+    def __init__(
+        self,
+        root_dir: Union[str, Path],
+        analyzers: Sequence[AnalyserInterface],
+        options: TraversalOptions = DEFAULT_OPTIONS,
+        count_hardlinks: bool = False,
+    ) -> None:
+        self.root_dir = os.fspath(root_dir)
+        self.analyzers = analyzers
+        self.options = options
+        # records of all the files of the tree, counted or not
+        self.records: Dict[str, FileRecord] = {}
+        self._links = None if count_hardlinks else LinkPaths()
+        self._inotify = Inotify()
+        self._directories: Dict[int, str] = {}
+        self._pending: Set[str] = set()
+        self._warned_watch_limit = False
+
+    def scan(self) -> None:
+        """
+        Walk the whole tree, watching its directories and adding its files to
+        the analyzers.
+        """
+        self.options, _ = start_walk(self.root_dir, self.options, None)
+        self._walk(self.root_dir)
+        self._flush()
+
+    def _walk(self, root_dir: str) -> None:
+        visited = InodeSet()
+        stack = deque([root_dir])
+        while stack:
+            current_path = stack.pop()
+            # watch before listing, so that no file created meanwhile is missed
+            self._watch(current_path)
+            for entry in process_path(stack, current_path, self.options, visited):
+                self._refresh(entry.path)
+
+    def _watch(self, dir_path: str) -> None:
+        try:
+            wd = self._inotify.add_watch(dir_path, WATCH_MASK | IN_ONLYDIR)
+        except OSError as e:
+            self._warn_watch_failure(dir_path, e)
+            return
+        self._directories[wd] = dir_path
+
+    def _warn_watch_failure(self, dir_path: str, error: OSError) -> None:
+        if self._warned_watch_limit:
+            return
+        self._warned_watch_limit = True
+        rich.print(
+            f"[red]Cannot watch directory '{dir_path}': {error}. Changes to it "
+            "(and to other unwatched directories) will be missed.[/red]",
+            file=sys.stderr,
+        )
+
+    def _refresh(self, path: str) -> None:
+        """
+        Replace the record of a file in the analyzers with its current state.
+        """
+        previous = self.records.pop(path, None)
+        if previous is not None:
+            self._forget(previous)
+        record = self._stat(path)
+        if record is None:
+            return
+        self.records[path] = record
+        if self._links is None or self._links.add(record):
+            self._add(record)
+
+    def _forget(self, record: FileRecord) -> None:
+        if self._links is None:
+            self._remove(record)
+            return
+        if self._links.is_counted(record):
+            self._remove(record)
+        successor = self._links.remove(record)
+        if successor is not None:
+            self._count_instead(successor)
+
+    def _count_instead(self, path: str) -> None:
+        """
+        Count a file under another of its links, whose record may be outdated
+        as the changes made through a link are reported for that link only.
+        """
+        record = self.records[path]
+        current = self._stat(path)
+        if current is not None and (current.dev, current.inode) == (
+            record.dev,
+            record.inode,
+        ):
+            record = self.records[path] = current
+        self._add(record)
+
+    def _add(self, record: FileRecord) -> None:
+        for analyzer in self.analyzers:
+            analyzer.add_record(record)
+
+    def _remove(self, record: FileRecord) -> None:
+        for analyzer in self.analyzers:
+            analyzer.remove_record(record)
+
+    def _stat(self, path: str) -> Optional[FileRecord]:
+        if self.options.excluded.matches(os.path.basename(path), path):
+            return None
+        try:
+            record = FileRecord.from_path(path)
+        except (FileNotFoundError, OSError):
+            return None
+        return None if stat.S_ISDIR(record.mode) else record
+
+    def _forget_directory(self, dir_path: str) -> None:
+        """
+        Remove every file under a directory that was deleted or moved away.
+        """
+        prefix = os.path.join(dir_path, "")
+        for path in [path for path in self.records if path.startswith(prefix)]:
+            self._refresh(path)
+        for wd, path in list(self._directories.items()):
+            if path == dir_path or path.startswith(prefix):
+                self._inotify.rm_watch(wd)
+                del self._directories[wd]
+
+    def _handle(self, event: InotifyEvent) -> None:
+        if event.mask & IN_Q_OVERFLOW:
+            self.resync()
+            return
+        if event.mask & IN_IGNORED:
+            self._directories.pop(event.wd, None)
+            return
+        directory = self._directories.get(event.wd)
+        if directory is None:
+            return
+        path = os.path.join(directory, event.name)
+        if event.mask & IN_ISDIR:
+            self._handle_directory(event.mask, path)
+        else:
+            self._pending.add(path)
+
+    def _handle_directory(self, mask: int, dir_path: str) -> None:
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self._forget_directory(dir_path)
+        elif mask & (IN_CREATE | IN_MOVED_TO) and not self.options.excluded.matches(
+            os.path.basename(dir_path), dir_path
+        ):
+            self._walk(dir_path)
+
+    def resync(self) -> None:
+        """
+        Bring the analyzers back in sync with the tree after events were lost
+        (inotify queue overflow), by walking the tree again.
+        """
+        rich.print(
+            "[yellow]Events were lost, rescanning the directory tree...[/yellow]",
+            file=sys.stderr,
+        )
+        known = set(self.records)
+        self._pending.clear()
+        self._walk(self.root_dir)
+        for path in known.difference(self.records):
+            self._refresh(path)
+
+    def poll(self, timeout: float) -> int:
+        """
+        Process the events received during the next timeout seconds.
+
+        Returns:
+            int: The number of events processed.
+        """
+        deadline = time.monotonic() + timeout
+        count = 0
+        while True:
+            events = self._inotify.read_events(deadline - time.monotonic())
+            for event in events:
+                self._handle(event)
+            count += len(events)
+            self._apply_pending()
+            self._flush()
+            if time.monotonic() >= deadline:
+                return count
+
+    def _apply_pending(self) -> None:
+        pending, self._pending = self._pending, set()
+        for path in pending:
+            self._refresh(path)
+
+    def _flush(self) -> None:
+        for analyzer in self.analyzers:
+            analyzer.flush()
+
+    def close(self) -> None:
+        self._inotify.close()
+
+    def __enter__(self) -> "DirectoryWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def watch_directory(
+    dir_path: Union[str, Path],
+    analyzers: Sequence[AnalyserInterface],
+    interval: float,
+    options: TraversalOptions = DEFAULT_OPTIONS,
+    writer: Optional[ReportWriter] = None,
+    count_hardlinks: bool = False,
+) -> None:
+    """
+    Scan a directory tree, then keep the analyzers up to date with its changes
+    and print their reports every interval seconds, until interrupted.
+    """
+    writer = writer or TableWriter()
+    with DirectoryWatcher(dir_path, analyzers, options, count_hardlinks) as watcher:
+        watcher.scan()
+        try:
+            while True:
+                writer.write_message(
+                    f"\n[bold]Report of {datetime.now():%Y-%m-%d %H:%M:%S}[/bold]"
+                )
+                for analyzer in analyzers:
+                    analyzer.report(writer)
+                watcher.poll(interval)
+        except KeyboardInterrupt:
+            rich.print("[yellow]Stopped watching.[/yellow]")
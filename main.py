@@ -1,5 +1,6 @@
 # pylint: disable=missing-docstring
 import platform
+import signal
 import sys
 
 from rich import print as pr
@@ -21,12 +22,47 @@ def main():
         delete_files=arguments.delete_files,
     )
 
+    # Stop gracefully on SIGTERM too, e.g. when the node is drained
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
     try:
         process_directory(
             dir_path=arguments.target_dir,
             size_threshold=str(arguments.size_threshold),
             delete_files=arguments.delete_files,
             log_file=arguments.log_file,
+            jobs=arguments.jobs,
+            processes=arguments.processes,
+            follow_symlinks=arguments.follow_symlinks,
+            count_hardlinks=arguments.count_hardlinks,
+            one_file_system=arguments.one_file_system,
+            exclude=arguments.exclude,
+            index_path=arguments.index_file,
+            watch_interval=arguments.watch_interval,
+            checkpoint_path=arguments.checkpoint_file,
+            checkpoint_interval=arguments.checkpoint_interval,
+            resume=arguments.resume,
+            stream_format=arguments.stream_format,
+            stream_output=arguments.stream_output,
+            stream_gzip=arguments.stream_gzip,
+            sniff=arguments.sniff,
+            sniff_cache=arguments.sniff_cache,
+            aggregate_only=arguments.aggregate_only,
+            top_per_category=arguments.top_per_category,
+            top=arguments.top,
+            histogram=arguments.histogram,
+            histogram_thresholds=arguments.histogram_thresholds,
+            permission_rules=arguments.permission_rules,
+            output_format=arguments.output_format,
+            max_rows=arguments.max_rows,
+            dry_run=arguments.dry_run,
+            deletion_log=arguments.deletion_log,
+            duplicates=arguments.duplicates,
+            depths=arguments.depths,
+            top_directories=arguments.top_directories,
+            allocation=arguments.allocation,
+            size_basis=arguments.size_basis,
+            ages=arguments.ages,
         )
     finally:
         if arguments.log_file is not None:
@@ -1,6 +1,8 @@
+import os
 from pathlib import Path
 from typing import Dict, List, Union
 
+import bitmath
 import pytest
 from bitmath import Byte, KiB, MiB
 from pyfakefs.fake_filesystem import FakeFilesystem
@@ -162,6 +164,12 @@ fake_filesystem_files: List[Dict[str, Union[str, Byte, int]]] = [
 ]
 
 
+# files of fake_filesystem_files reported by the default permission rules, the
+# fake files are owned by the user running the tests and two more of them are
+# reported as group-writable and owned by root when it is root
+BAD_PERMISSION_FILES = 7 if os.getuid() == 0 else 5
+
+
 def create_fakefs_file(
     fs: FakeFilesystem, filepath: PathLike, mode: int = 0o644, size: Byte = Byte(100)
 ) -> Path:
@@ -199,3 +207,11 @@ def app_file_system(fs: FakeFilesystem):
             fs.remove_object(file_info["name"])
     except:  # noqa E722
         pass
+
+
+@pytest.fixture(autouse=True)
+def bitmath_format():
+    """Restore the bitmath format string the reports set globally."""
+    format_string = bitmath.format_string
+    yield
+    bitmath.format_string = format_string
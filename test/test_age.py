@@ -0,0 +1,187 @@
+import io
+import os
+import pickle
+import time
+from pathlib import Path
+
+import pytest
+
+from analyzer.age import DAY, HOUR, OLDEST, FileAge, age_bucket
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import Categorization
+from analyzer.file_processing import process_files
+from analyzer.sniffing import ContentSniffer
+from analyzer.utils.report_writer import PlainWriter
+
+NOW = 1_000 * DAY
+
+
+def make_record(path: str, size: int, modified_days: float, accessed_days: float):
+    return FileRecord(
+        path,
+        size,
+        0o100644,
+        0,
+        NOW - modified_days * DAY,
+        atime=NOW - accessed_days * DAY,
+    )
+
+
+def make_records():
+    return [
+        make_record("/data/docs/new.txt", 10, 0.5, 0.5),
+        make_record("/data/docs/old.txt", 100, 400, 2),
+        make_record("/data/videos/old.mp4", 1000, 400, 500),
+        make_record("/data/top.txt", 1, 10, 10),
+    ]
+
+
+@pytest.mark.parametrize(
+    "days, bucket", [(-1, 0), (0, 0), (0.5, 0), (1, 1), (6, 1), (29, 2), (364, 3)]
+)
+def test_age_bucket(days: float, bucket: int):
+    assert age_bucket(days * DAY) == bucket
+
+
+def test_age_bucket_oldest():
+    assert age_bucket(365 * DAY) == OLDEST
+
+
+def test_buckets_overall_per_category_and_directory():
+    ages = FileAge("/data", now=NOW)
+    for record in make_records():
+        ages.add_record(record)
+
+    total = ages.total.at(NOW)
+    assert total.modified.counts.tolist() == [1, 0, 1, 0, 2]
+    assert total.modified.sizes.tolist() == [10, 0, 1, 0, 1100]
+    assert total.accessed.sizes.tolist() == [10, 100, 1, 0, 1000]
+    assert ages.categories["Text"].files == 3
+    assert ages.categories["Video"].at(NOW).accessed.sizes[OLDEST] == 1000
+    assert sorted(ages.directories) == ["/data", "/data/docs", "/data/videos"]
+    assert ages.directories["/data/docs"].size == 110
+    assert ages.directories["/data"].at(NOW).modified.counts[2] == 1
+
+
+def test_groups_are_counted_per_day():
+    ages = FileAge("/data", now=NOW)
+    for hour in range(24):
+        ages.add_record(make_record(f"/data/logs/{hour}.log", 1, 2 + hour / 24, 2))
+
+    assert len(ages.total.modified.counts) == 24
+    assert len(ages.directories["/data/logs"].modified.counts) <= 2
+    assert len(ages.categories["Text"].modified.counts) <= 2
+    logs = ages.directories["/data/logs"].at(NOW)
+    assert logs.modified.counts[1] == 24
+    assert ages.total.at(NOW + HOUR).modified.counts[1] == 24
+
+
+def test_unknown_access_time_falls_back_to_modification_time():
+    ages = FileAge("/data", now=NOW)
+    ages.add_record(FileRecord("/data/file", 10, 0o100644, 0, NOW - 400 * DAY))
+
+    assert ages.total.at(NOW).accessed.sizes[OLDEST] == 10
+
+
+def test_remove_record_and_merge():
+    first, second = FileAge("/data", now=NOW), FileAge("/data", now=NOW)
+    records = make_records()
+    for record in records[:2]:
+        first.add_record(record)
+    for record in records[2:]:
+        second.add_record(record)
+
+    first.merge(pickle.loads(pickle.dumps(second)))
+    assert first.total.files == 4
+    assert first.directories["/data/videos"].size == 1000
+
+    for record in records:
+        first.remove_record(record)
+    assert first.total.files == 0
+    assert first.categories["Text"].accessed.size == 0
+
+
+def test_scan(tmp_path: Path):
+    (tmp_path / "cold").mkdir()
+    cold = tmp_path / "cold" / "archive.zip"
+    cold.write_bytes(b"x" * 100)
+    old = os.stat(cold).st_mtime - 400 * DAY
+    os.utime(cold, (old, old))
+    (tmp_path / "hot.txt").write_bytes(b"x" * 10)
+
+    ages = FileAge(tmp_path)
+    process_files(tmp_path, ages)
+
+    now = time.time()
+    cold_ages = ages.directories[str(tmp_path / "cold")].at(now)
+    assert cold_ages.accessed.sizes[OLDEST] == 100
+    assert ages.directories[str(tmp_path)].at(now).modified.sizes[0] == 10
+
+
+def test_report():
+    ages = FileAge("/data", now=NOW)
+    for record in make_records():
+        ages.add_record(record)
+    output = io.StringIO()
+    ages.report(PlainWriter(output))
+
+    report = output.getvalue()
+    assert "File Age" in report
+    assert "Stale Data per Category" in report
+    assert "Stale Data per Top-Level Directory" in report
+    assert "/data/videos" in report
+
+
+def test_report_no_files():
+    output = io.StringIO()
+    FileAge().report(PlainWriter(output))
+
+    assert "No files to compute the age of." in output.getvalue()
+
+
+def test_sniffed_categories(tmp_path: Path):
+    (tmp_path / "program").write_bytes(b"\x7fELF" + b"\x00" * 100)
+    sniffer = ContentSniffer()
+    categorization = Categorization(sniffer)
+    ages = FileAge(tmp_path, resolver=categorization.resolver)
+    process_files(tmp_path, categorization, ages)
+    sniffer.close()
+
+    assert list(ages.categories) == ["Executable"]
+
+
+def test_ages_are_computed_when_reporting(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(time, "time", lambda: NOW)
+    ages = FileAge("/data")
+    ages.add_record(make_record("/data/file.txt", 10, 0.5, 0.5))
+    assert ages.total.at(NOW).modified.counts[0] == 1
+
+    # a watch reporting 10 days later
+    monkeypatch.setattr(time, "time", lambda: NOW + 10 * DAY)
+    output = io.StringIO()
+    ages.report(PlainWriter(output))
+    assert "< 30 days\t1\t" in output.getvalue()
+
+    # once a year old, the file is only counted as old
+    ages.fold(NOW + 400 * DAY)
+    assert ages.total.modified.counts == {}
+    assert ages.total.modified.old_count == 1
+    ages.remove_record(make_record("/data/file.txt", 10, 0.5, 0.5))
+    assert ages.total.files == 0
+
+
+def test_merge_scans_started_at_different_times():
+    first, second = FileAge("/data", now=NOW), FileAge("/data", now=NOW + 100 * DAY)
+    # old for the second scan only
+    record = make_record("/data/file.txt", 10, 300, 300)
+    first.add_record(record)
+    second.add_record(record)
+    assert second.total.modified.old_count == 1
+
+    first.merge(second)
+
+    assert first.cutoff == second.cutoff
+    later = first.total.at(NOW + 100 * DAY)
+    assert later.modified.counts.tolist() == [0, 0, 0, 0, 2]
+    first.remove_record(record)
+    assert first.total.files == 1
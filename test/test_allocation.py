@@ -0,0 +1,103 @@
+import io
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from analyzer.allocation import SpaceAllocation, SparseFile, data_size
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import Categorization
+from analyzer.file_processing import process_files
+from analyzer.sniffing import ContentSniffer
+from analyzer.utils.report_writer import PlainWriter
+
+MIB = 1024 * 1024
+
+
+def make_sparse(path: Path) -> str:
+    with open(path, "wb") as file:
+        file.truncate(4 * MIB)
+        file.seek(-4096, os.SEEK_END)
+        file.write(b"x" * 4096)
+    return str(path)
+
+
+@pytest.fixture
+def sparse_file(tmp_path: Path) -> str:
+    path = make_sparse(tmp_path / "disk.img")
+    if os.stat(path).st_blocks * 512 >= 4 * MIB:
+        pytest.skip("the file system does not support sparse files")
+    return path
+
+
+def test_data_size(sparse_file: str, tmp_path: Path):
+    assert data_size(sparse_file, 4 * MIB) < 4 * MIB
+    dense = tmp_path / "dense"
+    dense.write_bytes(b"x" * 8192)
+    assert data_size(str(dense), 8192) == 8192
+
+
+def test_sparse_files(sparse_file: str, tmp_path: Path):
+    (tmp_path / "dense.txt").write_bytes(b"x" * 100)
+    allocation = SpaceAllocation()
+    process_files(tmp_path, allocation)
+
+    [entry] = allocation.sparse_files()
+    assert isinstance(entry, SparseFile)
+    assert entry.path == sparse_file
+    assert entry.size == 4 * MIB
+    assert entry.holes == entry.size - entry.data > 0
+
+
+def test_slack_per_category():
+    allocation = SpaceAllocation()
+    allocation.add_record(FileRecord("/a.txt", 100, 0o100644, 1, 0, blocks=8))
+    allocation.add_record(FileRecord("/b.txt", 4096, 0o100644, 2, 0, blocks=8))
+    allocation.add_record(FileRecord("/c.mp4", 5000, 0o100644, 3, 0, blocks=16))
+
+    text = allocation.categories["Text"]
+    assert (text.files, text.size, text.allocated, text.slack) == (2, 4196, 8192, 3996)
+    assert allocation.categories["Video"].slack == 8192 - 5000
+
+
+def test_remove_record_and_merge():
+    first, second = SpaceAllocation(), SpaceAllocation()
+    record = FileRecord("/a.txt", 100, 0o100644, 1, 0, blocks=8)
+    sparse = FileRecord("/disk.img", MIB, 0o100644, 2, 0, blocks=8)
+    first.add_record(record)
+    second.add_record(sparse)
+    second.add_record(record)
+
+    first.merge(pickle.loads(pickle.dumps(second)))
+    assert first.categories["Text"].slack == 2 * (4096 - 100)
+    assert list(first.candidates) == ["/disk.img"]
+
+    first.remove_record(sparse)
+    first.remove_record(record)
+    assert first.categories["Text"].files == 1
+    assert first.candidates == {}
+
+
+def test_report(sparse_file: str):
+    allocation = SpaceAllocation()
+    allocation.add(sparse_file)
+    output = io.StringIO()
+    allocation.report(PlainWriter(output))
+
+    report = output.getvalue()
+    assert "Sparse Files (top 10)" in report
+    assert sparse_file in report
+    assert "Slack Space per Category" in report
+
+
+def test_sniffed_categories(tmp_path: Path):
+    (tmp_path / "program").write_bytes(b"\x7fELF" + b"\x00" * 100)
+    sniffer = ContentSniffer()
+    categorization = Categorization(sniffer)
+    allocation = SpaceAllocation(resolver=categorization.resolver)
+    process_files(tmp_path, categorization, allocation)
+    sniffer.close()
+
+    assert list(allocation.categories) == ["Executable"]
+    assert allocation.categories["Executable"].files == 1
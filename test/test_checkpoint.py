@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import pytest
+
+from analyzer.age import FileAge
+from analyzer.analyzer_interface import AnalyserInterface
+from analyzer.checkpoint import Checkpoint
+from analyzer.directory_traversal import TraversalOptions
+from analyzer.file_processing import feed_analyzers, process_files
+from analyzer.histogram import SizeHistogram
+from analyzer.summary import Summary
+from analyzer.utils.inodes import HardLinks
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    root = tmp_path / "tree"
+    for index in range(12):
+        directory = root / f"dir_{index % 3}" / f"sub_{index % 2}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file_{index}.txt").write_bytes(b"x" * index)
+    (root / "top.mp4").write_bytes(b"x" * 100)
+    return root
+
+
+def interrupted_scan(
+    tree: Path, checkpoint: Checkpoint, files: int, *analyzers: AnalyserInterface
+) -> None:
+    analyzers = analyzers or (Summary(),)
+    links = HardLinks()
+    entries = checkpoint.scan_tree(tree, analyzers, links)
+    feed_analyzers((entry for _, entry in zip(range(files), entries)), analyzers, links)
+    entries.close()
+
+
+def test_resume_completes_interrupted_scan(tree: Path, tmp_path: Path):
+    checkpoint = Checkpoint(tmp_path / "scan.checkpoint", interval=0)
+    interrupted_scan(tree, checkpoint, files=5)
+    assert Path(checkpoint.checkpoint_path).exists()
+
+    resumed = Summary()
+    process_files(tree, resumed, checkpoint=checkpoint, resume=True)
+    expected = Summary()
+    process_files(tree, expected)
+
+    assert resumed.total_files == expected.total_files == 13
+    assert resumed.total_size == expected.total_size
+    assert not Path(checkpoint.checkpoint_path).exists()
+
+
+def test_without_resume_starts_over(tree: Path, tmp_path: Path):
+    checkpoint = Checkpoint(tmp_path / "scan.checkpoint", interval=0)
+    interrupted_scan(tree, checkpoint, files=5)
+
+    summary = Summary()
+    process_files(tree, summary, checkpoint=checkpoint)
+
+    assert summary.total_files == 13
+
+
+def test_checkpoint_of_another_scan_is_ignored(tree: Path, tmp_path: Path):
+    checkpoint = Checkpoint(tmp_path / "scan.checkpoint", interval=0)
+    interrupted_scan(tree, checkpoint, files=5)
+
+    summary = Summary()
+    options = TraversalOptions(exclude=("*.mp4",))
+    process_files(tree, summary, options=options, checkpoint=checkpoint, resume=True)
+
+    assert summary.total_files == 12
+
+
+@pytest.mark.parametrize(
+    "analyzer",
+    [
+        pytest.param(lambda tree: FileAge(tree), id="other analyzer"),
+        pytest.param(lambda tree: SizeHistogram(["1 KiB"]), id="other settings"),
+    ],
+)
+def test_checkpoint_of_other_analyzers_is_ignored(
+    tree: Path, tmp_path: Path, capsys: pytest.CaptureFixture, analyzer
+):
+    checkpoint = Checkpoint(tmp_path / "scan.checkpoint", interval=0)
+    interrupted_scan(tree, checkpoint, 5, Summary(), SizeHistogram())
+
+    summary = Summary()
+    process_files(tree, summary, analyzer(tree), checkpoint=checkpoint, resume=True)
+
+    assert "was taken for another scan" in capsys.readouterr().err
+    assert summary.total_files == 13
+
+
+def test_corrupted_checkpoint_is_ignored(tree: Path, tmp_path: Path):
+    checkpoint_path = tmp_path / "scan.checkpoint"
+    checkpoint_path.write_bytes(b"not a checkpoint")
+
+    summary = Summary()
+    checkpoint = Checkpoint(checkpoint_path)
+    process_files(tree, summary, checkpoint=checkpoint, resume=True)
+
+    assert summary.total_files == 13
+    assert not checkpoint_path.exists()
@@ -0,0 +1,103 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from analyzer.deletion import (
+    BulkDeleter,
+    DeletionSummary,
+    delete_in_directory,
+    group_by_parent,
+    split_groups,
+)
+
+
+@pytest.fixture
+def files(tmp_path: Path):
+    paths = []
+    for index in range(30):
+        directory = tmp_path / f"dir_{index % 3}"
+        directory.mkdir(exist_ok=True)
+        path = directory / f"file_{index}.bin"
+        path.write_bytes(b"x" * 100)
+        paths.append(path)
+    return paths
+
+
+def test_group_by_parent():
+    assert group_by_parent(["/a/b", "/a/c", "/d/e", "f"]) == {
+        "/a": ["b", "c"],
+        "/d": ["e"],
+        ".": ["f"],
+    }
+
+
+def test_split_groups():
+    chunks = list(split_groups({"/a": ["1", "2", "3"], "/b": ["4"]}, chunk_size=2))
+    assert chunks == [("/a", ["1", "2"]), ("/a", ["3"]), ("/b", ["4"])]
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_delete(files, jobs):
+    summary = BulkDeleter(jobs=jobs).delete(files)
+
+    assert not any(path.exists() for path in files)
+    assert summary.deleted == 30
+    assert summary.failed == 0
+    assert summary.bytes_freed == 3000
+    assert "Deleted 30 files, freed 3.0 kB" in summary.message()
+
+
+def test_dry_run(files, tmp_path: Path):
+    log_path = tmp_path / "deleted.jsonl"
+    summary = BulkDeleter(dry_run=True, log_path=str(log_path)).delete(files)
+
+    assert all(path.exists() for path in files)
+    assert summary.deleted == 30
+    assert summary.bytes_freed == 3000
+    assert summary.message().startswith("[yellow]Dry run: would delete 30 files")
+    lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(lines) == 30
+    assert all(line["dry_run"] and not line["deleted"] for line in lines)
+
+
+def test_log_and_errors(files, tmp_path: Path, capsys: pytest.CaptureFixture):
+    log_path = tmp_path / "deleted.jsonl"
+    missing = tmp_path / "dir_0" / "missing"
+    summary = BulkDeleter(log_path=str(log_path)).delete(
+        [files[0], missing, tmp_path / "missing_dir" / "file"]
+    )
+
+    assert summary.deleted == 1
+    assert summary.failed == 2
+    assert "2 files could not be deleted." in summary.message()
+    # rich wraps the lines at the width of the terminal
+    assert f"Error deleting file {missing}" in capsys.readouterr().err.replace("\n", "")
+    lines = {
+        line["path"]: line for line in map(json.loads, log_path.open(encoding="utf-8"))
+    }
+    assert lines[str(files[0])]["deleted"]
+    assert lines[str(files[0])]["size"] == 100
+    assert not lines[str(missing)]["deleted"]
+    assert lines[str(missing)]["error"] == "No such file or directory"
+
+
+def test_hard_links_free_nothing(tmp_path: Path):
+    (tmp_path / "data").write_bytes(b"x" * 100)
+    os.link(tmp_path / "data", tmp_path / "link")
+
+    results = delete_in_directory(str(tmp_path), ["link"])
+
+    assert results[0].size == 0
+    assert results[0].error is None
+    assert not (tmp_path / "link").exists()
+
+
+def test_directories_are_not_deleted(tmp_path: Path):
+    (tmp_path / "directory").mkdir()
+
+    summary = BulkDeleter().delete([tmp_path / "directory"])
+
+    assert summary == DeletionSummary(failed=1, elapsed=summary.elapsed)
+    assert (tmp_path / "directory").is_dir()
@@ -1,3 +1,4 @@
+import errno
 import os
 from pathlib import Path
 from test.conftest import fake_filesystem_files
@@ -5,7 +6,14 @@ from test.conftest import fake_filesystem_files
 import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
 
-from analyzer.directory_traversal import walk_through_dir
+from analyzer import directory_traversal
+from analyzer.directory_traversal import (
+    TraversalOptions,
+    parallel_scan_tree,
+    scan_tree,
+    split_tree,
+    walk_through_dir,
+)
 
 
 def test_normal_walk_through_dir(fs: FakeFilesystem, app_file_system):  # noqa F811
@@ -68,3 +76,198 @@ def test_walk_through_dir_with_permission_error(
     # Root user doesn't have permission issues
     if os.getuid() != 0:
         assert "Permission error accessing directory" in capsys.readouterr().err
+
+
+def test_scan_tree_yields_dir_entries(fs: FakeFilesystem, app_file_system):  # noqa F811
+    entries = list(scan_tree("/root_dir"))
+    assert len(entries) == len(fake_filesystem_files)
+    assert all(entry.is_file() for entry in entries)
+    assert sorted(entry.path for entry in entries) == sorted(
+        str(item["name"]) for item in fake_filesystem_files
+    )
+
+
+def test_scan_tree_entries_carry_stat(fs: FakeFilesystem, app_file_system):  # noqa F811
+    sizes = {entry.path: entry.stat().st_size for entry in scan_tree("/root_dir")}
+    for item in fake_filesystem_files:
+        assert sizes[str(item["name"])] == int(item["size"])
+
+
+@pytest.mark.parametrize("jobs", [1, 2, 8])
+def test_parallel_scan_tree_matches_serial_walk(
+    fs: FakeFilesystem, app_file_system, jobs: int  # noqa F811
+):
+    serial = sorted(entry.path for entry in scan_tree("/root_dir"))
+    parallel = sorted(entry.path for entry in parallel_scan_tree("/root_dir", jobs))
+    assert parallel == serial
+
+
+def test_parallel_scan_tree_stops_early(
+    fs: FakeFilesystem, app_file_system  # noqa F811
+):
+    entries = parallel_scan_tree("/root_dir", 4)
+    first = next(entries)
+    entries.close()
+    assert first.path in [str(item["name"]) for item in fake_filesystem_files]
+
+
+@pytest.mark.parametrize("min_shards", [1, 4, 100])
+def test_split_tree_covers_every_file_once(
+    fs: FakeFilesystem, app_file_system, min_shards: int  # noqa F811
+):
+    files, shards = split_tree("/root_dir", min_shards)
+    output = [entry.path for entry in files]
+    for shard in shards:
+        output.extend(entry.path for entry in scan_tree(shard))
+
+    assert sorted(output) == sorted(str(item["name"]) for item in fake_filesystem_files)
+    if min_shards == 1:
+        assert shards == ["/root_dir"]
+    else:
+        assert len(shards) >= min_shards or not shards
+
+
+def test_walk_through_dir_skips_symlinked_directories(
+    fs: FakeFilesystem, app_file_system  # noqa F811
+):
+    fs.create_symlink("/root_dir/link_to_parent1", "/root_dir/parent1")
+
+    output = [entry.path for entry in scan_tree("/root_dir")]
+    assert len(output) == len(fake_filesystem_files)
+    assert not any(path.startswith("/root_dir/link_to_parent1") for path in output)
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_follow_symlinks_walks_each_directory_once(
+    fs: FakeFilesystem, app_file_system, jobs: int  # noqa F811
+):
+    fs.create_symlink("/root_dir/parent1/child1/loop", "/root_dir")
+    fs.create_file("/outside/file.txt")
+    fs.create_symlink("/root_dir/outside", "/outside")
+    options = TraversalOptions(follow_symlinks=True)
+
+    if jobs == 1:
+        output = [entry.path for entry in scan_tree("/root_dir", options)]
+    else:
+        output = [entry.path for entry in parallel_scan_tree("/root_dir", 4, options)]
+
+    assert len(output) == len(fake_filesystem_files) + 1
+    assert "/root_dir/outside/file.txt" in output
+
+
+def test_exclude_patterns_prune_subtrees(
+    fs: FakeFilesystem, app_file_system, mocker  # noqa F811
+):
+    scandir = mocker.spy(os, "scandir")
+    options = TraversalOptions(exclude=("parent2", "*.txt", "/root_dir/parent5/child4"))
+
+    output = [entry.path for entry in scan_tree("/root_dir", options)]
+
+    expected = [
+        str(item["name"])
+        for item in fake_filesystem_files
+        if "/parent2/" not in str(item["name"])
+        and "/parent5/child4/" not in str(item["name"])
+        and not str(item["name"]).endswith(".txt")
+    ]
+    assert sorted(output) == sorted(expected)
+    listed = [str(call.args[0]) for call in scandir.call_args_list]
+    assert not any(
+        path.startswith(("/root_dir/parent2", "/root_dir/parent5/child4"))
+        for path in listed
+    )
+
+
+def test_one_file_system(fs: FakeFilesystem, app_file_system):  # noqa F811
+    fs.add_mount_point("/root_dir/mounted")
+    fs.create_file("/root_dir/mounted/file.txt")
+
+    crossing = [entry.path for entry in scan_tree("/root_dir")]
+    staying = [
+        entry.path
+        for entry in scan_tree("/root_dir", TraversalOptions(one_file_system=True))
+    ]
+
+    assert "/root_dir/mounted/file.txt" in crossing
+    assert "/root_dir/mounted/file.txt" not in staying
+    assert len(staying) == len(fake_filesystem_files)
+
+
+def test_scan_tree_yields_directories(fs: FakeFilesystem, app_file_system):  # noqa F811
+    options = TraversalOptions(directories=True)
+    entries = list(scan_tree("/root_dir", options))
+    directories = {entry.path for entry in entries if entry.is_dir()}
+
+    assert len(entries) - len(directories) == len(fake_filesystem_files)
+    assert "/root_dir" not in directories
+    assert directories == {
+        str(parent)
+        for item in fake_filesystem_files
+        for parent in Path(str(item["name"])).parents
+        if str(parent).startswith("/root_dir/")
+    }
+
+
+@pytest.fixture
+def vanishing_directories(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """A tree whose two subdirectories disappear before they are listed."""
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "file").write_bytes(b"x")
+    vanished = {str(tmp_path / "a"), str(tmp_path / "b")}
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if os.fspath(path) in vanished:
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    return tmp_path
+
+
+def test_scan_tree_skips_vanished_directories(
+    vanishing_directories: Path, capsys: pytest.CaptureFixture
+):
+    entries = [entry.path for entry in scan_tree(vanishing_directories)]
+
+    assert entries == [str(vanishing_directories / "c" / "file")]
+    err = capsys.readouterr().err.replace("\n", "")
+    assert f"Error accessing directory '{vanishing_directories / 'a'}'" in err
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parallel_scan_tree_skips_vanished_directories(
+    vanishing_directories: Path, jobs: int
+):
+    entries = [entry.path for entry in parallel_scan_tree(vanishing_directories, jobs)]
+
+    assert entries == [str(vanishing_directories / "c" / "file")]
+
+
+def test_parallel_scan_tree_raises_worker_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    (tmp_path / "a").mkdir()
+
+    def failing_scandir(path):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    with pytest.raises(RuntimeError, match="broken"):
+        list(parallel_scan_tree(tmp_path, 2))
+
+
+def test_parallel_scan_tree_bounds_pending_batches(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(directory_traversal, "MAX_BATCHES", 1)
+    for index in range(20):
+        (tmp_path / str(index)).mkdir()
+        (tmp_path / str(index) / "file").write_bytes(b"x")
+    walker = directory_traversal.ParallelWalker(tmp_path, 4)
+
+    entries = iter(walker)
+    first = next(entries)
+    assert walker._batches.qsize() <= 1
+    assert len([first, *entries]) == 20
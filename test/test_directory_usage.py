@@ -0,0 +1,105 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.directory_traversal import TraversalOptions
+from analyzer.directory_usage import DirectoryTotal, DirectoryUsage
+from analyzer.file_processing import process_files
+from analyzer.utils.report_writer import PlainWriter
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    for path, size in [
+        ("top.bin", 1),
+        ("a/a.bin", 10),
+        ("a/x/x.bin", 100),
+        ("a/x/y/y.bin", 1000),
+        ("b/b.bin", 500),
+        ("b/z/z.bin", 20),
+    ]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(b"x" * size)
+    (tmp_path / "b" / "empty").mkdir()
+    return tmp_path
+
+
+def apparent(totals):
+    # the allocated sizes depend on the file system
+    return [total[:4] for total in totals]
+
+
+def test_heaviest(tree: Path):
+    usage = DirectoryUsage(tree, depths=[1, 2], top=2)
+    process_files(tree, usage, options=TraversalOptions(directories=True))
+
+    assert apparent(usage.heaviest()) == [
+        (1, os.path.join(tree, "a"), 1110, 3),
+        (1, os.path.join(tree, "b"), 520, 2),
+        (2, os.path.join(tree, "a", "x"), 1100, 2),
+        (2, os.path.join(tree, "b", "z"), 20, 1),
+    ]
+    totals = usage.totals()
+    assert (totals.sizes[0], totals.counts[0]) == (1631, 6)
+    assert totals.allocated[0] >= totals.sizes[0]
+
+
+def test_empty_directories(tree: Path):
+    usage = DirectoryUsage(tree, depths=[2], top=10)
+    process_files(tree, usage, options=TraversalOptions(directories=True))
+
+    empty = DirectoryTotal(2, os.path.join(tree, "b", "empty"), 0, 0)
+    assert empty in usage.heaviest()
+
+
+def test_processes_match_serial(tree: Path):
+    serial, sharded = DirectoryUsage(tree, [1, 2, 3]), DirectoryUsage(tree, [1, 2, 3])
+
+    process_files(tree, serial)
+    process_files(tree, sharded, processes=2)
+
+    assert serial.heaviest() == sharded.heaviest()
+
+
+def test_remove_record(tree: Path):
+    usage = DirectoryUsage(tree)
+    process_files(tree, usage)
+
+    usage.remove_record(FileRecord.from_path(tree / "a" / "x" / "y" / "y.bin"))
+
+    assert apparent(usage.heaviest())[0] == (1, os.path.join(tree, "b"), 520, 2)
+
+
+def test_relative_root(tree: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.chdir(tree)
+    usage = DirectoryUsage(".", top=1)
+    process_files(".", usage)
+
+    assert apparent(usage.heaviest()) == [(1, os.path.join(".", "a"), 1110, 3)]
+
+
+def test_report(tree: Path):
+    usage = DirectoryUsage(tree, top=1)
+    process_files(tree, usage)
+    output = io.StringIO()
+
+    usage.report(PlainWriter(output))
+
+    header, row = output.getvalue().splitlines()[1:3]
+    assert header == "Depth\tDirectory\tSize\tAllocated\tSlack\tFiles\tShare"
+    assert row.startswith(f"1\t{os.path.join(tree, 'a')}\t1.11 kB\t")
+    assert row.endswith("\t3\t68.1%")
+
+
+def test_allocated_size_basis():
+    usage = DirectoryUsage("/", size_basis="allocated")
+    usage.add_record(FileRecord("/a/data", 100, 0o100644, 1, 0.0, blocks=8))
+    usage.add_record(FileRecord("/b/image", 8192, 0o100644, 2, 0.0, blocks=0))
+
+    assert usage.heaviest() == [
+        DirectoryTotal(1, "/a", 100, 1, 4096, 3996),
+        DirectoryTotal(1, "/b", 8192, 1, 0, 0),
+    ]
@@ -0,0 +1,104 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.duplicates import PARTIAL_SIZE, DuplicateFinder, DuplicateGroup
+from analyzer.file_processing import process_files
+from analyzer.utils.report_writer import PlainWriter
+
+LARGE = 3 * PARTIAL_SIZE
+
+
+def write(path: Path, content: bytes) -> str:
+    path.write_bytes(content)
+    return str(path)
+
+
+@pytest.fixture
+def tree(tmp_path: Path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    large = b"x" * LARGE
+    # same first and last bytes, different middle
+    other_large = b"x" * PARTIAL_SIZE + b"y" * PARTIAL_SIZE + b"x" * PARTIAL_SIZE
+    return {
+        "small": [
+            write(tmp_path / "a" / "small", b"small"),
+            write(tmp_path / "b" / "small", b"small"),
+        ],
+        "small_other": write(tmp_path / "b" / "small_other", b"other"),
+        "large": [
+            write(tmp_path / "a" / "large", large),
+            write(tmp_path / "b" / "large", large),
+            write(tmp_path / "large", large),
+        ],
+        "large_other": write(tmp_path / "b" / "large_other", other_large),
+        "empty": [
+            write(tmp_path / "a" / "empty", b""),
+            write(tmp_path / "b" / "empty", b""),
+        ],
+    }
+
+
+def test_duplicates(tree, tmp_path: Path):
+    finder = DuplicateFinder(threads=2)
+    process_files(tmp_path, finder)
+
+    assert finder.duplicates() == [
+        DuplicateGroup(LARGE, sorted(tree["large"])),
+        DuplicateGroup(5, sorted(tree["small"])),
+    ]
+    assert finder.duplicates()[0].reclaimable == 2 * LARGE
+
+
+def test_hard_links_are_not_duplicates(tmp_path: Path):
+    write(tmp_path / "data", b"data")
+    os.link(tmp_path / "data", tmp_path / "link")
+    finder = DuplicateFinder()
+
+    process_files(tmp_path, finder, count_hardlinks=True)
+
+    assert finder.duplicates() == []
+
+
+def test_unreadable_files_are_dropped(tmp_path: Path):
+    finder = DuplicateFinder()
+    finder.add(write(tmp_path / "first", b"data"))
+    finder.add(write(tmp_path / "second", b"data"))
+    os.remove(tmp_path / "second")
+
+    assert finder.duplicates() == []
+
+
+def test_remove_record_and_merge(tree):
+    first, second = DuplicateFinder(), DuplicateFinder()
+    first.add(tree["small"][0])
+    second.add(tree["small"][1])
+    assert first.duplicates() == []
+
+    first.merge(second)
+    assert first.duplicates() == [DuplicateGroup(5, sorted(tree["small"]))]
+
+    first.remove_record(FileRecord.from_path(tree["small"][1]))
+    assert first.duplicates() == []
+
+
+def test_report(tree, tmp_path: Path):
+    finder = DuplicateFinder()
+    process_files(tmp_path, finder)
+    output = io.StringIO()
+
+    finder.report(PlainWriter(output))
+
+    lines = output.getvalue().splitlines()
+    assert lines[:2] == ["Duplicate Files", "Files\tCopies\tSize\tReclaimable"]
+    assert lines[2].startswith(", ".join(sorted(tree["large"])) + "\t3\t")
+    assert "reclaimable from 2 groups of duplicates." in lines[-1]
+
+
+def test_report_without_duplicates(capsys: pytest.CaptureFixture):
+    DuplicateFinder().report()
+    assert "No duplicate files found." in capsys.readouterr().out
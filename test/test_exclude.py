@@ -0,0 +1,39 @@
+import pickle
+
+import pytest
+
+from analyzer.utils.exclude import ExcludeMatcher
+
+
+def test_empty_matcher():
+    matcher = ExcludeMatcher()
+    assert not matcher
+    assert not matcher.matches("file.txt", "/root/file.txt")
+
+
+@pytest.mark.parametrize(
+    "name, path, excluded",
+    [
+        ("file.log", "/var/log/file.log", True),
+        ("node_modules", "/src/app/node_modules", True),
+        ("proc", "/proc", True),
+        ("proc", "/home/proc", False),
+        ("objects", "/src/.git/objects", True),
+        ("file.txt", "/src/file.txt", False),
+    ],
+)
+def test_matches(name: str, path: str, excluded: bool):
+    matcher = ExcludeMatcher(["*.log", "node_modules", "/proc/", "*/.git/objects"])
+    assert matcher
+    assert matcher.matches(name, path) is excluded
+
+
+def test_name_patterns_do_not_match_across_directories():
+    matcher = ExcludeMatcher(["c*e"])
+    assert matcher.matches("cache", "/cx/cache")
+    assert not matcher.matches("ye", "/a/cx/ye")
+
+
+def test_pickle():
+    matcher = pickle.loads(pickle.dumps(ExcludeMatcher(["*.log"])))
+    assert matcher.matches("file.log", "/file.log")
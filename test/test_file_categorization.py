@@ -5,7 +5,13 @@ import bitmath
 import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
 
-from analyzer.categorization import Categorization
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import (
+    Categorization,
+    build_category_index,
+    get_category,
+    split_extension,
+)
 
 
 @pytest.fixture(scope="function")
@@ -141,3 +147,141 @@ def test_report_output(categorization, capsys: pytest.CaptureFixture):
     assert "Development" in captured.out
     assert "Archive" in captured.out
     assert "Audio" in captured.out
+
+
+def test_merge(fs: FakeFilesystem):
+    fs.create_file("/a.txt", contents="text")
+    fs.create_file("/b.txt", contents="more text")
+    fs.create_file("/c.mp4", contents="video")
+    first, second = Categorization(keep_files=True), Categorization(keep_files=True)
+    first.add(Path("/a.txt"))
+    second.add(Path("/b.txt"))
+    second.add(Path("/c.mp4"))
+
+    first.merge(second)
+
+    assert first.category_data["Text"].number_of_files == 2
+    assert first.category_data["Text"].total_size == len("text") + len("more text")
+    assert [row.path for row in first.files if row.category == "Text"] == [
+        "/a.txt",
+        "/b.txt",
+    ]
+    assert first.category_data["Video"].number_of_files == 1
+
+
+def test_remove_record(fs: FakeFilesystem):
+    categorization_instance = Categorization(keep_files=True)
+    records = [
+        FileRecord("/a.txt", 10, 0o100644, 1, 0.0),
+        FileRecord("/b.txt", 20, 0o100644, 2, 0.0),
+        FileRecord("/c.mp4", 30, 0o100644, 3, 0.0),
+    ]
+    for record in records:
+        categorization_instance.add_record(record)
+
+    categorization_instance.remove_record(records[0])
+    categorization_instance.remove_record(records[2])
+
+    assert list(categorization_instance.category_data) == ["Text"]
+    assert categorization_instance.category_data["Text"].number_of_files == 1
+    assert categorization_instance.category_data["Text"].total_size == 20
+    assert [row.path for row in categorization_instance.files] == ["/b.txt"]
+
+
+def test_build_category_index_first_category_wins():
+    index = build_category_index({"A": [".x", ".Y"], "B": [".x", ".z"]})
+    assert index == {".x": "A", ".y": "A", ".z": "B"}
+
+
+@pytest.mark.parametrize(
+    "path, extension, category",
+    [
+        ("/src/script.py", ".py", "Development"),
+        ("/src/README", "", "NoExtension"),
+        ("/backup/site.tar.gz", ".tar.gz", "Archive"),
+        ("/backup/SITE.TAR.GZ", ".TAR.GZ", "Archive"),
+        ("/backup/site.v2.gz", ".gz", "Archive"),
+        ("/src/types/index.d.ts", ".d.ts", "Development"),
+        ("/home/.bashrc", "", "NoExtension"),
+        ("/home/.tar.gz", ".gz", "Archive"),
+        ("/data/file.unknown", ".unknown", "Other"),
+    ],
+)
+def test_split_extension(path: str, extension: str, category: str):
+    assert split_extension(path) == extension
+    assert get_category(extension) == category
+
+
+def test_compound_extension_is_categorized(fs: FakeFilesystem):
+    fs.create_file("/site.tar.gz", contents="archive")
+    categorization_instance = Categorization()
+
+    categorization_instance.add(Path("/site.tar.gz"))
+
+    assert list(categorization_instance.category_data) == ["Archive"]
+    assert list(categorization_instance.category_data["Archive"].extensions) == [
+        ".tar.gz"
+    ]
+
+
+def test_extension_counters(fs: FakeFilesystem):
+    categorization_instance = Categorization()
+    for record in [
+        FileRecord("/a.txt", 10, 0o100644, 1, 0.0),
+        FileRecord("/b.txt", 20, 0o100644, 2, 0.0),
+        FileRecord("/c.log", 5, 0o100644, 3, 0.0),
+    ]:
+        categorization_instance.add_record(record)
+
+    extensions = categorization_instance.category_data["Text"].extensions
+    assert {
+        extension: (info.number_of_files, info.total_size)
+        for extension, info in extensions.items()
+    } == {".txt": (2, 30), ".log": (1, 5)}
+
+
+def test_aggregate_only_keeps_top_k(capsys: pytest.CaptureFixture):
+    categorization_instance = Categorization(keep_files=False, top_k=2)
+    records = [
+        FileRecord(f"/file_{size}.txt", size, 0o100644, size, 0.0)
+        for size in [5, 50, 20, 40, 10]
+    ]
+    for record in records:
+        categorization_instance.add_record(record)
+
+    text = categorization_instance.category_data["Text"]
+    assert len(categorization_instance.files) == 0
+    assert (text.number_of_files, text.total_size) == (5, 125)
+    assert sorted(text.largest_files) == [(40, "/file_40.txt"), (50, "/file_50.txt")]
+
+    categorization_instance.remove_record(records[1])
+    assert (text.number_of_files, text.total_size) == (4, 75)
+    assert text.largest_files == [(40, "/file_40.txt")]
+
+    categorization_instance.report()
+    assert "/file_40.txt" in capsys.readouterr().out
+
+
+def test_merge_top_k():
+    first, second = Categorization(top_k=2), Categorization(top_k=2)
+    first.add_record(FileRecord("/a.txt", 30, 0o100644, 1, 0.0))
+    first.add_record(FileRecord("/b.txt", 10, 0o100644, 2, 0.0))
+    second.add_record(FileRecord("/c.txt", 20, 0o100644, 3, 0.0))
+    second.add_record(FileRecord("/d.mp4", 5, 0o100644, 4, 0.0))
+
+    first.merge(second)
+
+    assert sorted(first.category_data["Text"].largest_files) == [
+        (20, "/c.txt"),
+        (30, "/a.txt"),
+    ]
+    assert first.category_data["Text"].extensions[".txt"].number_of_files == 3
+    assert first.category_data["Video"].largest_files == [(5, "/d.mp4")]
+
+
+def test_files_are_not_kept_by_default():
+    categorization_instance = Categorization()
+    categorization_instance.add_record(FileRecord("/a.txt", 10, 0o100644, 1, 0.0))
+
+    assert len(categorization_instance.files) == 0
+    assert categorization_instance.category_data["Text"].number_of_files == 1
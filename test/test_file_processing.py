@@ -0,0 +1,162 @@
+import os
+from test.conftest import BAD_PERMISSION_FILES, fake_filesystem_files
+
+from pyfakefs.fake_filesystem import FakeFilesystem
+from pytest_mock import MockerFixture
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import Categorization
+from analyzer.directory_traversal import TraversalOptions
+from analyzer.file_processing import process_files
+from analyzer.large_files import LargeFileIdentifier
+from analyzer.permissions import FilePermissionsChecker
+from analyzer.summary import Summary
+
+
+def test_process_files_feeds_all_analyzers(
+    fs: FakeFilesystem, app_file_system  # noqa F811
+):
+    categorization = Categorization()
+    permissions = FilePermissionsChecker()
+    large_files = LargeFileIdentifier(size_threshold="1024 KiB")
+    summary = Summary()
+
+    process_files("/root_dir", categorization, permissions, large_files, summary)
+
+    assert summary.total_files == len(fake_filesystem_files)
+    assert summary.total_size == sum(int(f["size"]) for f in fake_filesystem_files)
+    assert sum(
+        info.number_of_files for info in categorization.category_data.values()
+    ) == len(fake_filesystem_files)
+    assert len(permissions.rows) == BAD_PERMISSION_FILES
+    assert len(large_files.large_files) == len(
+        [f for f in fake_filesystem_files if f["size"] >= large_files.size_threshold]
+    )
+
+
+def test_add_record_does_not_stat(mocker: MockerFixture):
+    stat = mocker.patch("os.stat", side_effect=AssertionError("unexpected stat"))
+    record = FileRecord("/data/file.txt", 2048, 0o100666, 42, 0.0)
+
+    categorization = Categorization()
+    permissions = FilePermissionsChecker()
+    large_files = LargeFileIdentifier(size_threshold="1 KiB")
+    summary = Summary()
+    for analyzer in (categorization, permissions, large_files, summary):
+        analyzer.add_record(record)
+
+    stat.assert_not_called()
+    assert categorization.category_data["Text"].total_size == 2048
+    assert not permissions.is_report_empty()
+    assert large_files.large_files[0].file_path == "/data/file.txt"
+    assert summary.total_size == 2048
+
+
+def test_file_record_from_path(fs: FakeFilesystem):
+    fs.create_file("/file.txt", st_size=123)
+    record = FileRecord.from_path("/file.txt")
+    stat_result = os.stat("/file.txt")
+    assert record.path == "/file.txt"
+    assert record.size == 123
+    assert record.mode == stat_result.st_mode
+    assert record.inode == stat_result.st_ino
+    assert record.mtime == stat_result.st_mtime
+
+
+def category_totals(categorization: Categorization):
+    return {
+        name: (info.number_of_files, info.total_size)
+        for name, info in categorization.category_data.items()
+    }
+
+
+def test_process_files_with_jobs_matches_serial(
+    fs: FakeFilesystem, app_file_system  # noqa F811
+):
+    serial = [Categorization(), LargeFileIdentifier("1 KiB"), Summary()]
+    parallel = [Categorization(), LargeFileIdentifier("1 KiB"), Summary()]
+
+    process_files("/root_dir", *serial)
+    process_files("/root_dir", *parallel, jobs=4)
+
+    assert category_totals(serial[0]) == category_totals(parallel[0])
+    assert sorted(entry.file_path for entry in serial[1].large_files) == sorted(
+        entry.file_path for entry in parallel[1].large_files
+    )
+    assert serial[2].total_files == parallel[2].total_files
+    assert serial[2].total_size == parallel[2].total_size
+
+
+def test_process_files_with_processes_matches_serial(tmp_path):
+    for index in range(40):
+        directory = tmp_path / f"dir_{index % 7}" / f"sub_{index % 3}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file_{index}.txt").write_bytes(b"x" * index * 100)
+        os.chmod(directory / f"file_{index}.txt", 0o666 if index % 5 else 0o644)
+    (tmp_path / "top.mp4").write_bytes(b"x" * 5000)
+
+    serial = [
+        Categorization(),
+        FilePermissionsChecker(),
+        LargeFileIdentifier("1 KiB"),
+        Summary(),
+    ]
+    sharded = [
+        Categorization(),
+        FilePermissionsChecker(),
+        LargeFileIdentifier("1 KiB"),
+        Summary(),
+    ]
+    process_files(tmp_path, *serial)
+    process_files(tmp_path, *sharded, processes=2)
+
+    assert category_totals(serial[0]) == category_totals(sharded[0])
+    assert sorted(serial[1].rows) == sorted(sharded[1].rows)
+    assert [entry.size for entry in serial[2].large_files] == [
+        entry.size for entry in sharded[2].large_files
+    ]
+    assert serial[3].total_files == sharded[3].total_files == 41
+    assert serial[3].total_size == sharded[3].total_size
+
+
+def test_process_files_counts_hardlinks_once(
+    fs: FakeFilesystem, app_file_system  # noqa F811
+):
+    fs.create_link("/root_dir/parent1/file_10_mb_0755.txt", "/root_dir/hardlink.txt")
+    deduplicated, counted = Summary(), Summary()
+
+    process_files("/root_dir", deduplicated)
+    process_files("/root_dir", counted, count_hardlinks=True)
+
+    total_size = sum(int(f["size"]) for f in fake_filesystem_files)
+    assert deduplicated.total_files == len(fake_filesystem_files)
+    assert deduplicated.total_size == total_size
+    assert counted.total_files == len(fake_filesystem_files) + 1
+    assert counted.total_size == total_size + 10 * 1024 * 1024
+
+
+def test_process_files_with_processes_counts_hardlinks_once(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "data.bin").write_bytes(b"x" * 4096)
+    os.link(tmp_path / "a" / "data.bin", tmp_path / "b" / "data.bin")
+    summary = Summary()
+
+    process_files(tmp_path, summary, processes=2)
+
+    assert summary.total_files == 1
+    assert summary.total_size == 4096
+
+
+def test_process_files_feeds_directories(
+    fs: FakeFilesystem, app_file_system  # noqa F811
+):
+    os.chmod("/root_dir/parent2", 0o777)
+    permissions, summary = FilePermissionsChecker(), Summary()
+
+    process_files(
+        "/root_dir", permissions, summary, options=TraversalOptions(directories=True)
+    )
+
+    assert summary.total_files == len(fake_filesystem_files)
+    assert permissions.directories == {"/root_dir/parent2"}
@@ -122,9 +122,13 @@ def test_report_statistics(summary, capsys: pytest.CaptureFixture):
 
     assert "Total Files:" in output
     assert "Total Size:" in output
+    assert "Total Allocated Size:" in output
+    assert "Slack Space:" in output
     assert "Average File Size:" in output
     assert "Smallest File Size:" in output
     assert "Largest File Size:" in output
+    assert "Median File Size:" in output
+    assert "P99.9 File Size:" in output
     assert "Time Elapsed:" in output
 
     assert str(total_files) in output
@@ -132,3 +136,21 @@ def test_report_statistics(summary, capsys: pytest.CaptureFixture):
     assert str(average_size) in output
     assert str(smallest_file) in output
     assert str(largest_file) in output
+
+
+def test_merge(fs: FakeFilesystem, summary):
+    other = Summary()
+    create_fakefs_file(fs=fs, filepath="/other/tiny", size=bitmath.Byte(1))
+    create_fakefs_file(fs=fs, filepath="/other/huge", size=bitmath.GiB(1).to_Byte())
+    other.add(Path("/other/tiny"))
+    other.add(Path("/other/huge"))
+    total_size = summary.total_size
+
+    summary.merge(other)
+
+    assert summary.total_files == len(fake_filesystem_files) + 2
+    assert summary.total_size == total_size + 1 + int(bitmath.GiB(1).to_Byte())
+    assert summary.smallest_file_size == 1
+    assert summary.largest_file_size == int(bitmath.GiB(1).to_Byte())
+    assert summary.size_quantiles.count == len(fake_filesystem_files) + 2
+    assert summary.size_quantiles.max == int(bitmath.GiB(1).to_Byte())
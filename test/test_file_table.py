@@ -0,0 +1,83 @@
+import pickle
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.file_table import FileRow, FileTable
+
+RECORDS = [
+    FileRecord("/data/a.txt", 10, 0o100644, 1, 1.5),
+    FileRecord("/data/b.mp4", 20, 0o100600, 2, 2.5),
+    FileRecord("/data/sub/a.txt", 30, 0o100777, 3, 3.5),
+]
+
+
+def make_table() -> FileTable:
+    table = FileTable()
+    table.append(RECORDS[0], "Text", ".txt")
+    table.append(RECORDS[1], "Video", ".mp4")
+    table.append(RECORDS[2], "Text", ".txt")
+    return table
+
+
+def test_rows_round_trip():
+    assert list(make_table()) == [
+        FileRow("/data/a.txt", 10, 0o100644, 1.5, "Text", ".txt"),
+        FileRow("/data/b.mp4", 20, 0o100600, 2.5, "Video", ".mp4"),
+        FileRow("/data/sub/a.txt", 30, 0o100777, 3.5, "Text", ".txt"),
+    ]
+
+
+def test_strings_are_interned():
+    table = make_table()
+    assert table.directories.strings == ["/data", "/data/sub"]
+    assert table.categories.strings == ["Text", "Video"]
+    assert table.extensions.strings == [".txt", ".mp4"]
+
+
+def test_find_and_remove():
+    table = make_table()
+    assert table.find("/data/sub/a.txt") == 2
+    assert table.find("/data/c.txt") is None
+    assert table.find("/other/a.txt") is None
+
+    table.remove(table.find("/data/a.txt"))
+
+    assert len(table) == 2
+    assert table.find("/data/a.txt") is None
+    assert [row.path for row in table] == ["/data/b.mp4", "/data/sub/a.txt"]
+
+
+def test_compaction_keeps_live_rows():
+    table = make_table()
+    table.remove(0)
+    table.remove(1)
+
+    assert len(table.directory) == 1
+    assert [row.path for row in table] == ["/data/sub/a.txt"]
+    assert table.find("/data/sub/a.txt") == 0
+
+
+def test_extend_and_pickle():
+    table = make_table()
+    table.extend(pickle.loads(pickle.dumps(make_table())))
+    assert len(table) == 6
+    assert list(table)[3:] == list(make_table())
+
+
+def test_non_utf8_names():
+    table = FileTable()
+    path = "/data/caf\udce9.txt"
+    table.append(FileRecord(path, 1, 0o100644, 1, 0.0), "Text", ".txt")
+    assert table.path(0) == path
+    assert table.find(path) == 0
+
+
+def test_find_after_remove_and_append_again():
+    table = make_table()
+    record = FileRecord("/data/caf\udce9.txt", 1, 0o100644, 1, 0.0)
+    table.append(record, "Text", ".txt")
+    table.remove(table.find(record.path))
+    assert table.find(record.path) is None
+
+    table.append(record, "Text", ".txt")
+    assert table.find(record.path) == 4
+    assert table.find("/data/b.mp4") == 1
@@ -0,0 +1,79 @@
+import pickle
+
+import pytest
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.histogram import SizeHistogram, bucket_of
+
+
+def make_records():
+    return [
+        FileRecord(f"/data/file_{index}{extension}", size, 0o100644, index, 0.0)
+        for index, (size, extension) in enumerate(
+            [(0, ".txt"), (1, ".txt"), (1500, ".txt"), (2048, ".mp4"), (5000, ".mp4")]
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "size, bucket", [(0, 0), (1, 1), (2, 2), (3, 2), (1023, 10), (1024, 11)]
+)
+def test_bucket_of(size: int, bucket: int):
+    assert bucket_of(size) == bucket
+
+
+def test_buckets_overall_and_per_category():
+    histogram = SizeHistogram()
+    for record in make_records():
+        histogram.add_record(record)
+
+    assert histogram.buckets.counts[:14].tolist() == [
+        1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1,
+    ]  # fmt: skip
+    assert histogram.buckets.sizes[11] == 1500
+    assert histogram.category_buckets["Video"].counts[12] == 1
+    assert histogram.category_buckets["Video"].sizes[13] == 5000
+    assert sum(histogram.category_buckets["Text"].counts) == 3
+
+
+def test_thresholds():
+    histogram = SizeHistogram(["2 KiB", "1 KiB", "1 MiB"])
+    for record in make_records():
+        histogram.add_record(record)
+
+    assert histogram.thresholds == [1024, 2048, 1048576]
+    assert histogram.above(0) == (3, 8548)
+    assert histogram.above(1) == (2, 7048)
+    assert histogram.above(2) == (0, 0)
+
+
+def test_remove_record_and_merge():
+    records = make_records()
+    first, second = SizeHistogram(["1 KiB"]), SizeHistogram(["1 KiB"])
+    for record in records[:3]:
+        first.add_record(record)
+    for record in records[3:]:
+        second.add_record(record)
+
+    first.merge(pickle.loads(pickle.dumps(second)))
+    first.remove_record(records[4])
+
+    assert sum(first.buckets.counts) == 4
+    assert first.above(0) == (2, 3548)
+    assert sum(first.category_buckets["Video"].counts) == 1
+
+
+def test_report(capsys: pytest.CaptureFixture):
+    histogram = SizeHistogram(["1 KiB"])
+    histogram.report()
+    assert "No files" in capsys.readouterr().out
+
+    for record in make_records():
+        histogram.add_record(record)
+    histogram.report()
+
+    output = capsys.readouterr().out
+    assert "File Size Histogram" in output
+    assert "1.00 KiB - 2.00 KiB" in output
+    assert "Bytes per Size and Category" in output
+    assert "Files Above Size Thresholds" in output
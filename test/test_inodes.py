@@ -0,0 +1,66 @@
+import pickle
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.utils.inodes import HardLinks, InodeSet, LinkPaths, inode_key
+
+
+def test_inode_key_is_unique_per_device():
+    assert inode_key(1, 2) != inode_key(2, 1)
+    assert inode_key(1, 2) == inode_key(1, 2)
+
+
+def test_inode_set_add():
+    inodes = InodeSet()
+    assert inodes.add(1, 100)
+    assert not inodes.add(1, 100)
+    assert inodes.add(2, 100)
+    assert len(inodes) == 2
+
+
+def test_inode_set_pickle():
+    inodes = InodeSet()
+    inodes.add(1, 100)
+    copy = pickle.loads(pickle.dumps(inodes))
+    assert not copy.add(1, 100)
+    assert copy.add(1, 101)
+
+
+def test_hard_links_first_link():
+    links = HardLinks()
+    single = FileRecord("/single", 10, 0o100644, 1, 0.0, dev=1, nlink=1)
+    first = FileRecord("/first", 10, 0o100644, 2, 0.0, dev=1, nlink=2)
+    second = FileRecord("/second", 10, 0o100644, 2, 0.0, dev=1, nlink=2)
+
+    assert links.first_link(single)
+    assert links.first_link(single)
+    assert links.first_link(first)
+    assert not links.first_link(second)
+
+
+def test_hard_links_deferred():
+    links = HardLinks(defer=True)
+    single = FileRecord("/single", 10, 0o100644, 1, 0.0, dev=1, nlink=1)
+    linked = FileRecord("/linked", 10, 0o100644, 2, 0.0, dev=1, nlink=2)
+
+    assert links.first_link(single)
+    assert not links.first_link(linked)
+    assert links.deferred == [linked]
+
+
+def test_link_paths():
+    links = LinkPaths()
+    first = FileRecord("/first", 10, 0o100644, 2, 0.0, dev=1, nlink=1)
+    second = FileRecord("/second", 10, 0o100644, 2, 0.0, dev=1, nlink=2)
+    third = FileRecord("/third", 10, 0o100644, 2, 0.0, dev=1, nlink=3)
+
+    # a link added to a file counted while it had a single one
+    assert links.add(first)
+    assert not links.add(second)
+    assert not links.add(third)
+    assert links.is_counted(first)
+
+    assert links.remove(third) is None
+    assert links.remove(first) == "/second"
+    assert links.is_counted(second)
+    assert links.remove(second) is None
+    assert links.add(third)
@@ -8,6 +8,7 @@ import pytest
 from bitmath import Byte
 from pyfakefs.fake_filesystem import FakeFilesystem
 
+from analyzer.analyzer_interface import FileRecord
 from analyzer.large_files import LargeFileIdentifier
 
 
@@ -28,6 +29,7 @@ def large_file_identifier(fs: FakeFilesystem, app_file_system):  # noqa F811
 def test_empty_large_files():
     large_files = LargeFileIdentifier()
     assert len(large_files.large_files) == 0
+    assert large_files.is_report_empty()
 
 
 def test_add_large_file(fs: FakeFilesystem):
@@ -44,6 +46,7 @@ def test_add_large_file(fs: FakeFilesystem):
         create_missing_dirs=True,
     )
     large_files.add(large_file_path)
+    assert not large_files.is_report_empty()
     assert len(large_files.large_files) == 1
     assert large_files.large_files[0].file_path == large_file_path
     assert large_files.large_files[0].size == bitmath.Byte(large_size)
@@ -74,7 +77,7 @@ def test_default_threshold(fs: FakeFilesystem):
     large_files.add(file)
     assert len(large_files.large_files) == 1
     assert large_files.size_threshold == large_files.DEFAULT_THRESHOLD
-    assert large_files.large_files[0].size == large_files.DEFAULT_THRESHOLD
+    assert large_files.large_files[0].size == large_files.threshold_bytes
 
 
 def test_add_file_with_threshold(fs: FakeFilesystem):
@@ -202,3 +205,80 @@ def test_delete_files(large_file_identifier):
     large_file_identifier.delete_reported_files()
     for file in large_file_identifier.large_files:
         assert not os.path.exists(file.file_path)
+
+
+def test_merge_keeps_files_sorted(fs: FakeFilesystem):
+    first = LargeFileIdentifier(size_threshold="1 KiB")
+    second = LargeFileIdentifier(size_threshold="1 KiB")
+    for name, kib, instance in [
+        ("/a", 4, first),
+        ("/b", 1, first),
+        ("/c", 3, second),
+        ("/d", 2, second),
+    ]:
+        fs.create_file(name, st_size=int(bitmath.KiB(kib).to_Byte().value))
+        instance.add(name)
+
+    first.merge(second)
+
+    assert [entry.file_path for entry in first.large_files] == ["/b", "/d", "/c", "/a"]
+
+
+def test_threshold_is_parsed_once():
+    large_files = LargeFileIdentifier(size_threshold="2 KiB")
+    assert large_files.threshold_bytes == 2048
+
+
+def test_top_keeps_the_largest_files():
+    large_files = LargeFileIdentifier(size_threshold="1 KiB", top=2)
+    for index, size in enumerate([4096, 1024, 8192, 512, 2048]):
+        large_files.add_record(FileRecord(f"/file_{size}", size, 0o100644, index, 0))
+
+    assert [(entry.file_path, entry.size) for entry in large_files.large_files] == [
+        ("/file_4096", 4096),
+        ("/file_8192", 8192),
+    ]
+
+
+def test_merge_with_top():
+    first = LargeFileIdentifier(size_threshold="1 KiB", top=2)
+    second = LargeFileIdentifier(size_threshold="1 KiB", top=2)
+    first.add_record(FileRecord("/a", 4096, 0o100644, 1, 0))
+    first.add_record(FileRecord("/b", 1024, 0o100644, 2, 0))
+    second.add_record(FileRecord("/c", 3072, 0o100644, 3, 0))
+
+    first.merge(second)
+
+    assert [entry.file_path for entry in first.large_files] == ["/c", "/a"]
+
+
+def test_remove_with_top():
+    large_files = LargeFileIdentifier(size_threshold="1 KiB", top=2)
+    records = [
+        FileRecord(f"/file_{size}", size, 0o100644, index, 0)
+        for index, size in enumerate([4096, 2048, 8192])
+    ]
+    for record in records[:2]:
+        large_files.add_record(record)
+
+    large_files.remove_record(records[1])
+    large_files.remove_record(records[0])
+    large_files.add_record(records[0])
+    large_files.add_record(records[2])
+    large_files.add_record(records[1])
+
+    assert [entry.file_path for entry in large_files.large_files] == [
+        "/file_4096",
+        "/file_8192",
+    ]
+
+
+def test_allocated_size_basis():
+    large_files = LargeFileIdentifier(size_threshold="1 KiB", size_basis="allocated")
+    # sparse: 1 MiB long but a single block on disk
+    large_files.add_record(FileRecord("/sparse", 1 << 20, 0o100644, 1, 0, blocks=1))
+    large_files.add_record(FileRecord("/dense", 1000, 0o100644, 2, 0, blocks=8))
+
+    assert [(entry.file_path, entry.size) for entry in large_files.large_files] == [
+        ("/dense", 4096)
+    ]
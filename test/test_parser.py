@@ -4,7 +4,7 @@ from pathlib import Path
 import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
 
-from analyzer.utils.parser import valid_path
+from analyzer.utils.parser import positive_int, split_patterns, valid_path
 
 
 def test_valid_path_existing_file(fs: FakeFilesystem):
@@ -31,3 +31,22 @@ def test_valid_path_with_relative_path(fs: FakeFilesystem):
     path = valid_path("test.txt")
     assert isinstance(path, Path)
     assert path == Path("test.txt")
+
+
+def test_positive_int():
+    assert positive_int("4") == 4
+
+
+@pytest.mark.parametrize("value", ["0", "-2", "four"])
+def test_positive_int_invalid(value: str):
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive_int(value)
+
+
+def test_split_patterns():
+    assert split_patterns("") == []
+    assert split_patterns("*.log, /proc\n node_modules\n\n") == [
+        "*.log",
+        "/proc",
+        "node_modules",
+    ]
@@ -0,0 +1,146 @@
+import stat
+
+import pytest
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.utils.permission_policy import (
+    PermissionPolicy,
+    PermissionRule,
+    parse_bits,
+    parse_rule,
+)
+from analyzer.utils.permissions import generate_full_write_combination
+
+
+def record(mode: int, path: str = "/file", uid: int = -1) -> FileRecord:
+    return FileRecord(path, 0, mode, 1, 0.0, uid=uid, gid=uid)
+
+
+# a user id no system has a passwd entry for
+ORPHAN_UID = 0x7FFFFFF0
+
+
+def legacy_bad_permissions():
+    return {permission.permission for permission in generate_full_write_combination()}
+
+
+def test_default_rules_match_legacy_permissions():
+    policy = PermissionPolicy()
+    legacy = legacy_bad_permissions() | {"---------", "--x--x--x", "r-xr-xr-x"}
+    for mode in range(0o1000):
+        expected = stat.filemode(mode)[1:] in legacy
+        assert (
+            policy.match(record(stat.S_IFREG | mode, "/file")) is not None
+        ) == expected
+
+
+def test_default_rules_names():
+    policy = PermissionPolicy()
+    assert policy.match(record(0o100666, "/file")).name == "writable by everyone"
+    assert policy.match(record(0o100000, "/file")).name == "no permissions"
+    assert policy.match(record(0o100111, "/file")).name == "execute only"
+    assert policy.match(record(0o100555, "/file")).name == "read and execute only"
+    assert policy.match(record(0o100644, "/file")) is None
+
+
+def test_default_directory_rules():
+    policy = PermissionPolicy()
+    assert policy.match(record(0o40777)).name == (
+        "directory writable by everyone without sticky bit"
+    )
+    assert policy.match(record(0o40757)).name == (
+        "directory writable by everyone without sticky bit"
+    )
+    assert policy.match(record(0o41777)) is None
+    assert policy.match(record(0o40755)) is None
+    assert policy.match(record(0o40555)) is None
+
+
+def test_default_owner_rules():
+    policy = PermissionPolicy()
+    assert policy.match(record(0o100664, uid=0)).name == (
+        "group-writable and owned by root"
+    )
+    assert policy.match(record(0o100664, uid=-1)) is None
+    assert policy.match(record(0o100644, uid=0)) is None
+    assert policy.match(record(0o100644, uid=ORPHAN_UID)).name == (
+        "owned by an unknown user"
+    )
+    assert policy.match(record(0o40755, uid=ORPHAN_UID)).name == (
+        "owned by an unknown user"
+    )
+
+
+def test_parse_bits():
+    assert parse_bits("4000") == stat.S_ISUID
+    assert parse_bits("0o2002") == stat.S_ISGID | stat.S_IWOTH
+    assert parse_bits("setuid|o+w") == stat.S_ISUID | stat.S_IWOTH
+    with pytest.raises(ValueError):
+        parse_bits("setuid|world")
+
+
+def test_parse_rule():
+    rule = parse_rule("setuid", "set=setuid clear=o+w outside=/usr,/opt")
+    assert rule == PermissionRule(
+        "setuid",
+        stat.S_ISUID | stat.S_IWOTH,
+        stat.S_ISUID,
+        outside=("/usr", "/opt"),
+    )
+
+
+def test_parse_rule_type_and_owner():
+    rule = parse_rule("dir", "type=dir set=o+w clear=sticky owner=root")
+    assert rule == PermissionRule(
+        "dir",
+        0o170000 | stat.S_IWOTH | stat.S_ISVTX,
+        stat.S_IFDIR | stat.S_IWOTH,
+        owner="root",
+    )
+    assert parse_rule("orphan", "owner=orphan").mask == 0
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "",
+        "inside=/usr",
+        "set=setuid path=/usr",
+        "set",
+        "set=gid",
+        "type=link",
+        "set=o+w owner=nobody",
+    ],
+)
+def test_parse_rule_invalid(expression: str):
+    with pytest.raises(ValueError, match="Invalid permission rule 'rule'"):
+        parse_rule("rule", expression)
+
+
+def test_setuid_outside_usr():
+    policy = PermissionPolicy.from_config({"setuid": "set=setuid outside=/usr"})
+    assert policy.match(record(0o104755, "/usr/bin/passwd")) is None
+    assert policy.match(record(0o104755, "/usr")) is None
+    assert policy.match(record(0o104755, "/home/user/passwd")).name == "setuid"
+    assert policy.match(record(0o104755, "/usrlocal/passwd")).name == "setuid"
+    assert policy.match(record(0o100755, "/home/user/passwd")) is None
+
+
+def test_inside_rule():
+    policy = PermissionPolicy.from_config({"home": "set=o+w inside=/home/"})
+    assert policy.match(record(0o100777, "/home/user/file")).name == "home"
+    assert policy.match(record(0o100777, "/tmp/file")) is None
+
+
+def test_first_matching_rule():
+    policy = PermissionPolicy.from_config(
+        {"group": "set=g+w", "others": "set=o+w", "private": "clear=077"}
+    )
+    assert policy.match(record(0o100666, "/file")).name == "group"
+    assert policy.match(record(0o100646, "/file")).name == "others"
+    assert policy.match(record(0o100600, "/file")).name == "private"
+    assert policy.match(record(0o100644, "/file")) is None
+
+
+def test_empty_config_uses_default_rules():
+    assert PermissionPolicy.from_config({}).rules == PermissionPolicy().rules
@@ -1,19 +1,30 @@
+import io
+import os
+import stat
 from collections import Counter
 from pathlib import Path
-from test.conftest import create_fakefs_file, fake_filesystem_files
+from test.conftest import (
+    BAD_PERMISSION_FILES,
+    create_fakefs_file,
+    fake_filesystem_files,
+)
 from typing import List, Tuple
 
 import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
-from rich.table import Table
+from pytest_mock import MockerFixture
 
+from analyzer.analyzer_interface import FileRecord
+from analyzer.deletion import BulkDeleter
+from analyzer.file_processing import handle_permissions
 from analyzer.permissions import FilePermissionsChecker
+from analyzer.utils.owners import owner_label
+from analyzer.utils.permission_policy import PermissionPolicy
+from analyzer.utils.report_writer import PlainWriter
 
 
-def extract_file_permissions_from_table(table: Table) -> List[Tuple[str, str]]:
-    files: List[str] = table.columns[0]._cells
-    perms: List[str] = table.columns[1]._cells
-    return list(zip(files, perms))
+def extract_file_permissions(perm: FilePermissionsChecker) -> List[Tuple[str, str]]:
+    return [(row.path, stat.filemode(row.mode)[1:]) for row in perm.rows]
 
 
 @pytest.fixture(scope="function")
@@ -25,19 +36,17 @@ def permission_instance(fs, app_file_system: FakeFilesystem):  # noqa F811
 
 
 def test_normal_permission_reporter(permission_instance: FilePermissionsChecker):
-    file_permissions = extract_file_permissions_from_table(permission_instance._table)
-    assert (
-        len(file_permissions) == 5
-    )  # 9 is the number of files that have bad permissions inside fake_filesystem_files
+    file_permissions = extract_file_permissions(permission_instance)
+    assert len(file_permissions) == BAD_PERMISSION_FILES
 
 
 def test_empty_permission_reporter(capsys: pytest.CaptureFixture):
     perm = FilePermissionsChecker()
     capsys.readouterr()
-    files_perms = extract_file_permissions_from_table(perm._table)
+    files_perms = extract_file_permissions(perm)
     perm.report()
     assert perm.is_report_empty()
-    assert len(perm._table.rows) == len(files_perms) == 0
+    assert len(perm.rows) == len(files_perms) == 0
     assert "No files with bad permissions found." in capsys.readouterr().out
 
 
@@ -48,9 +57,8 @@ def test_single_permission(fs: FakeFilesystem):
     )
     perm.add(file_path)
     assert not perm.is_report_empty()
-    assert len(perm._table.rows) == 1
-    assert perm._table.columns[0]._cells[0] == str(file_path)
-    assert perm._table.columns[1]._cells[0] == "-w--w--w-"
+    assert len(perm.rows) == 1
+    assert extract_file_permissions(perm) == [(str(file_path), "-w--w--w-")]
 
 
 def test_check_good_permission_file(fs: FakeFilesystem):
@@ -60,7 +68,7 @@ def test_check_good_permission_file(fs: FakeFilesystem):
     )
     perm.add(file_path)
     assert perm.is_report_empty()
-    assert len(perm._table.rows) == 0
+    assert len(perm.rows) == 0
 
 
 def test_multiple_files_with_bad_permissions(fs: FakeFilesystem):
@@ -77,11 +85,9 @@ def test_multiple_files_with_bad_permissions(fs: FakeFilesystem):
         perm.add(file_path)
 
     assert not perm.is_report_empty()
-    assert len(perm._table.rows) == len(list_of_files_with_bad_permission)
+    assert len(perm.rows) == len(list_of_files_with_bad_permission)
 
-    extracted_files = [
-        file for file, _ in extract_file_permissions_from_table(perm._table)
-    ]
+    extracted_files = [file for file, _ in extract_file_permissions(perm)]
     expected_files = [file for file, _ in list_of_files_with_bad_permission]
     assert Counter(extracted_files) == Counter(expected_files)
 
@@ -89,14 +95,13 @@ def test_multiple_files_with_bad_permissions(fs: FakeFilesystem):
 def test_delete_reported_files(permission_instance: FilePermissionsChecker):
     assert not permission_instance.is_report_empty()
     assert all(
-        Path(file).exists()
-        for file, _ in extract_file_permissions_from_table(permission_instance._table)
+        Path(file).exists() for file, _ in extract_file_permissions(permission_instance)
     )
 
     permission_instance.delete_reported_files()
     assert all(
         not Path(file).exists()
-        for file, _ in extract_file_permissions_from_table(permission_instance._table)
+        for file, _ in extract_file_permissions(permission_instance)
     )
 
 
@@ -111,3 +116,78 @@ def test_report(permission_instance, capsys: pytest.CaptureFixture):
     assert "Permission Report" in std.out
     assert "File" in std.out
     assert "Permissions" in std.out
+
+
+def test_merge(fs: FakeFilesystem):
+    first, second = FilePermissionsChecker(), FilePermissionsChecker()
+    first.add(create_fakefs_file(fs=fs, filepath="/first", mode=0o777))
+    second.add(create_fakefs_file(fs=fs, filepath="/second", mode=0o222))
+
+    first.merge(second)
+
+    assert extract_file_permissions(first) == [
+        ("/first", "rwxrwxrwx"),
+        ("/second", "-w--w--w-"),
+    ]
+
+
+def test_remove_record():
+    perm = FilePermissionsChecker()
+    first = FileRecord("/first", 1, 0o100777, 1, 0.0)
+    second = FileRecord("/second", 1, 0o100222, 2, 0.0)
+    perm.add_record(first)
+    perm.add_record(second)
+
+    perm.remove_record(first)
+
+    assert extract_file_permissions(perm) == [("/second", "-w--w--w-")]
+
+
+def test_policy():
+    perm = FilePermissionsChecker(
+        PermissionPolicy.from_config({"setuid": "set=setuid outside=/usr"})
+    )
+    perm.add_record(FileRecord("/usr/bin/passwd", 1, 0o104755, 1, 0.0))
+    perm.add_record(FileRecord("/home/passwd", 1, 0o104755, 2, 0.0, uid=0, gid=0))
+    perm.add_record(FileRecord("/home/file", 1, 0o100777, 3, 0.0))
+
+    assert extract_file_permissions(perm) == [("/home/passwd", "rwsr-xr-x")]
+    assert [row.rule for row in perm.rows] == ["setuid"]
+    assert [owner_label(row.uid, row.gid) for row in perm.rows] == ["root:root"]
+
+
+def test_directories_are_reported_but_not_deleted(fs: FakeFilesystem):
+    fs.create_dir("/shared")
+    os.chmod("/shared", 0o777)
+    perm = FilePermissionsChecker()
+    perm.add_directory(FileRecord.from_path("/shared"))
+    perm.add_directory(FileRecord("/tmp", 1, 0o41777, 2, 0.0))
+
+    assert extract_file_permissions(perm) == [("/shared", "rwxrwxrwx")]
+    assert not perm.has_deletable_files()
+    perm.delete_reported_files()
+    assert Path("/shared").exists()
+
+
+def test_no_deletion_prompt_for_directories_only(mocker: MockerFixture):
+    ask = mocker.patch("analyzer.file_processing.Confirm.ask", return_value=False)
+    perm = FilePermissionsChecker()
+    perm.add_directory(FileRecord("/shared", 1, 0o40777, 1, 0.0))
+    writer = PlainWriter(io.StringIO())
+
+    handle_permissions(BulkDeleter(), perm, None, writer)
+    ask.assert_not_called()
+
+    perm.add_record(FileRecord("/shared/file", 1, 0o100777, 2, 0.0))
+    handle_permissions(BulkDeleter(), perm, None, writer)
+    ask.assert_called_once()
+
+
+def test_directories_are_matched_once(mocker: MockerFixture):
+    perm = FilePermissionsChecker()
+    match = mocker.spy(perm.policy, "match")
+
+    perm.add_directory(FileRecord("/shared", 1, 0o40777, 1, 0.0))
+
+    assert match.call_count == 1
+    assert extract_file_permissions(perm) == [("/shared", "rwxrwxrwx")]
@@ -8,6 +8,7 @@ from analyzer.utils.permissions import (
     PermissionType,
     generate_full_write_combination,
     get_file_permissions,
+    permissions_from_mode,
 )
 
 
@@ -67,3 +68,9 @@ def test_get_file_permissions_symlink(fs: FakeFilesystem):
     actual_permission = get_file_permissions("/link.txt")
 
     assert actual_permission == expected_permission
+
+
+def test_permissions_from_mode():
+    assert permissions_from_mode(0o100644) == PermissionType(permission="rw-r--r--")
+    assert permissions_from_mode(0o100222) == PermissionType(permission="-w--w--w-")
+    assert permissions_from_mode(0o040755) == PermissionType(permission="rwxr-xr-x")
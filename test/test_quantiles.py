@@ -0,0 +1,56 @@
+import math
+import pickle
+import random
+from bisect import bisect_left
+
+import pytest
+
+from analyzer.utils.quantiles import TDigest
+
+QUANTILES = [0.01, 0.5, 0.9, 0.99, 0.999]
+
+
+@pytest.fixture(scope="module")
+def sizes() -> list:
+    generator = random.Random(42)
+    return sorted(int(generator.lognormvariate(10, 2.5)) for _ in range(100_000))
+
+
+def rank(sizes: list, value: float) -> float:
+    return bisect_left(sizes, value) / len(sizes)
+
+
+def test_empty_digest():
+    assert math.isnan(TDigest().quantile(0.5))
+
+
+def test_single_value():
+    digest = TDigest()
+    digest.add(42)
+    assert [digest.quantile(q) for q in (0, 0.5, 1)] == [42, 42, 42]
+
+
+def test_quantiles_are_accurate(sizes: list):
+    digest = TDigest()
+    for size in random.Random(1).sample(sizes, len(sizes)):
+        digest.add(size)
+
+    assert digest.count == len(sizes)
+    assert (digest.min, digest.max) == (sizes[0], sizes[-1])
+    assert len(digest) <= digest.compression
+    for q in QUANTILES:
+        assert rank(sizes, digest.quantile(q)) == pytest.approx(q, abs=0.002)
+
+
+def test_merged_digests_are_accurate(sizes: list):
+    shards = [TDigest() for _ in range(8)]
+    for index, size in enumerate(sizes):
+        shards[index % 8].add(size)
+
+    merged = TDigest()
+    for shard in shards:
+        merged.merge(pickle.loads(pickle.dumps(shard)))
+
+    assert merged.count == len(sizes)
+    for q in QUANTILES:
+        assert rank(sizes, merged.quantile(q)) == pytest.approx(q, abs=0.002)
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+
+import pytest
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.permissions import FilePermissionsChecker
+from analyzer.utils.report_writer import (
+    CsvWriter,
+    JsonWriter,
+    PlainWriter,
+    Size,
+    TableWriter,
+    default_format,
+    make_writer,
+)
+
+ROWS = [("/a", Size(2048)), ("/b", Size(1024)), ("/c [x]", Size(10))]
+
+
+def test_plain_writer():
+    output = io.StringIO()
+    PlainWriter(output).write_table("Large Files", ["File Path", "Size"], ROWS)
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "Large Files"
+    assert lines[1] == "File Path\tSize"
+    assert lines[2].startswith("/a\t2.0")
+    assert lines[4].startswith("/c [x]\t")
+
+
+def test_csv_writer():
+    output = io.StringIO()
+    CsvWriter(output).write_table(
+        "Large Files (top 3)", ["File Path", "Size"], ROWS, name="large_files"
+    )
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert rows == [
+        ["report", "file_path", "size"],
+        ["large_files", "/a", "2048"],
+        ["large_files", "/b", "1024"],
+        ["large_files", "/c [x]", "10"],
+    ]
+
+
+def test_json_writer():
+    output = io.StringIO()
+    JsonWriter(output).write_table(
+        "Large Files", ["File Path", "Size"], [("/a", Size(2048.5)), ("/b", ["x"])]
+    )
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {"report": "large_files", "file_path": "/a", "size": 2048.5},
+        {"report": "large_files", "file_path": "/b", "size": ["x"]},
+    ]
+
+
+@pytest.mark.parametrize("writer_class", [PlainWriter, CsvWriter, JsonWriter])
+def test_max_rows(writer_class, capsys: pytest.CaptureFixture):
+    output = io.StringIO()
+    writer_class(output, max_rows=2).write_table(
+        "Large Files", ["File Path", "Size"], iter(ROWS)
+    )
+    assert "/b" in output.getvalue()
+    assert "/c" not in output.getvalue()
+    assert "1 more rows of Large Files not shown." in (
+        output.getvalue() + capsys.readouterr().err
+    )
+
+
+def test_table_writer_max_rows():
+    output = io.StringIO()
+    TableWriter(output, max_rows=1).write_table(
+        "Large Files", ["File Path", "Size"], ROWS
+    )
+    assert "/a" in output.getvalue()
+    assert "/b" not in output.getvalue()
+    assert "2 more rows not shown" in output.getvalue()
+
+
+def test_table_writer_does_not_parse_markup():
+    output = io.StringIO()
+    TableWriter(output).write_table("Large Files", ["File Path", "Size"], ROWS)
+    assert "/c [x]" in output.getvalue()
+
+
+def test_empty_message(capsys: pytest.CaptureFixture):
+    output = io.StringIO()
+    PlainWriter(output).write_table("Large Files", ["File Path"], [], "[green]None.")
+    CsvWriter(output).write_table("Large Files", ["File Path"], [], "[green]None.")
+    assert output.getvalue() == "None.\n"
+    assert capsys.readouterr().err == "None.\n"
+
+
+def test_default_format():
+    # the tests never run with a terminal as standard output
+    assert default_format() == "plain"
+    assert default_format("log.txt") == "plain"
+    assert isinstance(make_writer(), PlainWriter)
+    assert isinstance(make_writer("json", 10), JsonWriter)
+    assert make_writer("json", 10).max_rows == 10
+
+
+def test_permission_report_as_csv(capsys: pytest.CaptureFixture):
+    perm = FilePermissionsChecker()
+    perm.add_record(FileRecord("/first", 1, 0o100777, 1, 0.0, uid=0, gid=0))
+    perm.report(CsvWriter())
+    rows = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert rows == [
+        ["report", "file", "permissions", "rule", "owner"],
+        ["permissions", "/first", "rwxrwxrwx", "writable by everyone", "root:root"],
+    ]
@@ -0,0 +1,143 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import Categorization
+from analyzer.directory_traversal import TraversalOptions, scan_tree
+from analyzer.file_processing import process_files
+from analyzer.snapshot_index import SnapshotIndex
+from analyzer.summary import Summary
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    root = tmp_path / "tree"
+    for index in range(12):
+        directory = root / f"dir_{index % 3}" / f"sub_{index % 2}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file_{index}.txt").write_bytes(b"x" * index)
+    (root / "top.mp4").write_bytes(b"x" * 100)
+    return root
+
+
+def scan_with_index(root: Path, index_path: Path) -> List[FileRecord]:
+    with SnapshotIndex(index_path) as index:
+        return sorted(index.scan_tree(root))
+
+
+def test_first_scan_matches_full_scan(tree: Path, tmp_path: Path):
+    records = scan_with_index(tree, tmp_path / "index.db")
+    expected = sorted(
+        FileRecord.from_stat(entry.path, entry.stat()) for entry in scan_tree(tree)
+    )
+    assert records == expected
+
+
+def test_rescan_reuses_unchanged_directories(
+    tree: Path, tmp_path: Path, mocker: MockerFixture
+):
+    index_path = tmp_path / "index.db"
+    first = scan_with_index(tree, index_path)
+    scandir = mocker.spy(os, "scandir")
+
+    with SnapshotIndex(index_path) as index:
+        second = sorted(index.scan_tree(tree))
+        assert index.scanned_directories == 0
+        assert index.reused_directories == 10
+
+    scandir.assert_not_called()
+    assert second == first
+
+
+def test_rescan_picks_up_changed_directories(tree: Path, tmp_path: Path):
+    index_path = tmp_path / "index.db"
+    scan_with_index(tree, index_path)
+    (tree / "dir_1" / "sub_0" / "new.txt").write_bytes(b"new")
+    (tree / "dir_2" / "sub_1" / "file_5.txt").unlink()
+
+    with SnapshotIndex(index_path) as index:
+        records = sorted(index.scan_tree(tree))
+        assert index.scanned_directories == 2
+
+    paths = [record.path for record in records]
+    assert str(tree / "dir_1" / "sub_0" / "new.txt") in paths
+    assert str(tree / "dir_2" / "sub_1" / "file_5.txt") not in paths
+    assert len(records) == 13
+
+
+def test_index_is_reset_when_options_change(tree: Path, tmp_path: Path):
+    index_path = tmp_path / "index.db"
+    scan_with_index(tree, index_path)
+
+    options = TraversalOptions(exclude=("dir_0",))
+    with SnapshotIndex(index_path, options) as index:
+        records = list(index.scan_tree(tree))
+        assert index.reused_directories == 0
+
+    assert not any("dir_0" in record.path for record in records)
+
+
+def test_removed_directories_are_pruned(tree: Path, tmp_path: Path):
+    index_path = tmp_path / "index.db"
+    scan_with_index(tree, index_path)
+    for file in (tree / "dir_0" / "sub_0").iterdir():
+        file.unlink()
+    (tree / "dir_0" / "sub_0").rmdir()
+    scan_with_index(tree, index_path)
+
+    with SnapshotIndex(index_path) as index:
+        assert len(index) == 9
+
+
+def test_process_files_with_index(tree: Path, tmp_path: Path):
+    full = [Categorization(), Summary()]
+    process_files(tree, *full)
+
+    for _ in range(2):
+        incremental = [Categorization(), Summary()]
+        with SnapshotIndex(tmp_path / "index.db") as index:
+            process_files(tree, *incremental, index=index)
+
+        assert incremental[1].total_files == full[1].total_files
+        assert incremental[1].total_size == full[1].total_size
+        assert {
+            name: info.total_size for name, info in incremental[0].category_data.items()
+        } == {name: info.total_size for name, info in full[0].category_data.items()}
+
+
+def test_index_yields_directories(tree: Path, tmp_path: Path):
+    options = TraversalOptions(directories=True)
+    for _ in range(2):
+        os.chmod(tree / "dir_1", 0o777)
+        with SnapshotIndex(tmp_path / "index.db", options) as index:
+            records = list(index.scan_tree(tree))
+        directories = {
+            record.path: record.mode for record in records if os.path.isdir(record.path)
+        }
+        assert len(directories) == 9
+        assert directories[str(tree / "dir_1")] & 0o777 == 0o777
+        assert len(records) - len(directories) == 13
+        os.chmod(tree / "dir_1", 0o755)
+
+
+def test_non_utf8_names(tmp_path: Path):
+    root = tmp_path / "tree"
+    directory = os.path.join(os.fsencode(root), b"dir\xfe")
+    os.makedirs(directory)
+    with open(os.path.join(directory, b"file\xff.txt"), "wb") as file:
+        file.write(b"data")
+    index_path = tmp_path / "index.db"
+
+    first = scan_with_index(root, index_path)
+    with SnapshotIndex(index_path) as index:
+        second = sorted(index.scan_tree(root))
+        assert index.reused_directories == 2
+
+    assert second == first
+    assert [record.path for record in first] == [
+        os.fsdecode(os.path.join(directory, b"file\xff.txt"))
+    ]
@@ -0,0 +1,139 @@
+import io
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from analyzer import sniffing
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import Categorization
+from analyzer.file_processing import process_files
+from analyzer.histogram import SizeHistogram
+from analyzer.sniffing import ContentSniffer, sniff
+from analyzer.utils.report_writer import PlainWriter
+
+
+@pytest.mark.parametrize(
+    "header, category",
+    [
+        (b"\x7fELF\x02\x01\x01", "Executable"),
+        (b"#!/bin/sh\n", "Executable"),
+        (b"\x1f\x8b\x08\x00", "Archive"),
+        (b"PK\x03\x04\x14\x00", "Archive"),
+        (b"\x00" * 257 + b"ustar\x0000", "Archive"),
+        (b"\x89PNG\r\n\x1a\n\x00", "Image"),
+        (b"%PDF-1.7\n", "Text"),
+        (b"SQLite format 3\x00\x10\x00", "Database"),
+        (b"\x00\x00\x00\x18ftypmp42", "Video"),
+        (b"plain text", None),
+        (b"", None),
+    ],
+)
+def test_sniff(header: bytes, category: str):
+    assert sniff(header) == category
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    root = tmp_path / "tree"
+    root.mkdir()
+    (root / "program").write_bytes(b"\x7fELF" + b"\x00" * 100)
+    (root / "backup.bin2").write_bytes(b"\x1f\x8b\x08" + b"\x00" * 10)
+    (root / "README").write_bytes(b"nothing to see")
+    (root / "notes.txt").write_bytes(b"\x7fELF but a text file")
+    os.mkfifo(root / "pipe")
+    return root
+
+
+def categories(categorization: Categorization) -> dict:
+    return {
+        name: info.number_of_files
+        for name, info in categorization.category_data.items()
+    }
+
+
+def test_categorization_sniffs_unknown_files(tree: Path):
+    sniffer = ContentSniffer()
+    categorization = Categorization(sniffer)
+    process_files(tree, categorization)
+    sniffer.close()
+
+    assert categories(categorization) == {
+        "Executable": 1,
+        "Archive": 1,
+        "NoExtension": 2,
+        "Text": 1,
+    }
+
+
+def test_cache_avoids_reading_unmodified_files(
+    tree: Path, tmp_path: Path, mocker: MockerFixture
+):
+    cache_path = tmp_path / "sniff.db"
+    first = ContentSniffer(cache_path=cache_path)
+    process_files(tree, Categorization(first))
+    first.close()
+
+    read_header = mocker.spy(sniffing, "read_header")
+    (tree / "README").write_bytes(b"%PDF-1.4")
+    os.utime(tree / "README", (0, 0))
+    second = ContentSniffer(cache_path=cache_path)
+    categorization = Categorization(second)
+    process_files(tree, categorization)
+    second.close()
+
+    assert [call.args[0] for call in read_header.call_args_list] == [
+        str(tree / "README")
+    ]
+    assert categories(categorization)["Text"] == 2
+
+
+def test_categorization_with_sniffer_can_be_pickled(tree: Path):
+    categorization = Categorization(ContentSniffer())
+    categorization.add_record(FileRecord.from_path(str(tree / "program")))
+
+    copy = pickle.loads(pickle.dumps(categorization))
+
+    assert categories(copy) == {"Executable": 1}
+
+
+def test_remove_sniffed_record(tree: Path):
+    categorization = Categorization(ContentSniffer())
+    record = FileRecord.from_path(str(tree / "program"))
+    categorization.add_record(record)
+
+    categorization.remove_record(record)
+
+    assert categories(categorization) == {}
+
+
+def test_report_shows_missing_extensions(tree: Path):
+    sniffer = ContentSniffer()
+    categorization = Categorization(sniffer)
+    process_files(tree, categorization)
+    sniffer.close()
+    output = io.StringIO()
+    categorization.report(PlainWriter(output))
+
+    assert "Executable\t(none)\t1" in output.getvalue()
+
+
+def test_shared_resolver_agrees_with_categorization(tree: Path, mocker: MockerFixture):
+    read_header = mocker.spy(sniffing, "read_header")
+    sniffer = ContentSniffer()
+    categorization = Categorization(sniffer)
+    histogram = SizeHistogram(resolver=categorization.resolver)
+    process_files(tree, categorization, histogram)
+    sniffer.close()
+
+    assert {
+        category: sum(buckets.counts)
+        for category, buckets in histogram.category_buckets.items()
+    } == categories(categorization)
+    # each file is read once for both analyzers
+    assert read_header.call_count == 3
+
+    histogram.remove_record(FileRecord.from_path(str(tree / "program")))
+    assert sum(histogram.category_buckets["Executable"].counts) == 0
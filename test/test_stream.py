@@ -0,0 +1,108 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from analyzer.analyzer_interface import FileRecord
+from analyzer.categorization import CategoryResolver
+from analyzer.file_processing import process_files, stream_directory
+from analyzer.sniffing import ContentSniffer
+from analyzer.stream import NdjsonStream
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    root = tmp_path / "tree"
+    root.mkdir()
+    (root / "movie.mp4").write_bytes(b"x" * 2048)
+    (root / "movie.mp4").chmod(0o644)
+    (root / "notes.txt").write_bytes(b"x" * 10)
+    (root / "notes.txt").chmod(0o777)
+    return root
+
+
+def read_lines(path: Path, compressed: bool = False) -> list:
+    content = gzip.decompress(path.read_bytes()) if compressed else path.read_bytes()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def test_stream_writes_a_line_per_file(tree: Path, tmp_path: Path):
+    output = tmp_path / "files.ndjson"
+    stream = NdjsonStream(str(output), size_threshold="1 KiB")
+    process_files(tree, stream)
+    stream.close()
+
+    lines = sorted(read_lines(output), key=lambda line: line["path"])
+    # depends on the block size of the file system
+    for line in lines:
+        assert line.pop("allocated") >= line["size"]
+    assert lines == [
+        {
+            "path": str(tree / "movie.mp4"),
+            "size": 2048,
+            "mode": "-rw-r--r--",
+            "category": "Video",
+            "large": True,
+            "bad_permissions": False,
+        },
+        {
+            "path": str(tree / "notes.txt"),
+            "size": 10,
+            "mode": "-rwxrwxrwx",
+            "category": "Text",
+            "large": False,
+            "bad_permissions": True,
+        },
+    ]
+
+
+def test_stream_size_basis(tmp_path: Path):
+    output = tmp_path / "files.ndjson"
+    stream = NdjsonStream(str(output), size_threshold="4 KiB", size_basis="allocated")
+
+    stream.add_record(FileRecord("/a.txt", 10, 0o100644, 1, 0.0, blocks=8))
+    stream.add_record(FileRecord("/b.img", 8192, 0o100644, 2, 0.0, blocks=0))
+    stream.close()
+
+    assert [(line["allocated"], line["large"]) for line in read_lines(output)] == [
+        (4096, True),
+        (0, False),
+    ]
+
+
+def test_stream_is_written_in_batches(tmp_path: Path):
+    output = tmp_path / "files.ndjson"
+    stream = NdjsonStream(str(output))
+    stream.BATCH_SIZE = 2
+
+    stream.add_record(FileRecord("/a.txt", 1, 0o100644, 1, 0.0))
+    assert output.read_bytes() == b""
+    stream.add_record(FileRecord("/b.txt", 1, 0o100644, 2, 0.0))
+    assert len(read_lines(output)) == 2
+
+    stream.remove_record(FileRecord("/a.txt", 1, 0o100644, 1, 0.0))
+    stream.close()
+    assert read_lines(output)[-1] == {"path": "/a.txt", "removed": True}
+    assert stream.records_written == 2
+
+
+def test_stream_directory_gzip(tree: Path, tmp_path: Path):
+    output = tmp_path / "files.ndjson.gz"
+    stream_directory(tree, NdjsonStream(str(output), compress=True))
+
+    paths = sorted(line["path"] for line in read_lines(output, compressed=True))
+    assert paths == [str(tree / "movie.mp4"), str(tree / "notes.txt")]
+
+
+def test_stream_sniffed_categories(tree: Path, tmp_path: Path):
+    (tree / "program").write_bytes(b"\x7fELF" + b"\x00" * 100)
+    output = tmp_path / "files.ndjson"
+    sniffer = ContentSniffer()
+    stream_directory(
+        tree, NdjsonStream(str(output), resolver=CategoryResolver(sniffer))
+    )
+
+    categories = {line["path"]: line["category"] for line in read_lines(output)}
+    assert categories[str(tree / "program")] == "Executable"
+    assert categories[str(tree / "movie.mp4")] == "Video"
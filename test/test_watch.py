@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from analyzer.categorization import Categorization
+from analyzer.large_files import LargeFileIdentifier
+from analyzer.permissions import FilePermissionsChecker
+from analyzer.summary import Summary
+from analyzer.watch import DirectoryWatcher
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "logs" / "app.log").write_bytes(b"x" * 10)
+    (tmp_path / "upload.mp4").write_bytes(b"x" * 2048)
+    return tmp_path
+
+
+@pytest.fixture
+def watcher(tree: Path):
+    analyzers = [
+        Categorization(),
+        FilePermissionsChecker(),
+        LargeFileIdentifier("1 KiB"),
+        Summary(),
+    ]
+    with DirectoryWatcher(tree, analyzers) as directory_watcher:
+        directory_watcher.scan()
+        yield directory_watcher
+
+
+def poll_until(watcher: DirectoryWatcher, condition) -> None:
+    for _ in range(50):
+        watcher.poll(0.05)
+        if condition():
+            return
+    raise AssertionError("timed out waiting for inotify events")
+
+
+def test_initial_scan(watcher: DirectoryWatcher):
+    summary = watcher.analyzers[3]
+    assert summary.total_files == 2
+    assert summary.total_size == 2058
+    assert len(watcher.records) == 2
+
+
+def test_create_modify_and_delete(watcher: DirectoryWatcher, tree: Path):
+    categorization, _, large_files, summary = watcher.analyzers
+
+    (tree / "logs" / "new.log").write_bytes(b"x" * 5)
+    poll_until(watcher, lambda: summary.total_files == 3)
+    assert summary.total_size == 2063
+
+    with open(tree / "logs" / "app.log", "ab") as log:
+        log.write(b"x" * 2000)
+    poll_until(watcher, lambda: summary.total_size == 4063)
+    assert summary.total_files == 3
+    assert len(large_files.large_files) == 2
+
+    (tree / "upload.mp4").unlink()
+    poll_until(watcher, lambda: summary.total_files == 2)
+    assert summary.total_size == 2015
+    assert "Video" not in categorization.category_data
+    assert [entry.file_path for entry in large_files.large_files] == [
+        str(tree / "logs" / "app.log")
+    ]
+
+
+def test_chmod(watcher: DirectoryWatcher, tree: Path):
+    permissions = watcher.analyzers[1]
+    assert permissions.is_report_empty()
+
+    os.chmod(tree / "upload.mp4", 0o777)
+    poll_until(watcher, lambda: not permissions.is_report_empty())
+
+    os.chmod(tree / "upload.mp4", 0o644)
+    poll_until(watcher, permissions.is_report_empty)
+
+
+def test_new_and_removed_directories(watcher: DirectoryWatcher, tree: Path):
+    summary = watcher.analyzers[3]
+
+    (tree / "spool" / "nested").mkdir(parents=True)
+    poll_until(
+        watcher, lambda: str(tree / "spool" / "nested") in watcher._directories.values()
+    )
+    (tree / "spool" / "nested" / "file.bin").write_bytes(b"x" * 7)
+    poll_until(watcher, lambda: summary.total_files == 3)
+
+    (tree / "logs").rename(tree / "archive")
+    poll_until(watcher, lambda: str(tree / "archive" / "app.log") in watcher.records)
+    assert summary.total_files == 3
+    assert str(tree / "logs" / "app.log") not in watcher.records
+
+
+def test_hard_links(tree: Path):
+    os.link(tree / "upload.mp4", tree / "logs" / "upload.mp4")
+    summary = Summary()
+    with DirectoryWatcher(tree, [summary]) as watcher:
+        watcher.scan()
+        assert summary.total_files == 2
+        assert summary.total_size == 2058
+
+        # the remaining link is counted, with the changes made through the other
+        with open(tree / "upload.mp4", "ab") as upload:
+            upload.write(b"x" * 100)
+        (tree / "upload.mp4").unlink()
+        poll_until(watcher, lambda: str(tree / "upload.mp4") not in watcher.records)
+        assert summary.total_files == 2
+        assert summary.total_size == 2158
+
+        (tree / "logs" / "upload.mp4").unlink()
+        poll_until(watcher, lambda: summary.total_files == 1)
+        assert summary.total_size == 10
+
+
+def test_count_hard_links(tree: Path):
+    os.link(tree / "upload.mp4", tree / "logs" / "upload.mp4")
+    summary = Summary()
+    with DirectoryWatcher(tree, [summary], count_hardlinks=True) as watcher:
+        watcher.scan()
+        assert summary.total_files == 3